@@ -3,6 +3,7 @@ from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 from app.database import SessionLocal, Base, engine
 from app.models import User
+from app.services import people
 
 pwd = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -17,6 +18,7 @@ def ensure_user(db: Session, *, username: str, plain_password: str, role: str, n
             designation=designation,
         )
         db.add(u)
+        people.reindex(db, "user", u)
         db.commit()
         print(f"CREATED: {username} ({role})")
     else:
@@ -25,6 +27,7 @@ def ensure_user(db: Session, *, username: str, plain_password: str, role: str, n
         u.role = role
         u.name = name
         u.designation = designation
+        people.reindex(db, "user", u)
         db.commit()
         print(f"UPDATED: {username} ({role})")
 
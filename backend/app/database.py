@@ -1,7 +1,15 @@
 # app/database.py
+from pathlib import Path
 import os
-from sqlalchemy import create_engine
+import time
+
+from sqlalchemy import create_engine, event, exc, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool, StaticPool
+
+from app.services import metrics
 
 Base = declarative_base()
 
@@ -11,18 +19,169 @@ DB_HOST = os.getenv("DB_HOST", "127.0.0.1")
 DB_PORT = os.getenv("DB_PORT", "3306")
 DB_NAME = os.getenv("DB_NAME", "randomiser")
 
-DATABASE_URL = os.getenv(
-    "DATABASE_URL",
-    f"mysql+pymysql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}?charset=utf8mb4",
+# "mysql" (server install), "sqlite" (standalone kiosk: one local file) or
+# "memory" (demo / throwaway: nothing survives a restart). Each has a sync
+# driver (pymysql / sqlite3) and an async one (aiomysql / aiosqlite).
+DB_BACKEND = os.getenv("DB_BACKEND", "mysql").strip().lower()
+DB_SQLITE_PATH = os.getenv("DB_SQLITE_PATH", "storage/randomiser.db")
+
+# Sync routes run on anyio's 40-thread pool; size + overflow covers all of them
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "30"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))
+# "always" pings on every checkout (an extra round trip each time), "idle"
+# only pings connections unused for DB_PRE_PING_IDLE seconds, "never" relies
+# on the driver's disconnect errors invalidating the pool
+DB_PRE_PING = os.getenv("DB_PRE_PING", "idle").strip().lower()
+DB_PRE_PING_IDLE = float(os.getenv("DB_PRE_PING_IDLE", "60"))
+# Connections opened at startup (0 = lazy)
+DB_POOL_WARM = int(os.getenv("DB_POOL_WARM", str(DB_POOL_SIZE)))
+
+
+def _default_url() -> str:
+    if DB_BACKEND == "memory":
+        # Named shared-cache DB so the sync and async engines see the same data
+        return "sqlite:///file:randomiser?mode=memory&cache=shared&uri=true"
+    if DB_BACKEND == "sqlite":
+        Path(DB_SQLITE_PATH).parent.mkdir(parents=True, exist_ok=True)
+        return f"sqlite:///{Path(DB_SQLITE_PATH).resolve()}"
+    return f"mysql+pymysql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}?charset=utf8mb4"
+
+
+DATABASE_URL = os.getenv("DATABASE_URL") or _default_url()
+_url = make_url(DATABASE_URL)
+IS_SQLITE = _url.get_backend_name() == "sqlite"
+IN_MEMORY = IS_SQLITE and (
+    _url.database in (None, "", ":memory:") or _url.query.get("mode") == "memory"
 )
 
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=3600,
-    echo=False,
-    future=True,
+_ASYNC_DRIVERS = {"mysql": "mysql+aiomysql", "sqlite": "sqlite+aiosqlite"}
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _url.set(
+    drivername=_ASYNC_DRIVERS.get(_url.get_backend_name(), _url.drivername)
+).render_as_string(hide_password=False)
+
+
+def _engine_args(asynchronous: bool = False) -> dict:
+    if IN_MEMORY:
+        # One shared connection, or every checkout would see an empty database
+        return {
+            "poolclass": StaticPool,
+            "connect_args": {"check_same_thread": False},
+        }
+    args = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_PRE_PING == "always",
+    }
+    if not asynchronous:
+        # QueuePool that times checkouts for /metrics
+        args["poolclass"] = metrics.TimedQueuePool
+    if IS_SQLITE:
+        args["connect_args"] = {"check_same_thread": False}
+    return args
+
+
+def _sqlite_pragmas(dbapi_conn, record):
+    # WAL lets the kiosk read reports while an upload is being written
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.execute("PRAGMA busy_timeout=5000")
+    cur.close()
+
+
+def _mark_idle(dbapi_conn, record):
+    record.info["idle_since"] = time.monotonic()
+
+
+def _ping_if_idle(dbapi_conn, record, proxy):
+    since = record.info.get("idle_since")
+    if since is None or time.monotonic() - since < DB_PRE_PING_IDLE:
+        return
+    cur = dbapi_conn.cursor()
+    try:
+        cur.execute("SELECT 1")
+    except Exception:
+        # The pool drops this connection and retries with a fresh one
+        raise exc.DisconnectionError()
+    finally:
+        try:
+            cur.close()
+        except Exception:
+            pass
+
+
+def _configure(engine: Engine) -> None:
+    """Connection hooks shared by the sync engine and the async one's core."""
+    if IS_SQLITE and not IN_MEMORY:
+        event.listen(engine, "connect", _sqlite_pragmas)
+    if DB_PRE_PING == "idle" and not IN_MEMORY:
+        event.listen(engine, "checkin", _mark_idle)
+        event.listen(engine, "checkout", _ping_if_idle)
+
+
+engine = create_engine(DATABASE_URL, echo=False, future=True, **_engine_args())
+_configure(engine)
+metrics.instrument_pool(engine)
+
+# Read-heavy listing routes are ``async def`` on this engine, so waiting on
+# the database doesn't hold one of the sync threadpool's slots
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, echo=False, **_engine_args(asynchronous=True)
 )
+_configure(async_engine.sync_engine)
+
+
+def _queue_stats(pool) -> dict:
+    return {
+        "size": pool.size(),
+        "max_overflow": DB_MAX_OVERFLOW,
+        "timeout": pool.timeout(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(0, pool.overflow()),
+        "available": pool.size() + DB_MAX_OVERFLOW - pool.checkedout(),
+    }
+
+
+def pool_stats() -> dict:
+    pool = engine.pool
+    stats = {
+        "backend": _url.get_backend_name(),
+        "database": (
+            (_url.database or ":memory:") if IS_SQLITE
+            else _url.render_as_string(hide_password=True)
+        ),
+        "pool": type(pool).__name__,
+        "pre_ping": "n/a" if IN_MEMORY else DB_PRE_PING,
+    }
+    if isinstance(pool, QueuePool):
+        stats.update(_queue_stats(pool))
+    apool = async_engine.pool
+    stats["async"] = {"pool": type(apool).__name__}
+    if isinstance(apool, QueuePool):
+        stats["async"].update(_queue_stats(apool))
+    return stats
+
+
+def warm_pool(n: int = DB_POOL_WARM) -> int:
+    """Open ``n`` connections now so the first requests don't pay for them."""
+    if IN_MEMORY or n <= 0:
+        return 0
+    conns = []
+    try:
+        for _ in range(min(n, DB_POOL_SIZE)):
+            c = engine.connect()
+            conns.append(c)
+            c.execute(text("SELECT 1"))
+    finally:
+        for c in conns:
+            c.close()  # back to the pool, still open
+    return len(conns)
+
 
 SessionLocal = sessionmaker(
     bind=engine,
@@ -32,6 +191,13 @@ SessionLocal = sessionmaker(
     future=True,
 )
 
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 # FastAPI dependency
 def get_db():
     db = SessionLocal()
@@ -40,7 +206,15 @@ def get_db():
     finally:
         db.close()
 
+# FastAPI dependency for ``async def`` routes
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 def init_db() -> None:
     # Import all model classes so they register on Base.metadata
     from app import models  # noqa: F401  (don't remove; side-effect import)
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    from app.migrations import upgrade
+
+    Base.metadata.create_all(bind=engine)
+    upgrade(engine)
\ No newline at end of file
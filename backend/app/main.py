@@ -1,5 +1,5 @@
 from fastapi import FastAPI
-from app.database import init_db , engine, Base
+from app.database import init_db , engine, async_engine, Base, warm_pool
 from fastapi.middleware.cors import CORSMiddleware
 import app.routes.auth as auth
 import app.routes.uploads as uploads
@@ -9,6 +9,11 @@ from app.routes.compat import router as compat_router
 from app.routes import admin_users
 from app.routes import departments as departments_routes
 from app.routes import shifts
+from app.routes import stats as stats_routes
+from app.routes import people as people_routes
+from app.routes import metrics as metrics_routes
+from app.services.jobs import registry as job_registry
+from app.services import artifacts, auth as auth_service, metrics, render_pool
 
 
 app = FastAPI()
@@ -16,16 +21,29 @@ app = FastAPI()
 @app.on_event("startup")
 def _startup():
     init_db()
+    warm_pool()
+    render_pool.start()
+    artifacts.start_sweeper()
+
+@app.on_event("shutdown")
+async def _shutdown():
+    artifacts.stop_sweeper()
+    job_registry.shutdown()
+    render_pool.shutdown()
+    auth_service.shutdown()
+    await async_engine.dispose()
 
 Base.metadata.create_all(bind=engine)
 
+app.middleware("http")(metrics.timing_middleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173", "http://127.0.0.1:5173"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["Content-Disposition"],
+    expose_headers=["Content-Disposition", "ETag"],
 )
 
 
@@ -36,5 +54,8 @@ app.include_router(admin_users.router)
 app.include_router(departments_routes.router)
 app.include_router(shifts.router)
 app.include_router(admin_stations.router)
+app.include_router(stats_routes.router)
+app.include_router(people_routes.router)
+app.include_router(metrics_routes.router)
 app.include_router(compat_router, prefix="/api", tags=["compat"], include_in_schema=False)
 
@@ -0,0 +1,211 @@
+# app/migrations.py
+"""Schema upgrades for databases created by older builds.
+
+``Base.metadata.create_all`` only creates missing tables, so columns and
+indexes added to existing models are applied here on startup, along with
+the few in-place type changes.
+
+Monthly range partitioning of ``reports`` (MySQL only) is opt-in, since it
+rebuilds the table::
+
+    python -m app.migrations partition-reports
+"""
+from datetime import date
+import sys
+
+from sqlalchemy import Date, inspect, text
+from sqlalchemy.engine import Engine
+
+from app.database import Base
+
+
+# Run once, right after the listed column is added, to fill it for old rows
+BACKFILLS = {
+    ("reports", "station_key"): [
+        "UPDATE reports SET station_key = LOWER(TRIM(station)),"
+        " department_key = LOWER(TRIM(department)),"
+        " shift_key = LOWER(TRIM(shift))",
+    ],
+    ("reports", "test_type"): [
+        # Older rows only carry the test type in the file name suffix
+        "UPDATE reports SET test_type = CASE"
+        " WHEN UPPER(file_name) LIKE '%PA.PDF' THEN 'PA' ELSE 'BA' END",
+    ],
+    ("selections", "station_key"): [
+        "UPDATE selections SET station_key = LOWER(TRIM(station)),"
+        " department_key = LOWER(TRIM(department))",
+    ],
+}
+
+
+def _add_missing_columns(engine: Engine) -> set[tuple[str, str]]:
+    added: set[tuple[str, str]] = set()
+    insp = inspect(engine)
+    q = engine.dialect.identifier_preparer.quote
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not insp.has_table(table.name):
+                continue
+            have = {c["name"] for c in insp.get_columns(table.name)}
+            for col in table.columns:
+                if col.name in have:
+                    continue
+                col_type = col.type.compile(dialect=engine.dialect)
+                conn.execute(
+                    text(f"ALTER TABLE {q(table.name)} ADD COLUMN {q(col.name)} {col_type}")
+                )
+                added.add((table.name, col.name))
+    return added
+
+
+def _backfill(engine: Engine, added: set[tuple[str, str]]) -> None:
+    with engine.begin() as conn:
+        for key, statements in BACKFILLS.items():
+            if key in added:
+                for sql in statements:
+                    conn.execute(text(sql))
+
+
+def _report_date_type(engine: Engine) -> None:
+    """reports.date used to be VARCHAR(20) holding ISO dates; make it DATE."""
+    if engine.dialect.name != "mysql":
+        return  # SQLite keeps dates as ISO text either way
+    insp = inspect(engine)
+    if not insp.has_table("reports"):
+        return
+    col = next(c for c in insp.get_columns("reports") if c["name"] == "date")
+    if isinstance(col["type"], Date):
+        return
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "UPDATE reports SET date = CAST(created_at AS DATE)"
+                " WHERE date IS NULL OR date NOT LIKE '____-__-__'"
+            )
+        )
+        conn.execute(text("ALTER TABLE reports MODIFY COLUMN date DATE NOT NULL"))
+
+
+def _seed_report_stats(engine: Engine) -> None:
+    """First start with the rollup table: build it from existing reports."""
+    from sqlalchemy.orm import Session
+    from app.services import stats
+
+    with Session(engine) as db:
+        has_stats = db.execute(text("SELECT 1 FROM report_stats LIMIT 1")).first()
+        has_reports = db.execute(text("SELECT 1 FROM reports LIMIT 1")).first()
+        if has_reports and not has_stats:
+            stats.rebuild(db)
+
+
+def _seed_people_tokens(engine: Engine) -> None:
+    """First start with the directory index: tokenise existing accounts."""
+    from sqlalchemy.orm import Session
+    from app.services import people
+
+    with Session(engine) as db:
+        if db.execute(text("SELECT 1 FROM people_tokens LIMIT 1")).first():
+            return
+        if any(
+            db.execute(text(f"SELECT 1 FROM {m.__tablename__} LIMIT 1")).first()
+            for m in people.MODELS.values()
+        ):
+            people.rebuild(db)
+
+
+def _create_missing_indexes(engine: Engine) -> None:
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for idx in table.indexes:
+                idx.create(conn, checkfirst=True)
+
+
+def upgrade(engine: Engine) -> None:
+    added = _add_missing_columns(engine)
+    _backfill(engine, added)
+    _report_date_type(engine)
+    _create_missing_indexes(engine)
+    _seed_report_stats(engine)
+    _seed_people_tokens(engine)
+
+
+# ---------- reports partitioning (MySQL) ----------
+# MySQL requires the partition column in every unique key, which is why
+# the primary key becomes (id, date) and the idempotency index includes
+# date. The ORM still maps ``id`` alone as the identity: it stays unique.
+
+def _month_start(d: date, add: int = 0) -> date:
+    m = d.month - 1 + add
+    return date(d.year + m // 12, m % 12 + 1, 1)
+
+
+def _partition_sql(start: date, end: date) -> list[str]:
+    """One ``pYYYYMM`` partition per month in [start, end)."""
+    out, m = [], _month_start(start)
+    while m < end:
+        nxt = _month_start(m, 1)
+        out.append(f"PARTITION p{m:%Y%m} VALUES LESS THAN ('{nxt.isoformat()}')")
+        m = nxt
+    return out
+
+
+def report_partitions(engine: Engine) -> list[str]:
+    with engine.connect() as conn:
+        return list(
+            conn.execute(
+                text(
+                    "SELECT PARTITION_NAME FROM information_schema.PARTITIONS"
+                    " WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'reports'"
+                    " AND PARTITION_NAME IS NOT NULL ORDER BY PARTITION_ORDINAL_POSITION"
+                )
+            ).scalars()
+        )
+
+
+def partition_reports(engine: Engine, months_ahead: int = 3) -> None:
+    """Rebuild ``reports`` partitioned by month on ``date`` (idempotent)."""
+    if engine.dialect.name != "mysql":
+        raise RuntimeError("Partitioning is only supported on MySQL")
+    if report_partitions(engine):
+        return
+    with engine.begin() as conn:
+        first = conn.execute(text("SELECT MIN(date) FROM reports")).scalar()
+        today = date.today()
+        parts = _partition_sql(first or today, _month_start(today, months_ahead + 1))
+        parts.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+        conn.execute(text("ALTER TABLE reports DROP PRIMARY KEY, ADD PRIMARY KEY (id, date)"))
+        conn.execute(
+            text(f"ALTER TABLE reports PARTITION BY RANGE COLUMNS(date) ({', '.join(parts)})")
+        )
+
+
+def add_report_partitions(engine: Engine, months_ahead: int = 3) -> None:
+    """Split ``pmax`` so the next ``months_ahead`` months have their own partition."""
+    have = set(report_partitions(engine))
+    if "pmax" not in have:
+        return
+    today = date.today()
+    parts = [
+        p
+        for p in _partition_sql(_month_start(today), _month_start(today, months_ahead + 1))
+        if p.split()[1] not in have
+    ]
+    if not parts:
+        return
+    parts.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+    with engine.begin() as conn:
+        conn.execute(
+            text(f"ALTER TABLE reports REORGANIZE PARTITION pmax INTO ({', '.join(parts)})")
+        )
+
+
+if __name__ == "__main__":
+    from app.database import engine
+    from app import models  # noqa: F401  (registers tables on Base.metadata)
+
+    upgrade(engine)
+    if sys.argv[1:] == ["partition-reports"]:
+        partition_reports(engine)
+        add_report_partitions(engine)
+        print("reports partitions:", ", ".join(report_partitions(engine)))
+    print("Schema up to date:", engine.url)
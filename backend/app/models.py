@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, Integer, String, DateTime, func
+from sqlalchemy import Boolean, Column, Date, Integer, String, DateTime, Index, func
 from app.database import Base
 
 class SuperAdmin(Base):
@@ -78,12 +78,130 @@ class Report(Base):
     __tablename__ = "reports"
     id = Column(Integer, primary_key=True, autoincrement=True)
     file_name = Column(String(255))
-    file_path = Column(String(500))
-    date = Column(String(20))
+    file_path = Column(String(500))  # pre-store builds only; see services/artifacts
+    artifact_id = Column(Integer)  # artifacts.id of the stored PDF
+    # Partition key when reports is range-partitioned by month (see
+    # migrations.partition_reports); every unique index must include it.
+    date = Column(Date, nullable=False)
     shift = Column(String(50))
     department = Column(String(80))
     station = Column(String(20))
+    # Lowercase copies of the filter columns (see services/report_listing)
+    shift_key = Column(String(50))
+    department_key = Column(String(80))
+    station_key = Column(String(20))
+    test_type = Column(String(2))
     percent = Column(Integer)
+    uploaded_by = Column(String(64))
     total_count = Column(Integer)
     selected_count = Column(Integer)
+    selection_strategy = Column(String(20))
+    selection_seed = Column(String(32))  # hex; replays the exact selection
+    upload_sha256 = Column(String(64))
+    idempotency_key = Column(String(64))  # see services/idempotency.request_key
     created_at = Column(DateTime, server_default=func.current_timestamp())
+
+    __table_args__ = (
+        Index("ux_reports_idempotency_key_date", "idempotency_key", "date", unique=True),
+        Index("ix_reports_date", "date"),
+        Index(
+            "ix_reports_station_dept_date_created",
+            "station_key", "department_key", "date", "created_at",
+        ),
+        Index("ix_reports_created", "created_at", "id"),
+        Index("ix_reports_test_type_created", "test_type", "created_at"),
+    )
+
+
+class Selection(Base):
+    """One row per employee picked in a report (who was tested, when, where)."""
+    __tablename__ = "selections"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    report_id = Column(Integer, nullable=False)
+    employee_id = Column(String(64), nullable=False)
+    employee_name = Column(String(255))
+    date = Column(Date, nullable=False)
+    station = Column(String(20))
+    department = Column(String(80))
+    shift = Column(String(50))
+    # Lowercase copies, same as Report's, for the fairness queries
+    station_key = Column(String(20))
+    department_key = Column(String(80))
+    created_at = Column(DateTime, server_default=func.current_timestamp())
+
+    __table_args__ = (
+        Index("ix_selections_report", "report_id"),
+        Index("ix_selections_employee_date", "employee_id", "date"),
+        Index("ix_selections_station_dept_key_date", "station_key", "department_key", "date"),
+    )
+
+
+class ReportStat(Base):
+    """Daily rollup of reports per station x department x shift x test type.
+
+    Maintained incrementally by services/stats.bump in the same transaction
+    as the Report row; department and shift hold the lowercase keys.
+    """
+    __tablename__ = "report_stats"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    date = Column(Date, nullable=False)
+    station = Column(String(20), nullable=False)
+    department = Column(String(80), nullable=False)
+    shift = Column(String(50), nullable=False)
+    test_type = Column(String(2), nullable=False)
+    reports = Column(Integer, nullable=False, default=0)
+    total_count = Column(Integer, nullable=False, default=0)
+    selected_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(
+        DateTime, server_default=func.current_timestamp(), onupdate=func.current_timestamp()
+    )
+
+    __table_args__ = (
+        Index(
+            "ux_report_stats_day_key",
+            "date", "station", "department", "shift", "test_type",
+            unique=True,
+        ),
+        Index("ix_report_stats_station_dept_date", "station", "department", "date"),
+    )
+
+
+class PersonToken(Base):
+    """Search prefixes for the people directory (see services/people.py).
+
+    One row per word of a superadmin's, admin's or user's username, name
+    and email; ``token LIKE 'q%'`` is a range scan on the lookup index.
+    """
+    __tablename__ = "people_tokens"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    role = Column(String(16), nullable=False)  # superadmin | admin | user
+    person_id = Column(Integer, nullable=False)
+    token = Column(String(64), nullable=False)
+
+    __table_args__ = (
+        Index("ix_people_tokens_lookup", "role", "token", "person_id"),
+        Index("ix_people_tokens_person", "role", "person_id"),
+    )
+
+
+class Artifact(Base):
+    """A stored PDF, by content (see services/artifacts.py).
+
+    ``storage_key`` is ``YYYY/MM/DD/<sha256>.pdf`` in the configured backend;
+    once archived the bytes live in the ``archive_key`` zip instead.
+    """
+    __tablename__ = "artifacts"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    sha256 = Column(String(64), nullable=False)
+    backend = Column(String(8), nullable=False)  # local | s3
+    storage_key = Column(String(255), nullable=False)
+    size = Column(Integer, nullable=False)
+    date = Column(Date, nullable=False)  # shard day
+    archive_key = Column(String(255))
+    archived_at = Column(DateTime)
+    created_at = Column(DateTime, server_default=func.current_timestamp())
+
+    __table_args__ = (
+        Index("ux_artifacts_sha256", "sha256", unique=True),
+        Index("ix_artifacts_archived_date", "archived_at", "date"),
+    )
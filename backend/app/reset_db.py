@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 from passlib.context import CryptContext
 from app.database import Base, engine, SessionLocal
 from app import models
+from app.services import people
 
 pwd = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -50,6 +51,7 @@ def reset_and_seed():
         db.add(u)
 
         db.commit()
+        people.rebuild(db)
         print("✅ Seed complete: 1 superadmin, 1 admin, 1 user created.")
     finally:
         db.close()
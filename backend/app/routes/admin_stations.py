@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import select, func, or_
 from app.database import get_db
 from app import models
+from app.services import reference_cache
 
 router = APIRouter(prefix="/api/admin/stations", tags=["admin:stations"])
 
@@ -65,6 +66,7 @@ def create_station(payload: StationCreate, db: Session = Depends(get_db)):
     s = models.Station(name=payload.name.strip(), code=payload.code.strip().upper(),
                        is_active=payload.is_active)
     db.add(s); db.commit(); db.refresh(s)
+    reference_cache.invalidate_reference()
     return s
 
 @router.patch("/{id}", response_model=StationOut)
@@ -79,6 +81,7 @@ def update_station(id: int, payload: StationUpdate, db: Session = Depends(get_db
     if payload.is_active is not None:
         s.is_active = payload.is_active
     db.commit(); db.refresh(s)
+    reference_cache.invalidate_reference()
     return s
 
 @router.patch("/{id}/active", response_model=StationOut)
@@ -88,6 +91,7 @@ def toggle_station_active(id: int, is_active: bool, db: Session = Depends(get_db
         raise HTTPException(status_code=404, detail="Station not found")
     s.is_active = bool(is_active)
     db.commit(); db.refresh(s)
+    reference_cache.invalidate_reference()
     return s
 
 @router.delete("/{id}", status_code=204)
@@ -96,4 +100,5 @@ def delete_station(id: int, db: Session = Depends(get_db)):
     if not s:
         raise HTTPException(status_code=404, detail="Station not found")
     db.delete(s); db.commit()
+    reference_cache.invalidate_reference()
     return None
@@ -1,17 +1,22 @@
 from datetime import datetime
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from pathlib import Path
+import shutil
+import tempfile
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile
 from pydantic import BaseModel, EmailStr
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import select, or_, func
-from passlib.context import CryptContext
+from sqlalchemy import select, func
 
 from app import models
-from app.database import get_db
+from app.services import auth, people, reference_cache
+from app.services.jobs import FAILED, JobQueueFull, registry, run_user_import_job
+from app.database import get_async_db, get_db
 
 router = APIRouter(prefix="/api/admin/users", tags=["admin-users"])
-pwd = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # ---------- Schemas ----------
 
@@ -60,25 +65,21 @@ class ToggleActive(BaseModel):
 # ---------- Routes ----------
 
 @router.get("", response_model=dict)
-def list_users(
-    q: str = Query("", description="search by name/email/username/role"),
+async def list_users(
+    q: str = Query("", description="word prefixes of name/email/username/role"),
     page: int = Query(1, ge=1),
     per_page: int = Query(8, ge=1, le=100),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    base = select(models.User).order_by(models.User.created_at.desc())
-    if q:
-        like = f"%{q}%"
-        base = base.where(
-            or_(
-                func.lower(models.User.name).like(func.lower(like)),
-                func.lower(models.User.email).like(func.lower(like)),
-                func.lower(models.User.username).like(func.lower(like)),
-                func.lower(models.User.role).like(func.lower(like)),
-            )
-        )
-    total = db.execute(select(func.count()).select_from(base.subquery())).scalar() or 0
-    items = db.execute(base.limit(per_page).offset((page - 1) * per_page)).scalars().all()
+    base = (
+        select(models.User)
+        .where(*people.matching("user", people.search_terms(q)))
+        .order_by(models.User.created_at.desc())
+    )
+    total = (await db.execute(select(func.count()).select_from(base.subquery()))).scalar() or 0
+    items = (
+        await db.execute(base.limit(per_page).offset((page - 1) * per_page))
+    ).scalars().all()
     return {
         "items": [UserOut.model_validate(u).model_dump() for u in items],
         "total": total,
@@ -105,14 +106,52 @@ def create_user(payload: UserCreate, db: Session = Depends(get_db)):
         station=payload.station,
         role="user",
         is_active=payload.is_active if payload.is_active is not None else True,
-        hashed_password=pwd.hash(payload.password),   # <- correct column
+        hashed_password=auth.hash_password_sync(payload.password),   # <- correct column
         created_at=datetime.utcnow(),
     )
     db.add(user)
+    people.reindex(db, "user", user)
     db.commit()
+    reference_cache.invalidate_users()
     db.refresh(user)
     return user
 
+@router.post("/import", status_code=202)
+def import_users(
+    file: UploadFile = File(...),
+    default_role: str = Form("user"),
+):
+    """Bulk upsert from an HR sheet; poll the returned job for progress."""
+    if Path(file.filename or "").suffix.lower() != ".xlsx":
+        raise HTTPException(status_code=400, detail="Only .xlsx files are allowed")
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx") as tmp:
+        shutil.copyfileobj(file.file, tmp)
+    src = Path(tmp.name)
+    try:
+        job = registry.submit("user-import", run_user_import_job, src, default_role)
+    except JobQueueFull as e:
+        src.unlink(missing_ok=True)
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "poll": f"/api/uploads/jobs/{job.id}",
+        "events": f"/api/uploads/jobs/{job.id}/events",
+        "result": f"{router.prefix}/import/{job.id}",
+    }
+
+@router.get("/import/{job_id}")
+def import_result(job_id: str):
+    """Summary of a finished import (inserted / updated / skipped rows)."""
+    job = registry.get(job_id)
+    if not job or job.kind != "user-import":
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status == FAILED:
+        raise HTTPException(status_code=job.error_status or 500, detail=job.error)
+    if not job.finished:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    return job.result
+
 @router.patch("/{user_id}", response_model=UserOut)
 def update_user(user_id: int, payload: UserUpdate, db: Session = Depends(get_db)):
     user = db.get(models.User, user_id)
@@ -137,9 +176,11 @@ def update_user(user_id: int, payload: UserUpdate, db: Session = Depends(get_db)
     if payload.is_active is not None:
         user.is_active = payload.is_active
     if payload.password:
-        user.hashed_password = pwd.hash(payload.password)   # <- use `user`, not db_user
+        user.hashed_password = auth.hash_password_sync(payload.password)   # <- use `user`, not db_user
 
+    people.reindex(db, "user", user)
     db.commit()
+    reference_cache.invalidate_users()
     db.refresh(user)
     return user
 
@@ -150,6 +191,7 @@ def toggle_active(user_id: int, body: ToggleActive, db: Session = Depends(get_db
         raise HTTPException(status_code=404, detail="User not found")
     user.is_active = body.is_active
     db.commit()
+    reference_cache.invalidate_users()
     db.refresh(user)
     return user
 
@@ -158,6 +200,8 @@ def delete_user(user_id: int, db: Session = Depends(get_db)):
     user = db.get(models.User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    people.forget(db, "user", user.id)
     db.delete(user)
     db.commit()
+    reference_cache.invalidate_users()
     return {"ok": True}
@@ -1,14 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from passlib.context import CryptContext
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from sqlalchemy import select, or_, func, desc
+from sqlalchemy import select, func, desc
 from datetime import datetime
 from app.database import get_db
 from app import models
+from app.services import auth, people
 
 router = APIRouter()
-pwd = CryptContext(schemes=["bcrypt"], deprecated="auto") 
 
 # ---------- Schemas ----------
 class AdminOut(BaseModel):
@@ -57,12 +56,7 @@ def list_admins(
     search: str | None = None,
     db: Session = Depends(get_db),
 ):
-    q = select(models.Admin)
-    if search:
-        s = f"%{search}%"
-        q = q.where(or_(models.Admin.username.like(s),
-                        models.Admin.name.like(s),
-                        models.Admin.email.like(s)))
+    q = select(models.Admin).where(*people.matching("admin", people.search_terms(search)))
     total = db.execute(select(func.count()).select_from(q.subquery())).scalar() or 0
     q = q.order_by(desc(models.Admin.created_at)).offset((page - 1) * page_size).limit(page_size)
     items = db.execute(q).scalars().all()
@@ -80,40 +74,9 @@ def list_admins_and_superadmins(
     search: str | None = None,
     db: Session = Depends(get_db),
 ):
-    # Get admins
-    qa = select(models.Admin)
-    qs = select(models.SuperAdmin)
-    if search:
-        s = f"%{search}%"
-        qa = qa.where(or_(models.Admin.username.like(s),
-                          models.Admin.name.like(s),
-                          models.Admin.email.like(s)))
-        qs = qs.where(or_(models.SuperAdmin.username.like(s),
-                          models.SuperAdmin.name.like(s),
-                          models.SuperAdmin.email.like(s)))
-
-    admins = [ {
-        "id": a.id, "username": a.username, "name": a.name, "email": a.email,
-        "role": "admin", "department": a.department, "station": a.station,
-        "created_at": a.created_at.isoformat() if a.created_at else None
-    } for a in db.execute(qa).scalars().all() ]
-
-    supers = [ {
-        "id": s.id, "username": s.username, "name": s.name, "email": s.email,
-        "role": "superadmin", "department": None, "station": None,
-        "created_at": s.created_at.isoformat() if s.created_at else None
-    } for s in db.execute(qs).scalars().all() ]
-
-    rows = admins + supers
-    rows.sort(key=lambda r: (r["created_at"] or ""), reverse=True)  # newest first
-    total = len(rows)
-    start = (page - 1) * page_size
-    end = start + page_size
-    return {
-        "items": rows[start:end], "total": total,
-        "page": page, "page_size": page_size,
-        "pages": (total + page_size - 1) // page_size,
-    }
+    return people.directory(
+        db, roles={"admin", "superadmin"}, q=search, page=page, page_size=page_size
+    )
 
 # ---------- Create Admin ----------
 @router.post("", response_model=AdminOut, status_code=201)
@@ -122,11 +85,11 @@ def create_admin(payload: AdminCreate, db: Session = Depends(get_db)):
     if exists: raise HTTPException(status_code=409, detail="Username already exists")
     admin = models.Admin(
         username=payload.username,
-        hashed_password=pwd.hash(payload.password),
+        hashed_password=auth.hash_password_sync(payload.password),
         name=payload.name, email=payload.email,
         department=payload.department, station=payload.station,
     )
-    db.add(admin); db.commit(); db.refresh(admin)
+    db.add(admin); people.reindex(db, "admin", admin); db.commit(); db.refresh(admin)
     return AdminOut.model_validate(admin)
 
 # ---------- Update Admin ----------
@@ -134,10 +97,11 @@ def create_admin(payload: AdminCreate, db: Session = Depends(get_db)):
 def update_admin(admin_id: int, payload: AdminUpdate, db: Session = Depends(get_db)):
     obj = db.get(models.Admin, admin_id)
     if not obj: raise HTTPException(status_code=404, detail="Admin not found")
-    if payload.password: obj.hashed_password = pwd.hash(payload.password)
+    if payload.password: obj.hashed_password = auth.hash_password_sync(payload.password)
     for f in ("name","email","department","station"):
         v = getattr(payload, f)
         if v is not None: setattr(obj, f, v)
+    people.reindex(db, "admin", obj)
     db.commit(); db.refresh(obj)
     return AdminOut.model_validate(obj)
 
@@ -146,6 +110,7 @@ def update_admin(admin_id: int, payload: AdminUpdate, db: Session = Depends(get_
 def delete_admin(admin_id: int, db: Session = Depends(get_db)):
     obj = db.get(models.Admin, admin_id)
     if not obj: raise HTTPException(status_code=404, detail="Admin not found")
+    people.forget(db, "admin", obj.id)
     db.delete(obj); db.commit()
     return {"ok": True}
 
@@ -158,6 +123,7 @@ def update_superadmin(sa_id: int, payload: SuperAdminUpdate, db: Session = Depen
     for f in ("name","email"):
         v = getattr(payload, f)
         if v is not None: setattr(obj, f, v)
+    people.reindex(db, "superadmin", obj)
     db.commit(); db.refresh(obj)
     return SuperAdminOut.model_validate(obj)
 
@@ -169,5 +135,6 @@ def delete_superadmin(sa_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Cannot delete the last superadmin")
     obj = db.get(models.SuperAdmin, sa_id)
     if not obj: raise HTTPException(status_code=404, detail="Superadmin not found")
+    people.forget(db, "superadmin", obj.id)
     db.delete(obj); db.commit()
     return {"ok": True}
@@ -6,6 +6,7 @@ from sqlalchemy import select, func
 
 from app.database import get_db
 from app import models
+from app.services import reference_cache
 
 router = APIRouter(prefix="/api/departments", tags=["departments"])
 
@@ -89,6 +90,7 @@ def create_department(body: DeptCreate, db: Session = Depends(get_db)):
     )
     db.add(dep)
     db.commit()
+    reference_cache.invalidate_reference()
     db.refresh(dep)
     return dep
 
@@ -114,6 +116,7 @@ def update_department(dept_id: int, body: DeptUpdate, db: Session = Depends(get_
         dep.is_active = bool(body.is_active)
 
     db.commit()
+    reference_cache.invalidate_reference()
     db.refresh(dep)
     return dep
 
@@ -124,6 +127,7 @@ def toggle_department_active(dept_id: int, body: ToggleBody, db: Session = Depen
         raise HTTPException(status_code=404, detail="Department not found")
     dep.is_active = bool(body.is_active)
     db.commit()
+    reference_cache.invalidate_reference()
     db.refresh(dep)
     return dep
 
@@ -134,3 +138,4 @@ def delete_department(dept_id: int, db: Session = Depends(get_db)):
         return  # 204
     db.delete(dep)
     db.commit()
+    reference_cache.invalidate_reference()
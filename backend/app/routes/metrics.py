@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.database import pool_stats
+from app.services import metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def scrape():
+    """Prometheus text exposition for this worker."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/api/db/pool")
+def db_pool():
+    """Live connection-pool numbers for this worker."""
+    return pool_stats()
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.services import people
+
+router = APIRouter(prefix="/api/people", tags=["people"])
+
+
+@router.get("")
+async def people_directory(
+    search: str | None = Query(None, description="Word prefixes of username, name or email"),
+    roles: str = Query("", description="Comma list of superadmin,admin,user (default all)"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Superadmins, admins and users in one list, newest first."""
+    want = people.parse_roles(roles)
+    bad = sorted(want - set(people.ROLES))
+    if bad:
+        raise HTTPException(
+            status_code=400,
+            detail=f"roles must be from: {', '.join(people.ROLES)}",
+        )
+    return await people.directory_async(
+        db, roles=want or None, q=search, page=page, page_size=page_size
+    )
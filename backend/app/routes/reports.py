@@ -1,27 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import select, and_, func, desc
+from sqlalchemy import select, and_, desc
 from datetime import date
-from pathlib import Path
-from app.database import get_db
+from app.database import get_async_db, get_db
 from app import models
+from app.services import downloads, report_export, report_listing, selection_history
 
 router = APIRouter(prefix="/api/reports", tags=["reports"])
 
 
 @router.get("/user")
-def list_user_reports(
+async def list_user_reports(
     username: str,
-    date_from: str | None = None,
-    date_to: str | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
     shift: str | None = None,                  # ← NEW
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=1000),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     u = (
-        db.execute(select(models.User).where(models.User.username == username))
+        (await db.execute(select(models.User).where(models.User.username == username)))
         .scalars()
         .first()
     )
@@ -35,19 +36,19 @@ def list_user_reports(
         )
     )
     if date_from:
-        q = q.where(models.Report.date >= date.fromisoformat(date_from))
+        q = q.where(models.Report.date >= date_from)
     if date_to:
-        q = q.where(models.Report.date <= date.fromisoformat(date_to))
+        q = q.where(models.Report.date <= date_to)
     if shift:
         q = q.where(models.Report.shift.ilike(shift))  # "Day" / "Night"
 
-    total = db.execute(select(func.count()).select_from(q.subquery())).scalar() or 0
+    total = await report_listing.count_async(db, q)
     q = (
         q.order_by(desc(models.Report.created_at))
         .offset((page - 1) * page_size)
         .limit(page_size)
     )
-    rows = db.execute(q).scalars().all()
+    rows = (await db.execute(q)).scalars().all()
 
     def row(x: models.Report):
         return {
@@ -72,45 +73,43 @@ def list_user_reports(
     }
 
 @router.get("/admin")
-def list_admin_reports(
-    date_from: str | None = None,
-    date_to: str | None = None,
+async def list_admin_reports(
+    date_from: date | None = None,
+    date_to: date | None = None,
     shift: str | None = None,
     department: str | None = None,
     station: str | None = None,
     test_type: str | None = None,                 # "BA" or "PA"
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=1000),
-    db: Session = Depends(get_db),
+    cursor: str | None = None,                    # keyset paging; see next_cursor
+    with_total: bool | None = None,               # default: on for page, off for cursor
+    db: AsyncSession = Depends(get_async_db),
 ):
-    # Base query: all reports
-    q = select(models.Report)
+    q = report_listing.admin_query(date_from, date_to, shift, department, station, test_type)
 
-    # Date range
-    if date_from:
-        q = q.where(models.Report.date >= date.fromisoformat(date_from))
-    if date_to:
-        q = q.where(models.Report.date <= date.fromisoformat(date_to))
+    if with_total is None:
+        with_total = cursor is None
+    total = await report_listing.count_async(db, q) if with_total else None
 
-    # Optional filters
-    if shift:
-        q = q.where(models.Report.shift.ilike(shift))
-    if department:
-        q = q.where(models.Report.department.ilike(department))
-    if station:
-        q = q.where(models.Report.station.ilike(station))
-    if test_type:
-        # test type is embedded in filename suffix: ..._BA.pdf / ..._PA.pdf
-        tt = (test_type or "").upper()
-        q = q.where(models.Report.file_name.ilike(f"%_{tt}.pdf"))
-
-    total = db.execute(select(func.count()).select_from(q.subquery())).scalar() or 0
-    q = (
-        q.order_by(desc(models.Report.created_at))
-        .offset((page - 1) * page_size)
-        .limit(page_size)
-    )
-    rows = db.execute(q).scalars().all()
+    if cursor is not None or page == 1:
+        rows, next_cursor = await report_listing.page_after_async(
+            db, q, cursor or None, page_size
+        )
+    else:
+        # Deep OFFSET pages are kept for the existing page picker
+        rows = (
+            (
+                await db.execute(
+                    report_listing.newest_first(q)
+                    .offset((page - 1) * page_size)
+                    .limit(page_size)
+                )
+            )
+            .scalars()
+            .all()
+        )
+        next_cursor = report_listing.encode_cursor(rows[-1]) if len(rows) == page_size else None
 
     def row(x: models.Report):
         return {
@@ -120,6 +119,7 @@ def list_admin_reports(
             "shift": x.shift,
             "department": x.department,
             "station": x.station,
+            "test_type": x.test_type,
             "percent": x.percent,
             "total_count": x.total_count,
             "selected_count": x.selected_count,
@@ -131,15 +131,84 @@ def list_admin_reports(
         "total": total,
         "page": page,
         "page_size": page_size,
-        "pages": (total + page_size - 1) // page_size,
+        "pages": (total + page_size - 1) // page_size if total is not None else None,
+        "next_cursor": next_cursor,
+    }
+
+@router.get("/admin/export")
+def export_admin_reports(
+    date_from: date | None = None,
+    date_to: date | None = None,
+    shift: str | None = None,
+    department: str | None = None,
+    station: str | None = None,
+    test_type: str | None = None,
+    db: Session = Depends(get_db),
+):
+    """Every report matching the admin list filters as one ZIP (+ manifest.csv)."""
+    q = report_listing.admin_query(date_from, date_to, shift, department, station, test_type)
+    report_export.check_size(db, q)
+    parts = [
+        (station or "").strip().upper(),
+        (test_type or "").strip().upper(),
+        date_from.strftime("%d%m%Y") if date_from else "",
+        date_to.strftime("%d%m%Y") if date_to else "",
+    ]
+    name = "_".join(["REPORTS", *filter(None, parts)]) + ".zip"
+    return StreamingResponse(
+        report_export.stream_zip(q),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f'attachment; filename="{name}"',
+            "Cache-Control": "no-store",
+            "Access-Control-Expose-Headers": "Content-Disposition",
+        },
+    )
+
+@router.get("/selections/employee/{employee_id}")
+def employee_selections(
+    employee_id: str,
+    days: int = Query(30, ge=1, le=3660),
+    db: Session = Depends(get_db),
+):
+    """Was this employee tested in the last N days? (and where)"""
+    rows = selection_history.employee_history(db, employee_id, days)
+    return {
+        "employee_id": employee_id,
+        "days": days,
+        "tested": bool(rows),
+        "count": len(rows),
+        "last_date": rows[0].date.isoformat() if rows else None,
+        "items": [
+            {
+                "report_id": x.report_id,
+                "date": x.date.isoformat(),
+                "station": x.station,
+                "department": x.department,
+                "shift": x.shift,
+            }
+            for x in rows
+        ],
+    }
+
+@router.get("/selections/fairness")
+def selection_fairness(
+    station: str,
+    department: str | None = None,
+    days: int = Query(30, ge=1, le=3660),
+    db: Session = Depends(get_db),
+):
+    """How often each employee was picked in a station/department window."""
+    items = selection_history.pick_counts(db, station, department, days)
+    return {
+        "station": station.upper(),
+        "department": department,
+        "days": days,
+        "employees": len(items),
+        "picks": sum(x["picks"] for x in items),
+        "items": items,
     }
 
 @router.get("/{report_id}/download")
-def download_report(report_id: int, db: Session = Depends(get_db)):
-    r = db.get(models.Report, report_id)
-    if not r:
-        raise HTTPException(status_code=404, detail="Report not found")
-    p = Path(r.file_path)
-    if not p.exists():
-        raise HTTPException(status_code=404, detail="Report file missing on server")
-    return FileResponse(path=str(p), filename=r.file_name, media_type="application/pdf")
+def download_report(report_id: int, request: Request, db: Session = Depends(get_db)):
+    return downloads.download(request, db, report_id)
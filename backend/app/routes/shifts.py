@@ -7,6 +7,7 @@ from sqlalchemy import select, or_, func
 
 from app.database import get_db
 from app import models
+from app.services import reference_cache
 
 router = APIRouter(prefix="/api/shifts", tags=["shifts"])
 
@@ -79,6 +80,7 @@ def create_shift(payload: ShiftIn, db: Session = Depends(get_db)):
     s = models.Shift(name=payload.name.strip(), is_active=payload.is_active)
     db.add(s)
     db.commit()
+    reference_cache.invalidate_reference()
     db.refresh(s)
     return ShiftOut.from_orm_(s)
 
@@ -104,6 +106,7 @@ def update_shift(sid: int, payload: ShiftUpdate, db: Session = Depends(get_db)):
         s.is_active = bool(payload.is_active)
 
     db.commit()
+    reference_cache.invalidate_reference()
     db.refresh(s)
     return ShiftOut.from_orm_(s)
 
@@ -114,6 +117,7 @@ def toggle_shift_active(sid: int, payload: ShiftToggle, db: Session = Depends(ge
         raise HTTPException(status_code=404, detail="Shift not found")
     s.is_active = bool(payload.is_active)
     db.commit()
+    reference_cache.invalidate_reference()
     db.refresh(s)
     return ShiftOut.from_orm_(s)
 
@@ -124,3 +128,4 @@ def delete_shift(sid: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Shift not found")
     db.delete(s)
     db.commit()
+    reference_cache.invalidate_reference()
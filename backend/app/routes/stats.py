@@ -0,0 +1,38 @@
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.services import stats
+
+router = APIRouter(prefix="/api/stats", tags=["stats"])
+
+
+@router.get("")
+def report_stats(
+    date_from: date | None = None,
+    date_to: date | None = None,
+    station: str | None = None,
+    department: str | None = None,
+    shift: str | None = None,
+    test_type: str | None = None,
+    group_by: str = Query("date", description="Comma list of date,station,department,shift,test_type"),
+    db: Session = Depends(get_db),
+):
+    """Totals and grouped rows (reports, staff uploaded, staff selected, ratio)."""
+    groups = tuple(g.strip().lower() for g in group_by.split(",") if g.strip())
+    bad = [g for g in groups if g not in stats.GROUPS]
+    if bad:
+        raise HTTPException(
+            status_code=400,
+            detail=f"group_by must be from: {', '.join(stats.GROUPS)}",
+        )
+    return stats.summary(
+        db,
+        date_from=date_from,
+        date_to=date_to,
+        station=station,
+        department=department,
+        shift=shift,
+        test_type=test_type,
+        group_by=groups,
+    )
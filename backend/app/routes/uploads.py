@@ -1,17 +1,19 @@
 from datetime import datetime
 from pathlib import Path
 from zoneinfo import ZoneInfo
-import io
-import math
-import random
-import re
+import asyncio
+import json
+import os
 import shutil
-import pandas as pd
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
-from fastapi.responses import StreamingResponse
-from sqlalchemy import select
+import tempfile
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from app.services.reports_pdf import build_randomiser_pdf
+from app.services import batch, downloads, idempotency, reference_cache, report_pipeline
+from app.services.jobs import FAILED, JobQueueFull, registry, run_report_job
+from app.services.report_pipeline import ReportRequest
 from app import models
 from app.database import get_db
 from urllib.parse import quote
@@ -21,43 +23,18 @@ router = APIRouter(prefix="/api/uploads", tags=["uploads"])
 
 IST = ZoneInfo("Asia/Kolkata")
 ALLOWED_EXTS = {".xlsx", ".xls"}
-REPORT_DIR = Path("storage/reports").resolve()
-LOGO_PATH = Path("assets/AlhindairLogo.png")
-REPORT_DIR = Path("storage/reports").resolve()
-DOWNLOADS_DIR = Path("storage/downloads").resolve()
-
-SHIFT_CODE = {
-    "DAY": "D",
-    "NIGHT": "N",
-    "MORNING": "M",
-    "EVENING": "E",
-    "AFTERNOON": "A",
-}
-
-
-def shift_token(s: str) -> str:
-    key = (s or "").strip().upper()
-    return SHIFT_CODE.get(key, key[:1] or "D")
-
-
-def dept_token(s: str) -> str:
-    return re.sub(r"[^A-Za-z0-9]", "", (s or "").upper()) or "DEPT"
 
 
 def _get_user_by_username(db: Session, username: str):
-    return (
-        db.execute(select(models.User).where(models.User.username == username))
-        .scalars()
-        .first()
-    )
+    return reference_cache.user_profile(db, username)
 
 
 @router.get("/init")
-def init_upload(username: str, db: Session = Depends(get_db)):
+def init_upload(request: Request, username: str, db: Session = Depends(get_db)):
     user = _get_user_by_username(db, username)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return {
+    return reference_cache.etag_json(request, {
         "date_ist": datetime.now(IST).date().isoformat(),
         "username": user.username,
         "name": user.name or user.username,
@@ -65,20 +42,21 @@ def init_upload(username: str, db: Session = Depends(get_db)):
         "station": user.station or "",
         "percent": 25,
         "test_type": "BA",
-    }
+    })
 
 
-@router.post("/generate")
-def generate_report(
-    username: str = Form(...),
-    shift: str = Form(...),
-    station: str = Form(...),
-    department: str = Form(...),
-    percent: int = Form(25),
-    file: UploadFile = File(...),
-    test_type: str = Form("BA"),
-    db: Session = Depends(get_db),
-):
+def _check_excel(file: UploadFile) -> None:
+    ext = Path(file.filename or "").suffix.lower()
+    if ext not in ALLOWED_EXTS:
+        raise HTTPException(
+            status_code=400, detail="Only Excel files (.xlsx/.xls) are allowed"
+        )
+
+
+def _user_request(
+    db: Session, username: str, shift: str, station: str, department: str,
+    percent: int, test_type: str,
+) -> ReportRequest:
     # Validate user & permissions
     user = _get_user_by_username(db, username)
     if not user:
@@ -92,267 +70,104 @@ def generate_report(
     if (user.station or "").strip().lower() != station.strip().lower():
         raise HTTPException(status_code=403, detail="Station mismatch")
 
-    # Validate file
-    ext = Path(file.filename).suffix.lower()
-    if ext not in ALLOWED_EXTS:
-        raise HTTPException(
-            status_code=400, detail="Only Excel files (.xlsx/.xls) are allowed"
-        )
+    return ReportRequest(
+        shift=shift,
+        station=station,
+        department=department,
+        percent=percent,
+        test_type="BA",
+        uploader_name=user.name or user.username,
+        uploaded_by=user.username,
+    )
 
-    # Read Excel
-    try:
-        df = pd.read_excel(file.file)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Invalid Excel: {e}")
-
-    # Normalize headers
-    cols = {c.strip().lower(): c for c in df.columns if isinstance(c, str)}
-    required = ["date", "shift", "employee id", "name", "department", "station"]
-    missing = [r for r in required if r not in cols]
-    if missing:
-        raise HTTPException(
-            status_code=400, detail=f"Missing columns in Excel: {', '.join(missing)}"
-        )
 
-    c_date, c_shift = cols["date"], cols["shift"]
-    c_eid, c_name = cols["employee id"], cols["name"]
-    c_dept, c_stat = cols["department"], cols["station"]
+def _admin_request(
+    shift: str, station: str, department: str, percent: int, test_type: str
+) -> ReportRequest:
+    tt = (test_type or "").upper()
+    if tt not in {"BA", "PA"}:
+        raise HTTPException(status_code=400, detail="test_type must be BA or PA")
 
-    # Enforce IST date and matching fields
-    today_ist = datetime.now(IST).date()
     try:
-        excel_dates = pd.to_datetime(df[c_date]).dt.date
+        percent = int(percent)
     except Exception:
-        raise HTTPException(
-            status_code=400, detail="Excel 'Date' column cannot be parsed"
-        )
-
-    if not (excel_dates == today_ist).all():
-        raise HTTPException(
-            status_code=400, detail=f"Excel Date must be {today_ist.isoformat()} (IST)"
-        )
-    if not (df[c_shift].astype(str).str.strip().str.lower() == shift.lower()).all():
-        raise HTTPException(
-            status_code=400, detail="Excel 'Shift' does not match the selected shift"
-        )
-    if not (df[c_dept].astype(str).str.strip().str.lower() == department.lower()).all():
-        raise HTTPException(
-            status_code=400, detail="Excel 'Department' does not match your department"
-        )
-    if not (df[c_stat].astype(str).str.strip().str.lower() == station.lower()).all():
-        raise HTTPException(
-            status_code=400,
-            detail="Excel 'Station' does not match the selected station",
-        )
+        raise HTTPException(status_code=400, detail="percent must be an integer")
+    if percent < 0 or percent > 100:
+        raise HTTPException(status_code=400, detail="percent must be between 0 and 100")
 
-    # Clean dataframes for rendering
-    clean = pd.DataFrame(
-        {
-            "Person Name": df[c_name].astype(str).str.strip(),
-            "Employee ID": df[c_eid].astype(str).str.strip(),
-            "Department": df[c_dept].astype(str).str.strip(),
-        }
+    return ReportRequest(
+        shift=shift,
+        station=station,
+        department=department,
+        percent=percent,
+        test_type=tt,
+        uploader_name="admin",
+        uploaded_by="admin",
+        dayfirst_dates=True,
+        canonical_departments=True,
     )
 
-    # Random selection per department
-    selected_rows = []
-    for _dept, grp in clean.groupby("Department"):
-        n = len(grp)
-        k = max(1, math.ceil(n * (percent / 100))) if n > 0 else 0
-        if k > 0:
-            pick = grp.sample(n=k, random_state=random.randint(0, 10_000))
-            selected_rows.append(pick[["Person Name", "Employee ID"]])
-    selected = (
-        pd.concat(selected_rows, ignore_index=True)
-        if selected_rows
-        else clean.iloc[0:0][["Person Name", "Employee ID"]]
-    )
 
-    # -------- Build PDF with proper layout --------
-    # Import here to keep import overhead out of app startup
-    from reportlab.lib import colors
-    from reportlab.lib.pagesizes import A4
-    from reportlab.lib.units import mm
-    from reportlab.platypus import SimpleDocTemplate, Spacer, Table, TableStyle
-
-    REPORT_DIR.mkdir(parents=True, exist_ok=True)
-    now_ist = datetime.now(IST)
-
-    # Filename — date only, no time or forbidden chars
-    date_token = now_ist.strftime("%d%m%Y")
-    shift_tok = shift_token(shift)
-    dept_tok = dept_token(department)
-    station_tok = (station or "").upper()
-    test_tok = "BA"
-
-    out_name = f"{date_token}_{station_tok}_{shift_tok}_{dept_tok}_{test_tok}.pdf"
-    out_path = (REPORT_DIR / out_name).resolve()
-
-    buff = io.BytesIO()
-
-    def draw_header(canv, doc):
-        from reportlab.lib.pagesizes import A4
-        from reportlab.lib.units import mm
-
-        W, H = A4
-        # Logo: slightly smaller
-        if LOGO_PATH.exists():
-            canv.drawImage(
-                str(LOGO_PATH),
-                20 * mm,
-                H - 30 * mm,  # y a touch lower
-                width=42 * mm,
-                height=17 * mm,  # smaller than before
-                preserveAspectRatio=True,
-                mask="auto",
-            )
-        # Title: a bit smaller too
-        canv.setFont("Helvetica-Bold", 26)
-        canv.drawString(78 * mm, H - 22 * mm, f"Randomiser for {test_tok}")
-
-    # Extra top margin so meta table doesn't collide with header
-    doc = SimpleDocTemplate(
-        buff,
-        pagesize=A4,
-        leftMargin=20 * mm,
-        rightMargin=20 * mm,
-        topMargin=38 * mm,
-        bottomMargin=18 * mm,
+def _claim(db: Session, req: ReportRequest, file: UploadFile):
+    """Hash the upload and key the request; returns (earlier identical Report, date)."""
+    on = datetime.now(IST).date()
+    req.upload_sha256 = idempotency.hash_upload(file.file)
+    req.idempotency_key = idempotency.request_key(
+        user=req.uploaded_by,
+        on=on,
+        shift=req.shift,
+        department=req.department,
+        station=req.station,
+        test_type=req.test_type,
+        percent=req.percent,
+        upload_sha256=req.upload_sha256,
     )
+    return idempotency.find_report(db, req.idempotency_key, on), on
 
-    # Available width
-    W = doc.width
-
-    # 1) META TABLE (two rows, 6 equal columns)
-    meta_data = [
-        ["Date & Time", "Station", "Department", "Shift", "Percentage", "User name"],
-        [
-            now_ist.strftime("%d-%m-%Y  %H:%M"),
-            station_tok,
-            department,
-            shift,
-            f"{percent}%",
-            user.name or user.username,
-        ],
-    ]
-    meta_table = Table(meta_data, colWidths=[W / 6.0] * 6, hAlign="LEFT")
-    meta_table.setStyle(
-        TableStyle(
-            [
-                ("BOX", (0, 0), (-1, -1), 0.8, colors.black),
-                ("INNERGRID", (0, 0), (-1, -1), 0.5, colors.black),
-                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                ("ALIGN", (0, 0), (-1, 0), "CENTER"),  # header centered
-                ("ALIGN", (0, 1), (-1, 1), "CENTER"),  # values centered (keeps neat)
-                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                ("FONTNAME", (0, 1), (-1, 1), "Helvetica"),
-                ("FONTSIZE", (0, 0), (-1, -1), 9),
-                ("TOPPADDING", (0, 0), (-1, -1), 4),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
-            ]
-        )
-    )
 
-    # 2) COMBINED 4-COLUMN TABLE (guaranteed alignment)
-    from reportlab.platypus import Table, TableStyle
-    from reportlab.lib import colors
-
-    # Left & right data (no titles here)
-    left_rows = clean[["Person Name", "Employee ID"]].values.tolist()
-    right_rows = selected[["Person Name", "Employee ID"]].values.tolist()
-
-    # Largest side drives number of body rows
-    n = max(len(left_rows), len(right_rows))
-
-    # Build rows; empty cells if one side shorter
-    body = []
-    for i in range(n):
-        l = left_rows[i] if i < len(left_rows) else ["", ""]
-        r = right_rows[i] if i < len(right_rows) else ["", ""]
-        body.append([l[0], l[1], r[0], r[1]])
-
-    # Final table data:
-    #  row 0: titles spanning (0–1) and (2–3)
-    #  row 1: 4 headers
-    #  rows 2..: body
-    data = [
-        ["Upload Staff Data", "", "Selected Staff Data", ""],
-        ["Person Name", "Employee ID", "Person Name", "Employee ID"],
-    ] + body
-
-    # Column widths: split width in half; inside each half 62% / 38%
-    half = W / 2.0
-    col_widths = [0.62 * half, 0.38 * half, 0.62 * half, 0.38 * half]
-
-    combined = Table(data, colWidths=col_widths, hAlign="LEFT")
-    combined.setStyle(
-        TableStyle(
-            [
-                # Outer box + full grid
-                ("BOX", (0, 0), (-1, -1), 0.8, colors.black),
-                ("INNERGRID", (0, 1), (-1, -1), 0.4, colors.black),
-                # Titles
-                ("SPAN", (0, 0), (1, 0)),  # "Upload Staff Data"
-                ("SPAN", (2, 0), (3, 0)),  # "Selected Staff Data"
-                ("ALIGN", (0, 0), (3, 0), "CENTER"),
-                ("FONTNAME", (0, 0), (3, 0), "Helvetica-Bold"),
-                ("FONTSIZE", (0, 0), (3, 0), 10),
-                # Column headers
-                ("BACKGROUND", (0, 1), (3, 1), colors.whitesmoke),
-                ("FONTNAME", (0, 1), (3, 1), "Helvetica-Bold"),
-                ("ALIGN", (0, 1), (3, 1), "CENTER"),
-                # Body
-                ("FONTNAME", (0, 2), (3, -1), "Helvetica"),
-                ("VALIGN", (0, 0), (3, -1), "MIDDLE"),
-                ("TOPPADDING", (0, 0), (3, -1), 3),
-                ("BOTTOMPADDING", (0, 0), (3, -1), 3),
-            ]
-        )
-    )
+def _server_timing(timings: dict[str, float]) -> str:
+    return ", ".join(f"{k};dur={v * 1000:.1f}" for k, v in timings.items())
 
-    story = [
-        meta_table,
-        Spacer(1, 10),
-        combined,
-    ]
 
-    doc.build(story, onFirstPage=draw_header, onLaterPages=draw_header)
+def _generate_once(db: Session, req: ReportRequest, file: UploadFile):
+    """(file name, Report, replayed, stage timings) -- repeats get the stored report back."""
+    prior, on = _claim(db, req, file)
+    if prior is None:
+        try:
+            ctx = report_pipeline.generate(req, file.file, db, filename=file.filename)
+            return ctx.out_name, ctx.report, False, ctx.timings
+        except IntegrityError:
+            # An identical request committed first (double submit)
+            db.rollback()
+            prior = idempotency.find_report(db, req.idempotency_key, on)
+            if prior is None:
+                raise
+    return prior.file_name, prior, True, {}
 
-    pdf_bytes = buff.getvalue()
-    buff.close()
-    out_path.write_bytes(pdf_bytes)
-    # -------- End PDF build --------
 
-    # Persist record
-    rep = models.Report(
-        file_name=out_name,
-        file_path=str(out_path),
-        date=today_ist,
-        shift=shift,
-        department=department,
-        station=station_tok,
-        percent=percent,
-        uploaded_by=user.username,
-        total_count=len(clean),
-        selected_count=len(selected),
-    )
-    db.add(rep)
-    db.commit()
-    db.refresh(rep)
-
-    # Strong filename headers for the frontend
-    # headers = {
-    #    "Content-Disposition": f'attachment; filename="{out_name}"',
-    #    "Content-Type": "application/pdf",
-    #    "Content-Length": str(len(pdf_bytes)),
-    # RFC 5987 (helps some browsers if unicode appears)
-    #    "Content-Disposition": f"attachment; filename={out_name}; filename*=UTF-8''{out_name}",
-    # }
+@router.post("/generate")
+def generate_report(
+    username: str = Form(...),
+    shift: str = Form(...),
+    station: str = Form(...),
+    department: str = Form(...),
+    percent: int = Form(25),
+    file: UploadFile = File(...),
+    test_type: str = Form("BA"),
+    db: Session = Depends(get_db),
+):
+    req = _user_request(db, username, shift, station, department, percent, test_type)
+    _check_excel(file)
+
+    out_name, rep, replayed, timings = _generate_once(db, req, file)
+
     dispo = f'attachment; filename="{out_name}"; ' f"filename*=UTF-8''{quote(out_name)}"
     headers = {"Content-Disposition": dispo}
-    return StreamingResponse(
-        io.BytesIO(pdf_bytes), media_type="application/pdf", headers=headers
-    )
+    if timings:
+        headers["Server-Timing"] = _server_timing(timings)
+    if replayed:
+        headers["Idempotent-Replayed"] = "true"
+    return downloads.report_response(db, rep, headers=headers)
 
 
 @router.post("/admin-generate")
@@ -365,267 +180,190 @@ def admin_generate_report(
     test_type: str = Form("BA"),  # "BA" or "PA"
     db: Session = Depends(get_db),
 ):
-    # ---- Validate inputs ----
+    req = _admin_request(shift, station, department, percent, test_type)
+    _check_excel(file)
+
+    out_name, rep, replayed, timings = _generate_once(db, req, file)
+
+    # Served from the artifact store (sendfile for local files)
+    dispo = f'attachment; filename="{out_name}"; filename*=UTF-8\'\'{quote(out_name)}'
+    headers = {
+        "Content-Disposition": dispo,
+        "Content-Type": "application/pdf",
+        "X-Content-Type-Options": "nosniff",
+        "Cache-Control": "no-store",
+        # let browser JS read Content-Disposition
+        "Access-Control-Expose-Headers": "Content-Disposition",
+    }
+    if timings:
+        headers["Server-Timing"] = _server_timing(timings)
+    if replayed:
+        headers["Idempotent-Replayed"] = "true"
+
+    return downloads.report_response(db, rep, headers=headers)
+
+
+@router.post("/admin-generate-batch")
+def admin_generate_batch(
+    file: UploadFile = File(...),
+    test_type: str = Form("BA"),  # "BA" or "PA"
+    percent: int | None = Form(None),  # None = each department's configured percent
+    output: str = Form("zip"),  # "zip" | "manifest"
+    db: Session = Depends(get_db),
+):
+    """One workbook -> one report per (station, department, shift) found in it."""
     tt = (test_type or "").upper()
     if tt not in {"BA", "PA"}:
         raise HTTPException(status_code=400, detail="test_type must be BA or PA")
-
-    try:
-        percent = int(percent)
-    except Exception:
-        raise HTTPException(status_code=400, detail="percent must be an integer")
-    if percent < 0 or percent > 100:
+    if percent is not None and (percent < 0 or percent > 100):
         raise HTTPException(status_code=400, detail="percent must be between 0 and 100")
+    if output not in {"zip", "manifest"}:
+        raise HTTPException(status_code=400, detail="output must be zip or manifest")
+    if Path(file.filename or "").suffix.lower() != ".xlsx":
+        raise HTTPException(status_code=400, detail="Batch uploads must be .xlsx")
+
+    ctxs, timings = batch.run_batch(
+        db,
+        file.file,
+        test_type=tt,
+        percent=percent,
+        upload_sha256=idempotency.hash_upload(file.file),
+    )
+    server_timing = _server_timing(timings)
 
-    # Validate file type
-    ext = Path(file.filename or "").suffix.lower()
-    if ext not in ALLOWED_EXTS:
-        raise HTTPException(
-            status_code=400, detail="Only Excel files (.xlsx/.xls) are allowed"
-        )
-
-    # Read Excel
-    try:
-        df = pd.read_excel(file.file)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Invalid Excel: {e}")
-
-    # Normalize headers
-    cols = {str(c).strip().lower(): c for c in df.columns if isinstance(c, str)}
-    required = ["date", "shift", "employee id", "name", "department", "station"]
-    missing = [r for r in required if r not in cols]
-    if missing:
-        raise HTTPException(
-            status_code=400, detail=f"Missing columns in Excel: {', '.join(missing)}"
+    if output == "manifest":
+        return JSONResponse(
+            {"reports": batch.manifest(ctxs), "count": len(ctxs)},
+            headers={"Server-Timing": server_timing},
         )
 
-    c_date, c_shift = cols["date"], cols["shift"]
-    c_eid, c_name = cols["employee id"], cols["name"]
-    c_dept, c_stat = cols["department"], cols["station"]
+    zip_name = f"{ctxs[0].now.strftime('%d%m%Y')}_BATCH_{tt}.zip"
+    headers = {
+        "Content-Disposition": f'attachment; filename="{zip_name}"',
+        "Cache-Control": "no-store",
+        "Server-Timing": server_timing,
+        "Access-Control-Expose-Headers": "Content-Disposition",
+    }
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".zip") as tmp:
+        batch.zip_reports(ctxs, tmp)
+    return FileResponse(
+        tmp.name,
+        media_type="application/zip",
+        headers=headers,
+        background=BackgroundTask(os.unlink, tmp.name),
+    )
 
-    # Enforce IST date and matching fields
-    now_ist = datetime.now(IST)
-    today_ist = now_ist.date()
 
-    # Accept dd-mm-yyyy safely (your uploads often store Date as TEXT)
-    excel_dates = pd.to_datetime(df[c_date], dayfirst=True, errors="coerce").dt.date
-    if excel_dates.isna().any():
-        raise HTTPException(status_code=400, detail="Excel 'Date' has invalid rows")
-    if not (excel_dates == today_ist).all():
-        raise HTTPException(
-            status_code=400, detail=f"Excel Date must be {today_ist.isoformat()} (IST)"
+# ---------- Job mode: submit, then poll / stream progress ----------
+
+def _submit_job(db: Session, req: ReportRequest, file: UploadFile):
+    prior, _ = _claim(db, req, file)
+    if prior is not None:
+        # Already generated from this exact upload: nothing to queue
+        return JSONResponse(
+            {
+                "job_id": None,
+                "status": "done",
+                "replayed": True,
+                "report_id": prior.id,
+                "file_name": prior.file_name,
+                "download": f"/api/reports/{prior.id}/download",
+            }
         )
+    # Spool to disk so the worker process can open it by path
+    suffix = Path(file.filename or "").suffix.lower()
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        shutil.copyfileobj(file.file, tmp)
+    src = Path(tmp.name)
+    try:
+        job = registry.submit("report", run_report_job, req, src, file.filename)
+    except JobQueueFull as e:
+        src.unlink(missing_ok=True)
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "poll": f"{router.prefix}/jobs/{job.id}",
+        "events": f"{router.prefix}/jobs/{job.id}/events",
+    }
 
-    if not (df[c_shift].astype(str).str.strip().str.lower() == (shift or "").lower()).all():
-        raise HTTPException(
-            status_code=400, detail="Excel 'Shift' does not match the selected shift"
-        )
 
-    # Optional normalization so GSD vs long form is treated consistently
-    def _canon_dept(s: str) -> str:
-        s = (s or "").strip().lower()
-        mapping = {
-            "ground service department (gsd)": "gsd",
-            "ground service department": "gsd",
-            "gsd": "gsd",
-            "flight dispatch": "flight dispatch",
-            "security": "security",
-            "engineering": "engineering",
-        }
-        return mapping.get(s, s)
-
-    if not (df[c_dept].astype(str).apply(_canon_dept) == _canon_dept(department)).all():
-        raise HTTPException(
-            status_code=400, detail="Excel 'Department' does not match the selected department"
-        )
+@router.post("/jobs/generate", status_code=202)
+def submit_generate_job(
+    username: str = Form(...),
+    shift: str = Form(...),
+    station: str = Form(...),
+    department: str = Form(...),
+    percent: int = Form(25),
+    file: UploadFile = File(...),
+    test_type: str = Form("BA"),
+    db: Session = Depends(get_db),
+):
+    req = _user_request(db, username, shift, station, department, percent, test_type)
+    _check_excel(file)
+    return _submit_job(db, req, file)
 
-    if not (df[c_stat].astype(str).str.strip().str.lower() == (station or "").lower()).all():
-        raise HTTPException(
-            status_code=400, detail="Excel 'Station' does not match the selected station"
-        )
 
-    # Clean dataframes for rendering
-    clean = pd.DataFrame(
-        {
-            "Person Name": df[c_name].astype(str).str.strip(),
-            "Employee ID": df[c_eid].astype(str).str.strip(),
-            "Department": df[c_dept].astype(str).str.strip(),
-        }
-    )
+@router.post("/jobs/admin-generate", status_code=202)
+def submit_admin_generate_job(
+    shift: str = Form(...),
+    station: str = Form(...),
+    department: str = Form(...),
+    percent: int = Form(25),
+    file: UploadFile = File(...),
+    test_type: str = Form("BA"),
+    db: Session = Depends(get_db),
+):
+    req = _admin_request(shift, station, department, percent, test_type)
+    _check_excel(file)
+    return _submit_job(db, req, file)
 
-    # Random selection per department (at least 1 if department has rows)
-    selected_rows = []
-    for _dept, grp in clean.groupby("Department"):
-        n = len(grp)
-        k = max(1, math.ceil(n * (percent / 100))) if n > 0 else 0
-        if k > 0:
-            pick = grp.sample(n=k, random_state=random.randint(0, 10_000))
-            selected_rows.append(pick[["Person Name", "Employee ID"]])
-    selected = (
-        pd.concat(selected_rows, ignore_index=True)
-        if selected_rows
-        else clean.iloc[0:0][["Person Name", "Employee ID"]]
-    )
 
-    # -------- Build PDF with proper layout (same as your reference) --------
-    from reportlab.lib import colors
-    from reportlab.lib.pagesizes import A4
-    from reportlab.lib.units import mm
-    from reportlab.platypus import SimpleDocTemplate, Spacer, Table, TableStyle
-
-    REPORT_DIR.mkdir(parents=True, exist_ok=True)
-    DOWNLOADS_DIR.mkdir(parents=True, exist_ok=True)
-    station_tok = (station or "").upper()
-
-    # Filename — date only, no time or forbidden chars
-    date_token = now_ist.strftime("%d%m%Y")
-    shift_tok = shift_token(shift)
-    dept_tok = dept_token(department)
-    test_tok = tt  # BA or PA
-
-    out_name = f"{date_token}_{station_tok}_{shift_tok}_{dept_tok}_{test_tok}.pdf"
-    out_path = (REPORT_DIR / out_name).resolve()
-    downloads_path = (DOWNLOADS_DIR / out_name).resolve()
-
-    buff = io.BytesIO()
-
-    def draw_header(canv, doc):
-        W, H = A4
-        if LOGO_PATH.exists():
-            canv.drawImage(
-                str(LOGO_PATH),
-                20 * mm,
-                H - 30 * mm,
-                width=42 * mm,
-                height=17 * mm,
-                preserveAspectRatio=True,
-                mask="auto",
-            )
-        canv.setFont("Helvetica-Bold", 26)
-        canv.drawString(78 * mm, H - 22 * mm, f"Randomiser for {test_tok}")
-
-    doc = SimpleDocTemplate(
-        buff,
-        pagesize=A4,
-        leftMargin=20 * mm,
-        rightMargin=20 * mm,
-        topMargin=38 * mm,
-        bottomMargin=18 * mm,
-    )
+def _job_or_404(job_id: str):
+    job = registry.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
-    W = doc.width
-
-    # 1) META TABLE
-    meta_data = [
-        ["Date & Time", "Station", "Department", "Shift", "Percentage", "User name"],
-        [
-            now_ist.strftime("%d-%m-%Y  %H:%M"),
-            station_tok,
-            department,
-            shift,
-            f"{percent}%",
-            "admin",
-        ],
-    ]
-    meta_table = Table(meta_data, colWidths=[W / 6.0] * 6, hAlign="LEFT")
-    meta_table.setStyle(
-        TableStyle(
-            [
-                ("BOX", (0, 0), (-1, -1), 0.8, colors.black),
-                ("INNERGRID", (0, 0), (-1, -1), 0.5, colors.black),
-                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                ("ALIGN", (0, 0), (-1, 0), "CENTER"),
-                ("ALIGN", (0, 1), (-1, 1), "CENTER"),
-                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                ("FONTNAME", (0, 1), (-1, 1), "Helvetica"),
-                ("FONTSIZE", (0, 0), (-1, -1), 9),
-                ("TOPPADDING", (0, 0), (-1, -1), 4),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
-            ]
-        )
-    )
 
-    # 2) COMBINED 4-COLUMN TABLE
-    left_rows = clean[["Person Name", "Employee ID"]].values.tolist()
-    right_rows = selected[["Person Name", "Employee ID"]].values.tolist()
-    n = max(len(left_rows), len(right_rows))
-    body = []
-    for i in range(n):
-        l = left_rows[i] if i < len(left_rows) else ["", ""]
-        r = right_rows[i] if i < len(right_rows) else ["", ""]
-        body.append([l[0], l[1], r[0], r[1]])
-
-    data = [
-        ["Upload Staff Data", "", "Selected Staff Data", ""],
-        ["Person Name", "Employee ID", "Person Name", "Employee ID"],
-    ] + body
-
-    half = W / 2.0
-    col_widths = [0.62 * half, 0.38 * half, 0.62 * half, 0.38 * half]
-
-    combined = Table(data, colWidths=col_widths, hAlign="LEFT")
-    combined.setStyle(
-        TableStyle(
-            [
-                ("BOX", (0, 0), (-1, -1), 0.8, colors.black),
-                ("INNERGRID", (0, 1), (-1, -1), 0.4, colors.black),
-                ("SPAN", (0, 0), (1, 0)),
-                ("SPAN", (2, 0), (3, 0)),
-                ("ALIGN", (0, 0), (3, 0), "CENTER"),
-                ("FONTNAME", (0, 0), (3, 0), "Helvetica-Bold"),
-                ("FONTSIZE", (0, 0), (3, 0), 10),
-                ("BACKGROUND", (0, 1), (3, 1), colors.whitesmoke),
-                ("FONTNAME", (0, 1), (3, 1), "Helvetica-Bold"),
-                ("ALIGN", (0, 1), (3, 1), "CENTER"),
-                ("FONTNAME", (0, 2), (3, -1), "Helvetica"),
-                ("VALIGN", (0, 0), (3, -1), "MIDDLE"),
-                ("TOPPADDING", (0, 0), (3, -1), 3),
-                ("BOTTOMPADDING", (0, 0), (3, -1), 3),
-            ]
-        )
-    )
+@router.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    return _job_or_404(job_id).as_dict()
 
-    story = [meta_table, Spacer(1, 10), combined]
-    doc.build(story, onFirstPage=draw_header, onLaterPages=draw_header)
 
-    pdf_bytes = buff.getvalue()
-    buff.close()
+@router.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Server-sent events: one ``data:`` line per progress update."""
+    job = _job_or_404(job_id)
 
-    # Write both copies
-    out_path.write_bytes(pdf_bytes)
-    downloads_path.write_bytes(pdf_bytes)
+    async def stream():
+        sent = 0
+        while True:
+            events = job.events
+            while sent < len(events):
+                yield f"data: {json.dumps(events[sent])}\n\n"
+                sent += 1
+            if job.finished and sent >= len(job.events):
+                yield f"event: end\ndata: {json.dumps(job.as_dict())}\n\n"
+                return
+            await asyncio.sleep(0.25)
 
-    # Persist record
-    rep = models.Report(
-        file_name=out_name,
-        file_path=str(out_path),  # DB points to reports copy
-        date=today_ist,
-        shift=shift,
-        department=department,
-        station=station_tok,
-        percent=percent,
-        uploaded_by="admin",
-        total_count=len(clean),
-        selected_count=len(selected),
+    return StreamingResponse(
+        stream(), media_type="text/event-stream", headers={"Cache-Control": "no-store"}
     )
-    db.add(rep)
-    db.commit()
-    db.refresh(rep)
 
-    # Stream back to client
-    dispo = f'attachment; filename="{out_name}"; filename*=UTF-8\'\'{quote(out_name)}'
-    headers = {
-        "Content-Disposition": dispo,
-        "Content-Type": "application/pdf",
-        "Content-Length": str(len(pdf_bytes)),
-        "X-Content-Type-Options": "nosniff",
-        "Cache-Control": "no-store",
-        # let browser JS read Content-Disposition
-        "Access-Control-Expose-Headers": "Content-Disposition",
-    }
 
-    return StreamingResponse(
-        io.BytesIO(pdf_bytes),
-        media_type="application/pdf",
-        headers=headers,
-    )
+@router.get("/jobs/{job_id}/result")
+def job_result(job_id: str, db: Session = Depends(get_db)):
+    job = _job_or_404(job_id)
+    if job.kind != "report":
+        # Other kinds (user imports) have no PDF; they keep their own result route
+        raise HTTPException(status_code=404, detail="Job has no report")
+    if job.status == FAILED:
+        raise HTTPException(status_code=job.error_status or 500, detail=job.error)
+    if not job.finished:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    rep = db.get(models.Report, job.result["report_id"])
+    if not rep:
+        raise HTTPException(status_code=404, detail="Report not found")
+    return downloads.report_response(db, rep, filename=rep.file_name)
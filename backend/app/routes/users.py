@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sqlalchemy import select, func
-from passlib.context import CryptContext
 
 from app.database import get_db
 from app import models
+from app.services import auth, people, reference_cache
 
 try:
     from app.schemas import UserOut, UserUpdate, UserCreate, ChangePassword, UserPage
@@ -15,19 +16,25 @@ from typing import Optional
 from pydantic import BaseModel
 
 router = APIRouter()
-pwd_ctx = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # -------- Login (unchanged) --------
 class LoginRequest(BaseModel):
     username: str
     password: str
 
+def _find_user(db: Session, username: str):
+    stmt = select(models.User).where(models.User.username == username)
+    return db.execute(stmt).scalars().first()
+
 @router.post("/login")
-def login(payload: LoginRequest, db: Session = Depends(get_db)):
-    stmt = select(models.User).where(models.User.username == payload.username)
-    user = db.execute(stmt).scalars().first()
-    if not user or not pwd_ctx.verify(payload.password, user.hashed_password):
+async def login(payload: LoginRequest, db: Session = Depends(get_db)):
+    user = await run_in_threadpool(_find_user, db, payload.username)
+    # bcrypt runs on the shared auth pool, never on the event loop
+    ok, new_hash = await auth.verify(payload.password, user.hashed_password) if user else (False, None)
+    if not ok:
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    if new_hash:  # BCRYPT_ROUNDS changed since this hash was made
+        await run_in_threadpool(auth.save_hash, db, auth.user_account(user), new_hash)
     return {
         "role": user.role,
         "username": user.username,
@@ -45,7 +52,7 @@ def create_user(payload: UserCreate, db: Session = Depends(get_db)):
 
     user = models.User(
         username=payload.username,
-        hashed_password=pwd_ctx.hash(payload.password),
+        hashed_password=auth.hash_password_sync(payload.password),
         role=(payload.role or "admin").lower(),
         name=payload.name,
         designation=payload.designation,
@@ -54,19 +61,23 @@ def create_user(payload: UserCreate, db: Session = Depends(get_db)):
         station=payload.station,
     )
     db.add(user)
+    people.reindex(db, "user", user)
     db.commit()
+    reference_cache.invalidate_users()
     db.refresh(user)
     return user
 
 # -------- Change password (by username) --------
 @router.post("/change-password")
-def change_password(payload: ChangePassword, db: Session = Depends(get_db)):
-    user = db.execute(select(models.User).where(models.User.username == payload.username)).scalars().first()
-    if not user or not pwd_ctx.verify(payload.current, user.hashed_password):
+async def change_password(payload: ChangePassword, db: Session = Depends(get_db)):
+    user = await run_in_threadpool(_find_user, db, payload.username)
+    ok, new_hash = await auth.verify(payload.current, user.hashed_password) if user else (False, None)
+    if not ok:
         raise HTTPException(status_code=400, detail="Current password is incorrect")
-    user.hashed_password = pwd_ctx.hash(payload.new)
-    db.add(user)
-    db.commit()
+    if new_hash:  # keep the upgrade even if hashing the new password fails
+        await run_in_threadpool(auth.save_hash, db, auth.user_account(user), new_hash)
+    user.hashed_password = await auth.hash_password(payload.new)
+    await run_in_threadpool(db.commit)
     return {"ok": True}
 
 # -------- Paginated list (admins only when roles="admin,superadmin") --------
@@ -109,14 +120,18 @@ def update_user(user_id: int, payload: UserUpdate, db: Session = Depends(get_db)
     if not user: raise HTTPException(status_code=404, detail="User not found")
     data = payload.model_dump(exclude_unset=True)
     pwd = data.pop("password", None)
-    if pwd: user.hashed_password = pwd_ctx.hash(pwd)
+    if pwd: user.hashed_password = auth.hash_password_sync(pwd)
     for k, v in data.items(): setattr(user, k, v)
+    people.reindex(db, "user", user)
     db.add(user); db.commit(); db.refresh(user)
+    reference_cache.invalidate_users()
     return user
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_user(user_id: int, db: Session = Depends(get_db)):
     user = db.get(models.User, user_id)
     if not user: raise HTTPException(status_code=404, detail="User not found")
+    people.forget(db, "user", user.id)
     db.delete(user); db.commit()
+    reference_cache.invalidate_users()
     return None
@@ -0,0 +1,478 @@
+# app/services/artifacts.py
+"""Where rendered PDFs live: a content-addressed store behind a DB index.
+
+Every PDF is stored once per distinct content under a date-sharded key,
+``YYYY/MM/DD/<sha256>.pdf``, and gets an ``artifacts`` row (sha256 unique).
+Reports point at their artifact by id, so a download is a primary-key
+lookup and nothing ever lists a directory. Identical bytes rendered twice
+share one object.
+
+Backends (``ARTIFACT_BACKEND``):
+
+* ``local`` -- files under ``REPORT_DIR``; downloads use sendfile.
+* ``s3`` -- any S3-compatible endpoint (MinIO or similar for a local
+  stand-in); needs ``boto3``.
+
+Retention: artifacts older than ``ARTIFACT_RETENTION_DAYS`` are zipped per
+month into ``archive/YYYY/MM*.zip`` and their loose objects deleted; they
+stay downloadable from the archive (remote archives are fetched once into
+``ARCHIVE_CACHE_DIR``). The sweep runs in a background thread
+every ``ARTIFACT_SWEEP_SECONDS`` (0 = off; enable it on one worker), or
+on demand::
+
+    python -m app.services.artifacts sweep
+"""
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import BinaryIO
+import hashlib
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from zoneinfo import ZoneInfo
+
+from fastapi import HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services import metrics
+
+IST = ZoneInfo("Asia/Kolkata")
+ARTIFACT_BACKEND = os.getenv("ARTIFACT_BACKEND", "local").strip().lower()  # "local" | "s3"
+REPORT_DIR = Path(os.getenv("REPORT_DIR", "storage/reports")).resolve()
+ARTIFACT_S3_ENDPOINT = os.getenv("ARTIFACT_S3_ENDPOINT")  # e.g. http://127.0.0.1:9000
+ARTIFACT_S3_BUCKET = os.getenv("ARTIFACT_S3_BUCKET", "randomiser-reports")
+ARTIFACT_S3_PREFIX = os.getenv("ARTIFACT_S3_PREFIX", "")
+ARTIFACT_RETENTION_DAYS = int(os.getenv("ARTIFACT_RETENTION_DAYS", "180"))  # 0 = keep loose
+ARTIFACT_SWEEP_SECONDS = int(os.getenv("ARTIFACT_SWEEP_SECONDS", "0"))
+# Remote archives are downloaded once and read locally from here
+ARCHIVE_CACHE_DIR = Path(os.getenv("ARCHIVE_CACHE_DIR", str(REPORT_DIR / ".archives"))).resolve()
+ARCHIVE_CACHE_TTL_SECONDS = int(os.getenv("ARCHIVE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+CHUNK = 1 << 20
+SPOOL_TTL_SECONDS = 24 * 3600
+
+log = logging.getLogger(__name__)
+
+
+def sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def shard_key(sha256: str, on: date, suffix: str = ".pdf") -> str:
+    return f"{on:%Y/%m/%d}/{sha256}{suffix}"
+
+
+# ---------- backends ----------
+
+class LocalStore:
+    name = "local"
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def path(self, key: str) -> Path:
+        p = (self.root / key).resolve()
+        if not p.is_relative_to(self.root):
+            raise ValueError(f"Key escapes the store: {key}")
+        return p
+
+    def put(self, src: Path, key: str) -> None:
+        """Move ``src`` into place (atomic when it sits on the same filesystem)."""
+        dst = self.path(key)
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.replace(src, dst)
+        except OSError:
+            tmp = dst.with_name(f".{uuid.uuid4().hex}.part")
+            shutil.copyfile(src, tmp)
+            os.replace(tmp, dst)
+            Path(src).unlink(missing_ok=True)
+
+    def exists(self, key: str) -> bool:
+        return self.path(key).is_file()
+
+    def open(self, key: str, start: int = 0, end: int | None = None) -> BinaryIO:
+        fh = open(self.path(key), "rb")
+        if start:
+            fh.seek(start)
+        return fh
+
+    def local_path(self, key: str) -> Path | None:
+        return self.path(key)
+
+    def delete(self, key: str) -> None:
+        p = self.path(key)
+        p.unlink(missing_ok=True)
+        # Drop emptied day/month shards
+        for parent in p.parents:
+            if parent == self.root:
+                break
+            try:
+                parent.rmdir()
+            except OSError:
+                break
+
+
+class S3Store:
+    name = "s3"
+
+    def __init__(self, bucket: str, endpoint: str | None = None, prefix: str = ""):
+        try:
+            import boto3
+        except ImportError as e:
+            raise RuntimeError("ARTIFACT_BACKEND=s3 needs boto3 (pip install boto3)") from e
+        # Credentials come from the usual AWS_* variables / config files
+        self.client = boto3.client("s3", endpoint_url=endpoint)
+        self.bucket, self.prefix = bucket, prefix.strip("/")
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def put(self, src: Path, key: str) -> None:
+        self.client.upload_file(str(src), self.bucket, self._key(key))
+        Path(src).unlink(missing_ok=True)
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except self.client.exceptions.ClientError:
+            return False
+        return True
+
+    def open(self, key: str, start: int = 0, end: int | None = None) -> BinaryIO:
+        extra = {}
+        if start or end is not None:
+            extra["Range"] = f"bytes={start}-{'' if end is None else end - 1}"
+        try:
+            res = self.client.get_object(Bucket=self.bucket, Key=self._key(key), **extra)
+        except self.client.exceptions.NoSuchKey as e:
+            raise FileNotFoundError(key) from e
+        return res["Body"]
+
+    def local_path(self, key: str) -> Path | None:
+        return None
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+
+def _make_store():
+    if ARTIFACT_BACKEND == "s3":
+        return S3Store(ARTIFACT_S3_BUCKET, ARTIFACT_S3_ENDPOINT, ARTIFACT_S3_PREFIX)
+    if ARTIFACT_BACKEND != "local":
+        raise RuntimeError(f"Unknown ARTIFACT_BACKEND: {ARTIFACT_BACKEND}")
+    return LocalStore(REPORT_DIR)
+
+
+store = _make_store()
+
+
+def spool_path() -> Path:
+    """Temp file inside REPORT_DIR so moving it into the local store is a rename."""
+    REPORT_DIR.mkdir(parents=True, exist_ok=True)
+    return REPORT_DIR / f".{uuid.uuid4().hex}.part"
+
+
+# ---------- writing ----------
+
+def _find(db: Session, sha256: str) -> models.Artifact | None:
+    A = models.Artifact
+    return db.execute(select(A).where(A.sha256 == sha256)).scalars().first()
+
+
+def store_file(db: Session | None, src: Path, on: date) -> models.Artifact:
+    """Move ``src`` into the store and return its (flushed) index row.
+
+    Content already stored is not written again; the spool file is dropped.
+    The caller owns the transaction, so a rollback also forgets the row.
+    """
+    sha = sha256_file(src)
+    size = src.stat().st_size
+    art = _find(db, sha) if db is not None else None
+    if art is not None and art.archived_at is None:
+        Path(src).unlink(missing_ok=True)
+        metrics.ARTIFACTS_STORED.inc(result="dedup")
+        return art
+
+    key = shard_key(sha, on)
+    store.put(src, key)
+    metrics.ARTIFACTS_STORED.inc(result="new")
+    if art is not None:
+        # Archived earlier; serve the loose copy again from today's shard
+        art.backend, art.storage_key, art.date, art.archived_at = store.name, key, on, None
+        return art
+
+    art = models.Artifact(sha256=sha, backend=store.name, storage_key=key, size=size, date=on)
+    if db is None:
+        return art
+    try:
+        with db.begin_nested():
+            db.add(art)
+    except IntegrityError:
+        # Same bytes stored concurrently: same key too, unless the days differ
+        art = _find(db, sha)
+        if art.storage_key != key:
+            store.delete(key)
+    return art
+
+
+# ---------- reading ----------
+
+def for_report(db: Session, rep: models.Report) -> models.Artifact | None:
+    return db.get(models.Artifact, rep.artifact_id) if rep.artifact_id else None
+
+
+def legacy_path_ok(p: Path) -> bool:
+    return p.resolve().is_relative_to(REPORT_DIR)
+
+
+def legacy_path(rep: models.Report) -> Path | None:
+    """Pre-store reports kept an absolute path; only trust it inside REPORT_DIR."""
+    if not rep.file_path:
+        return None
+    p = Path(rep.file_path).resolve()
+    if not legacy_path_ok(p) or not p.is_file():
+        return None
+    return p
+
+
+def _member(art) -> str:
+    return art.storage_key.replace("/", "_")
+
+
+def _archive_path(key: str) -> Path:
+    """Local path of an archive zip; remote ones are cached on first use.
+
+    Archive keys are never reused for different contents, so a cached copy
+    can't go stale; ``clean_archive_cache`` drops copies nobody has read lately.
+    """
+    p = store.local_path(key)
+    if p is not None:
+        return p
+    cached = ARCHIVE_CACHE_DIR / key
+    try:
+        os.utime(cached)  # marks it used for clean_archive_cache
+        return cached
+    except FileNotFoundError:
+        pass
+    cached.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cached.with_name(f".{uuid.uuid4().hex}.part")
+    try:
+        with open(tmp, "wb") as out, store.open(key) as src:
+            shutil.copyfileobj(src, out, CHUNK)
+        os.replace(tmp, cached)  # concurrent downloads just overwrite each other
+    finally:
+        tmp.unlink(missing_ok=True)
+    return cached
+
+
+def open_artifact(art, start: int = 0, end: int | None = None) -> BinaryIO:
+    """Stored bytes from ``start``; ``end`` (exclusive) is a hint for remote reads.
+
+    ``art`` is anything with Artifact's storage_key / archive_key / archived_at.
+    Archived members are streamed out of the zip, never read whole.
+    """
+    if art.archived_at is None:
+        return store.open(art.storage_key, start, end)
+    try:
+        with zipfile.ZipFile(_archive_path(art.archive_key)) as zf:
+            # The member keeps the zip file open until it is closed itself
+            fh = zf.open(_member(art))
+    except KeyError as e:
+        raise FileNotFoundError(art.storage_key) from e
+    if start:
+        fh.seek(start)
+    return fh
+
+
+def open_report(db: Session, rep: models.Report) -> BinaryIO:
+    art = for_report(db, rep)
+    if art is not None:
+        return open_artifact(art)
+    p = legacy_path(rep)
+    if p is None:
+        raise HTTPException(status_code=404, detail="Report file missing on server")
+    return open(p, "rb")
+
+
+# ---------- retention ----------
+
+def _month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def _archive_key(month: date) -> str:
+    key = f"archive/{month:%Y/%m}.zip"
+    n = 1
+    while store.exists(key):  # a later sweep picked up stragglers
+        n += 1
+        key = f"archive/{month:%Y/%m}_{n}.zip"
+    return key
+
+
+def archive_month(db: Session, month: date, arts: list[models.Artifact]) -> str:
+    """Zip ``arts`` (all from ``month``) into one archive; returns its key."""
+    key = _archive_key(month)
+    if store.name == "local":
+        tmp = spool_path()  # same filesystem: put() is a rename
+    else:
+        fd, name = tempfile.mkstemp(suffix=".zip")
+        os.close(fd)
+        tmp = Path(name)
+    try:
+        # PDFs are already compressed; storing keeps the sweep cheap
+        with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_STORED) as zf:
+            for art in arts:
+                with store.open(art.storage_key) as src, zf.open(_member(art), "w") as dst:
+                    shutil.copyfileobj(src, dst, CHUNK)
+        store.put(tmp, key)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+    A = models.Artifact
+    won = db.execute(
+        update(A)
+        .where(A.id.in_([a.id for a in arts]), A.archived_at.is_(None))
+        .values(archive_key=key, archived_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    if won:
+        for art in arts:
+            store.delete(art.storage_key)
+    metrics.ARTIFACTS_ARCHIVED.inc(won)
+    return key
+
+
+def adopt_legacy(db: Session, limit: int = 500) -> int:
+    """Move pre-store report files into the store; returns how many moved.
+
+    Older builds kept flat files and an absolute ``file_path``. PDFs still
+    present inside REPORT_DIR are moved in; rows whose file is gone, or
+    whose path points outside REPORT_DIR (never served, see
+    ``legacy_path``), just lose the path.
+    """
+    R = models.Report
+    reps = db.execute(
+        select(R).where(R.artifact_id.is_(None), R.file_path.is_not(None)).limit(limit)
+    ).scalars().all()
+    moved = 0
+    for rep in reps:
+        p = legacy_path(rep)
+        if p is not None and p.suffix.lower() != ".pdf":
+            p = None
+        if p is None and Path(rep.file_path).is_file():
+            log.warning(
+                "Report %s: not adopting %s (not a PDF inside %s)", rep.id, rep.file_path, REPORT_DIR
+            )
+        if p is not None:
+            spool = spool_path()
+            shutil.copyfile(p, spool)
+            rep.artifact_id = store_file(db, spool, rep.date).id
+            moved += 1
+        rep.file_path = None
+        db.commit()
+        if p is not None:
+            p.unlink(missing_ok=True)
+    return moved
+
+
+def clean_spool(max_age: float = SPOOL_TTL_SECONDS) -> int:
+    """Drop render spool files left behind by crashed workers."""
+    cutoff, n = time.time() - max_age, 0
+    if REPORT_DIR.is_dir():
+        for p in REPORT_DIR.glob(".*.part"):
+            if p.stat().st_mtime < cutoff:
+                p.unlink(missing_ok=True)
+                n += 1
+    return n
+
+
+def clean_archive_cache(max_age: float = ARCHIVE_CACHE_TTL_SECONDS) -> int:
+    """Drop cached copies of remote archives not read within ``max_age``."""
+    cutoff, n = time.time() - max_age, 0
+    if store.name != "local" and ARCHIVE_CACHE_DIR.is_dir():
+        for p in ARCHIVE_CACHE_DIR.rglob("*.zip"):
+            if p.stat().st_mtime < cutoff:
+                p.unlink(missing_ok=True)
+                n += 1
+    return n
+
+
+def sweep(db: Session, today: date | None = None) -> dict:
+    """Adopt legacy files, then archive every whole month past retention."""
+    today = today or datetime.now(IST).date()
+    out = {
+        "adopted": adopt_legacy(db),
+        "spool_removed": clean_spool(),
+        "archive_cache_removed": clean_archive_cache(),
+        "archives": [],
+    }
+    if ARTIFACT_RETENTION_DAYS <= 0:
+        return out
+    # Only months that ended before the cutoff, so each is zipped once
+    cutoff = _month_start(today - timedelta(days=ARTIFACT_RETENTION_DAYS))
+    A = models.Artifact
+    arts = db.execute(
+        select(A).where(A.archived_at.is_(None), A.date < cutoff).order_by(A.date, A.id)
+    ).scalars().all()
+    months: dict[date, list[models.Artifact]] = {}
+    for art in arts:
+        months.setdefault(_month_start(art.date), []).append(art)
+    for month, group in months.items():
+        out["archives"].append(
+            {"month": f"{month:%Y-%m}", "key": archive_month(db, month, group), "count": len(group)}
+        )
+    return out
+
+
+_stop = threading.Event()
+_thread: threading.Thread | None = None
+
+
+def _sweep_loop() -> None:
+    from app.database import SessionLocal
+
+    while not _stop.wait(ARTIFACT_SWEEP_SECONDS):
+        try:
+            with SessionLocal() as db:
+                sweep(db)
+        except Exception:  # keep sweeping on the next tick
+            log.exception("artifact sweep failed")
+
+
+def start_sweeper() -> None:
+    global _thread
+    if ARTIFACT_SWEEP_SECONDS <= 0 or _thread is not None:
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_sweep_loop, name="artifact-sweep", daemon=True)
+    _thread.start()
+
+
+def stop_sweeper() -> None:
+    global _thread
+    _stop.set()
+    _thread = None
+
+
+if __name__ == "__main__":
+    from app.database import SessionLocal, init_db
+
+    if sys.argv[1:] != ["sweep"]:
+        raise SystemExit("usage: python -m app.services.artifacts sweep")
+    init_db()
+    with SessionLocal() as db:
+        print(sweep(db))
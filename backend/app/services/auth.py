@@ -0,0 +1,156 @@
+# app/services/auth.py
+"""Password hashing and login lookup off the request threads.
+
+bcrypt is deliberately slow (~100-300 ms per call at cost 12). All hashing
+and verification runs on one bounded thread pool -- the bcrypt C code
+releases the GIL, so ``AUTH_WORKERS`` calls really run in parallel while
+the event loop and FastAPI's threadpool stay free for other requests.
+
+``BCRYPT_ROUNDS`` sets the cost. Hashes made at another cost are
+re-hashed transparently the next time that account logs in.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import asyncio
+import os
+import threading
+
+from passlib.context import CryptContext
+from passlib.exc import UnknownHashError
+from sqlalchemy import literal, null, select, true, union_all, update
+from sqlalchemy.orm import Session
+
+from app import models
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+AUTH_WORKERS = int(os.getenv("AUTH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+pwd_ctx = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    # min == max: any other cost counts as outdated and gets re-hashed
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+_pool: ThreadPoolExecutor | None = None
+_lock = threading.Lock()
+
+# Checked in this order, as login always has
+ACCOUNT_MODELS = {
+    "superadmin": models.SuperAdmin,
+    "admin": models.Admin,
+    "user": models.User,
+}
+
+
+@dataclass(frozen=True)
+class Account:
+    role: str
+    id: int
+    username: str
+    hashed_password: str
+    name: str | None
+    department: str | None
+    station: str | None
+    is_active: bool
+
+
+def find_accounts(db: Session, username: str) -> list[Account]:
+    """Every account with this username, in login priority, in one query."""
+    SA, A, U = models.SuperAdmin, models.Admin, models.User
+    q = union_all(
+        select(
+            literal(0).label("rank"), literal("superadmin").label("role"), SA.id,
+            SA.username, SA.hashed_password, SA.name,
+            null().label("department"), null().label("station"), true().label("is_active"),
+        ).where(SA.username == username),
+        select(
+            literal(1), literal("admin"), A.id,
+            A.username, A.hashed_password, A.name,
+            A.department, A.station, true(),
+        ).where(A.username == username),
+        select(
+            literal(2), literal("user"), U.id,
+            U.username, U.hashed_password, U.name,
+            U.department, U.station, U.is_active,
+        ).where(U.username == username),
+    ).order_by("rank")
+    return [
+        Account(
+            role=r.role,
+            id=r.id,
+            username=r.username,
+            hashed_password=r.hashed_password,
+            name=r.name,
+            department=r.department,
+            station=r.station,
+            is_active=True if r.is_active is None else bool(r.is_active),
+        )
+        for r in db.execute(q).all()
+    ]
+
+
+def user_account(user: models.User) -> Account:
+    """A ``users`` row as an Account; its ``role`` column may say "admin"."""
+    return Account(
+        role="user",
+        id=user.id,
+        username=user.username,
+        hashed_password=user.hashed_password,
+        name=user.name,
+        department=user.department,
+        station=user.station,
+        is_active=bool(user.is_active),
+    )
+
+
+def _verify_and_update(password: str, stored: str) -> tuple[bool, str | None]:
+    if not stored:
+        return False, None
+    # Allow dev seeds like "plain:xxx"
+    if stored.startswith("plain:"):
+        return password == stored[6:], None
+    try:
+        return pwd_ctx.verify_and_update(password, stored)
+    except (UnknownHashError, ValueError):
+        return False, None
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=AUTH_WORKERS, thread_name_prefix="bcrypt")
+        return _pool
+
+
+async def verify(password: str, stored: str) -> tuple[bool, str | None]:
+    """(matches, replacement hash or None) without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_pool(), _verify_and_update, password, stored)
+
+
+async def hash_password(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_pool(), pwd_ctx.hash, password)
+
+
+def hash_password_sync(password: str) -> str:
+    """For sync routes: still capped by the shared pool's size."""
+    return _get_pool().submit(pwd_ctx.hash, password).result()
+
+
+def save_hash(db: Session, acct: Account, new_hash: str) -> None:
+    model = ACCOUNT_MODELS[acct.role]
+    db.execute(update(model).where(model.id == acct.id).values(hashed_password=new_hash))
+    db.commit()
+
+
+def shutdown() -> None:
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool:
+        pool.shutdown(wait=False, cancel_futures=True)
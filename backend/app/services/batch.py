@@ -0,0 +1,212 @@
+# app/services/batch.py
+"""Many reports from one workbook (all departments/stations of a shift change).
+
+The workbook is read once, split into (station, department, shift) groups,
+each group is selected in-process and rendered on the render pool in
+parallel, and every Report (+ its selections) is written in one commit.
+"""
+from datetime import datetime
+from typing import BinaryIO
+import json
+import os
+import shutil
+import time
+import zipfile
+
+import pandas as pd
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services import artifacts, idempotency, metrics, render_pool, stats
+from app.services.report_pipeline import (
+    IST,
+    PipelineContext,
+    ReportRequest,
+    canon_dept,
+    discard_spool,
+    new_report,
+    output_name,
+    render_kwargs,
+    select_staff,
+    spool_path,
+    write_pdf,
+)
+from app.services.roster_ingest import read_workbook
+from app.services.roster_validation import check_workbook
+from app.services.selection_history import record_selections
+
+MAX_BATCH_REPORTS = int(os.getenv("MAX_BATCH_REPORTS", "200"))
+DEFAULT_PERCENT = 25
+
+
+def _dept_percents(db: Session) -> dict[str, int]:
+    return {
+        canon_dept(d.name): d.percent
+        for d in db.scalars(select(models.Department)).all()
+        if d.percent is not None
+    }
+
+
+def run_batch(
+    db: Session,
+    source: BinaryIO,
+    *,
+    test_type: str,
+    percent: int | None = None,
+    uploader_name: str = "admin",
+    uploaded_by: str = "admin",
+    upload_sha256: str | None = None,
+) -> tuple[list[PipelineContext], dict[str, float]]:
+    """Return (contexts with ``report`` set, stage timings in seconds).
+
+    With ``upload_sha256`` each group gets an idempotency key; groups that
+    were already generated from the same upload come back as stored reports.
+    """
+    timings: dict[str, float] = {}
+    now = datetime.now(IST)
+
+    t0 = time.perf_counter()
+    frame = read_workbook(source)
+    timings["parse"] = time.perf_counter() - t0
+    if frame.empty:
+        raise HTTPException(status_code=400, detail="Workbook has no data rows")
+
+    t0 = time.perf_counter()
+    errors = check_workbook(frame, today=now.date())
+    if errors:
+        raise HTTPException(status_code=400, detail=errors.message())
+    keys = pd.DataFrame(
+        {
+            "station": frame["station"].str.upper(),
+            "department": frame["department"].map(canon_dept),
+            "shift": frame["shift"].str.lower(),
+        }
+    )
+    groups = keys.groupby(["station", "department", "shift"], sort=True).indices
+    if len(groups) > MAX_BATCH_REPORTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Workbook would produce {len(groups)} reports (limit {MAX_BATCH_REPORTS})",
+        )
+    timings["validate"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    percents = {} if percent is not None else _dept_percents(db)
+    ctxs: list[PipelineContext] = []
+    for (station, dept_key, _shift), idx in groups.items():
+        grp = frame.iloc[idx]
+        req = ReportRequest(
+            shift=grp["shift"].iloc[0],
+            station=station,
+            department=grp["department"].iloc[0],
+            percent=percent if percent is not None else percents.get(dept_key, DEFAULT_PERCENT),
+            test_type=test_type,
+            uploader_name=uploader_name,
+            uploaded_by=uploaded_by,
+            dayfirst_dates=True,
+            canonical_departments=True,
+            upload_sha256=upload_sha256,
+        )
+        if upload_sha256:
+            req.idempotency_key = idempotency.request_key(
+                user=uploaded_by,
+                on=now.date(),
+                shift=req.shift,
+                department=req.department,
+                station=req.station,
+                test_type=test_type,
+                percent=req.percent,
+                upload_sha256=upload_sha256,
+            )
+        ctx = PipelineContext(request=req, source=None, db=db, now=now)
+        ctx.clean = pd.DataFrame(
+            {
+                "Person Name": grp["name"].to_numpy(),
+                "Employee ID": grp["employee id"].to_numpy(),
+                "Department": grp["department"].to_numpy(),
+            }
+        )
+        ctxs.append(ctx)
+
+    prior = idempotency.find_reports(
+        db, [c.request.idempotency_key for c in ctxs if c.request.idempotency_key], now.date()
+    )
+    fresh: list[PipelineContext] = []
+    for ctx in ctxs:
+        rep = prior.get(ctx.request.idempotency_key)
+        if rep is not None:
+            ctx.report, ctx.out_name = rep, rep.file_name
+        else:
+            select_staff(ctx)
+            fresh.append(ctx)
+    timings["select"] = time.perf_counter() - t0
+
+    try:
+        # Fan out: every report renders concurrently on the worker pool,
+        # each straight into its own spool file
+        t0 = time.perf_counter()
+        futures = []
+        for ctx in fresh:
+            ctx.tmp_path = spool_path()
+            futures.append(render_pool.submit(out=str(ctx.tmp_path), **render_kwargs(ctx)))
+        for ctx, fut in zip(fresh, futures):
+            fut.result()
+            ctx.out_name = output_name(ctx)
+        timings["render"] = time.perf_counter() - t0
+
+        # One transaction for every Report row and its selections
+        t0 = time.perf_counter()
+        reports = [new_report(c) for c in fresh]
+        db.add_all(reports)
+        db.flush()  # a concurrent identical batch fails here, before any rename
+        for ctx, rep in zip(fresh, reports):
+            write_pdf(ctx)
+            rep.artifact_id = ctx.artifact.id
+            record_selections(db, rep, ctx.clean.iloc[ctx.selection.positions], ctx.today)
+            stats.bump(db, rep)
+            ctx.report = rep
+        with metrics.DB_COMMIT_SECONDS.time(op="batch"):
+            db.commit()
+        stats.invalidate()
+        timings["persist"] = time.perf_counter() - t0
+    except Exception:
+        for ctx in fresh:
+            discard_spool(ctx)
+        raise
+
+    metrics.observe_stages("batch", timings)
+    return ctxs, timings
+
+
+def zip_name(c: PipelineContext) -> str:
+    # Names only carry day/station/shift/department, so groups can share one
+    return f"{c.report.id}_{c.out_name}"
+
+
+def manifest(ctxs: list[PipelineContext]) -> list[dict]:
+    return [
+        {
+            "report_id": c.report.id if c.report else None,
+            "file_name": c.out_name,
+            "zip_path": zip_name(c) if c.report else None,
+            "station": c.request.station,
+            "department": c.request.department,
+            "shift": c.request.shift,
+            "percent": c.request.percent,
+            "total_count": c.report.total_count if c.report else len(c.clean),
+            "selected_count": c.report.selected_count if c.report else len(c.selected),
+            "download": f"/api/reports/{c.report.id}/download" if c.report else None,
+        }
+        for c in ctxs
+    ]
+
+
+def zip_reports(ctxs: list[PipelineContext], dest: BinaryIO) -> None:
+    # PDFs are already compressed; storing them keeps this cheap
+    with zipfile.ZipFile(dest, "w", compression=zipfile.ZIP_STORED) as zf:
+        for c in ctxs:
+            with artifacts.open_report(c.db, c.report) as src, zf.open(zip_name(c), "w") as dst:
+                shutil.copyfileobj(src, dst, artifacts.CHUNK)
+        zf.writestr("manifest.json", json.dumps(manifest(ctxs), indent=2))
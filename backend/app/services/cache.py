@@ -0,0 +1,88 @@
+# app/services/cache.py
+"""Small in-process TTL and LRU caches.
+
+Each uvicorn worker has its own copy, so writes invalidate the local cache
+explicitly and the TTL bounds how stale another worker can be.
+"""
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+import threading
+import time
+
+_MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, ttl: float, maxsize: int = 256):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: dict[Hashable, tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is None:
+                return default
+            if hit[0] < time.monotonic():
+                del self._data[key]
+                return default
+            return hit[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            if len(self._data) >= self.maxsize and key not in self._data:
+                # Drop whatever expires first; good enough at these sizes
+                del self._data[min(self._data, key=lambda k: self._data[k][0])]
+            self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def get_or_set(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = fn()
+            self.set(key, value)
+        return value
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class LRUCache:
+    """Bounded cache for values that don't go stale; evicts least recently used."""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
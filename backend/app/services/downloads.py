@@ -0,0 +1,208 @@
+# app/services/downloads.py
+"""Serving stored report PDFs over HTTP.
+
+A stored PDF never changes (see services/artifacts), so its sha256 is a
+strong ETag: downloads answer ``If-None-Match`` with 304, ``Range`` with
+206 and carry ``Cache-Control: immutable``. Local files go out through
+FileResponse (sendfile, Range/If-Range); remote or archived objects are
+streamed with single-range support.
+
+Where a report's bytes are (path, size, hash) is kept per report id in an
+LRU, so a repeat download doesn't touch the database. Entries only go
+stale when the sweep moves a file; serving one then fails with
+FileNotFoundError before anything is sent, and the report is resolved again.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Iterator
+from urllib.parse import quote
+import os
+
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services import artifacts, metrics
+from app.services.cache import LRUCache
+
+DOWNLOAD_CACHE_SIZE = int(os.getenv("DOWNLOAD_CACHE_SIZE", "4096"))
+# Per-user data: browsers may keep it, shared proxies may not
+IMMUTABLE = "private, max-age=31536000, immutable"
+
+MISSING = "Report file missing on server"
+
+
+@dataclass(frozen=True)
+class Located:
+    file_name: str | None
+    size: int | None
+    sha256: str | None  # None for pre-store files
+    path: Path | None  # local file; None = stream from the store
+    # Same names as models.Artifact, so artifacts.open_artifact takes either
+    storage_key: str | None = None
+    archive_key: str | None = None
+    archived_at: datetime | None = None
+
+    @property
+    def etag(self) -> str | None:
+        return f'"{self.sha256}"' if self.sha256 else None
+
+
+_located = LRUCache(DOWNLOAD_CACHE_SIZE)
+
+
+def locate(db: Session, rep: models.Report) -> Located:
+    art = artifacts.for_report(db, rep)
+    if art is None:
+        p = artifacts.legacy_path(rep)
+        if p is None:
+            raise HTTPException(status_code=404, detail=MISSING)
+        return Located(rep.file_name, None, None, p)
+    loose = art.archived_at is None
+    return Located(
+        file_name=rep.file_name,
+        size=art.size,
+        sha256=art.sha256,
+        path=artifacts.store.local_path(art.storage_key) if loose else None,
+        storage_key=art.storage_key,
+        archive_key=art.archive_key,
+        archived_at=art.archived_at,
+    )
+
+
+# ---------- HTTP ----------
+
+def _etag_matches(header: str, etag: str) -> bool:
+    tags = [t.strip().removeprefix("W/") for t in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+def byte_range(header: str, size: int) -> tuple[int, int] | None:
+    """(start, end) exclusive for one ``bytes=`` range; None = send it all."""
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None  # a full 200 is a valid answer to multi-range requests
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first == "":
+            n = int(last)  # suffix: the last n bytes
+            start, end = (max(0, size - n), size) if n > 0 else (size, size)
+        else:
+            start = int(first)
+            end = min(size, int(last) + 1) if last else size
+    except ValueError:
+        return None
+    if start >= size or start >= end:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+
+def _chunks(fh: BinaryIO, length: int) -> Iterator[bytes]:
+    with fh:
+        while length > 0:
+            chunk = fh.read(min(artifacts.CHUNK, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+
+def _disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+def serve(
+    request: Request | None,
+    loc: Located,
+    *,
+    headers: dict[str, str] | None = None,
+    filename: str | None = None,
+) -> Response:
+    """Response for ``loc``; raises FileNotFoundError if its file has moved.
+
+    ``headers`` override the caching defaults (fresh uploads send no-store).
+    """
+    h: dict[str, str] = {}
+    etag = loc.etag
+    if etag:
+        h.update({"ETag": etag, "Cache-Control": IMMUTABLE})
+    h.update(headers or {})
+    if request is not None and etag:
+        inm = request.headers.get("if-none-match")
+        if inm and _etag_matches(inm, etag):
+            return Response(
+                status_code=304,
+                headers={k: v for k, v in h.items() if k in ("ETag", "Cache-Control")},
+            )
+
+    if loc.path is not None:
+        st = os.stat(loc.path)  # one stat, handed to FileResponse
+        return FileResponse(
+            loc.path, stat_result=st, filename=filename,
+            media_type="application/pdf", headers=h,
+        )
+
+    start, end, status = 0, loc.size, 200
+    rng = request.headers.get("range") if request is not None else None
+    if_range = request.headers.get("if-range") if request is not None else None
+    if rng and (if_range is None or if_range == etag):
+        span = byte_range(rng, loc.size)
+        if span is not None:
+            start, end = span
+            status = 206
+            h["Content-Range"] = f"bytes {start}-{end - 1}/{loc.size}"
+    fh = artifacts.open_artifact(loc, start, end)
+    h["Content-Length"] = str(end - start)
+    h["Accept-Ranges"] = "bytes"
+    if filename and "Content-Disposition" not in h:
+        h["Content-Disposition"] = _disposition(filename)
+    return StreamingResponse(
+        _chunks(fh, end - start), status_code=status, media_type="application/pdf", headers=h
+    )
+
+
+def report_response(
+    db: Session,
+    rep: models.Report,
+    *,
+    request: Request | None = None,
+    headers: dict[str, str] | None = None,
+    filename: str | None = None,
+) -> Response:
+    """The stored PDF of ``rep`` (upload routes, job results)."""
+    try:
+        return serve(request, locate(db, rep), headers=headers, filename=filename)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=MISSING)
+
+
+def download(request: Request, db: Session, report_id: int) -> Response:
+    """``GET /api/reports/{id}/download``; cache hits skip the database."""
+    loc = _located.get(report_id)
+    if loc is not None:
+        try:
+            resp = serve(request, loc, filename=loc.file_name)
+            metrics.DOWNLOAD_CACHE.inc(result="hit")
+            return resp
+        except FileNotFoundError:
+            _located.pop(report_id)  # moved by the sweep; look it up again
+    metrics.DOWNLOAD_CACHE.inc(result="miss")
+    rep = db.get(models.Report, report_id)
+    if not rep:
+        raise HTTPException(status_code=404, detail="Report not found")
+    loc = locate(db, rep)
+    try:
+        resp = serve(request, loc, filename=loc.file_name)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=MISSING)
+    _located.set(report_id, loc)
+    return resp
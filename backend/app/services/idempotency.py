@@ -0,0 +1,74 @@
+# app/services/idempotency.py
+"""Content hashing of uploads and idempotent report generation.
+
+A report is identified by who asked, for which day/shift/department/station,
+test type and percentage, and the exact bytes uploaded. Asking again for the same key
+returns the stored report instead of drawing a new random selection (no
+recomputation, and no re-rolling until a preferred selection comes up).
+"""
+from datetime import date
+from typing import BinaryIO
+import hashlib
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import models
+
+CHUNK = 1 << 20
+
+
+def hash_upload(fh: BinaryIO) -> str:
+    """sha256 of the whole stream; leaves it rewound for the parser."""
+    h = hashlib.sha256()
+    fh.seek(0)
+    for chunk in iter(lambda: fh.read(CHUNK), b""):
+        h.update(chunk)
+    fh.seek(0)
+    return h.hexdigest()
+
+
+def request_key(
+    *,
+    user: str,
+    on: date,
+    shift: str,
+    department: str,
+    station: str,
+    test_type: str,
+    percent: int,
+    upload_sha256: str,
+) -> str:
+    parts = [
+        (user or "").strip().lower(),
+        on.isoformat(),
+        (shift or "").strip().lower(),
+        (department or "").strip().lower(),
+        (station or "").strip().lower(),
+        (test_type or "BA").strip().upper(),
+        str(int(percent)),
+        upload_sha256,
+    ]
+    return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+
+
+def find_report(db: Session, key: str, on: date) -> models.Report | None:
+    # The key already covers the date; filtering on it too lets a
+    # partitioned reports table look in a single partition
+    R = models.Report
+    return (
+        db.execute(select(R).where(R.idempotency_key == key, R.date == on))
+        .scalars()
+        .first()
+    )
+
+
+def find_reports(db: Session, keys: list[str], on: date) -> dict[str, models.Report]:
+    if not keys:
+        return {}
+    R = models.Report
+    rows = db.execute(
+        select(R).where(R.idempotency_key.in_(keys), R.date == on)
+    ).scalars()
+    return {r.idempotency_key: r for r in rows}
+
@@ -0,0 +1,277 @@
+# app/services/jobs.py
+"""Background jobs for long-running work (report generation, imports).
+
+A job is driven by a small thread pool; CPU-heavy parts (Excel parsing,
+selection, ReportLab rendering) are shipped to a bounded process pool so
+they never hold the GIL of the uvicorn worker. Jobs live in memory and are
+dropped ``JOB_TTL_SECONDS`` after they finish.
+"""
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+
+from app.database import SessionLocal
+from app.services import idempotency, metrics, render_pool
+from app.services.report_pipeline import (
+    IST,
+    PipelineContext,
+    ReportRequest,
+    default_pipeline,
+    pipeline_for,
+)
+from app.services.selection import DEFAULT_STRATEGY
+from app.services.selection_history import recent_picks
+
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", str(min(4, os.cpu_count() or 1))))
+JOB_QUEUE_LIMIT = int(os.getenv("JOB_QUEUE_LIMIT", "32"))
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", "3600"))
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    status: str = QUEUED
+    stage: str | None = None
+    progress: float = 0.0
+    error: str | None = None
+    error_status: int | None = None
+    result: dict[str, Any] = field(default_factory=dict)
+    created_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+    events: list[dict[str, Any]] = field(default_factory=list)
+
+    def update(self, *, stage: str | None = None, progress: float | None = None, **extra) -> None:
+        if stage is not None:
+            self.stage = stage
+        if progress is not None:
+            self.progress = max(0.0, min(1.0, progress))
+        self.events.append(
+            {"status": self.status, "stage": self.stage, "progress": self.progress, **extra}
+        )
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": round(self.progress, 3),
+            "error": self.error,
+            "result": self.result,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobRegistry:
+    def __init__(self, max_pending: int = JOB_QUEUE_LIMIT, ttl: int = JOB_TTL_SECONDS):
+        self._jobs: dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._ttl = ttl
+        self._runner: ThreadPoolExecutor | None = None
+        self._procs: ProcessPoolExecutor | None = None
+
+    # ---- pools (created lazily so importing this module is free) ----
+    @property
+    def runner(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._runner is None:
+                self._runner = ThreadPoolExecutor(
+                    max_workers=max(2, REPORT_WORKERS), thread_name_prefix="job"
+                )
+            return self._runner
+
+    @property
+    def processes(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._procs is None:
+                # spawn: children must not inherit the parent's DB connections/threads
+                self._procs = ProcessPoolExecutor(
+                    max_workers=REPORT_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=render_pool.init_worker,
+                )
+            return self._procs
+
+    def shutdown(self) -> None:
+        with self._lock:
+            runner, procs = self._runner, self._procs
+            self._runner = self._procs = None
+        if runner:
+            runner.shutdown(wait=False, cancel_futures=True)
+        if procs:
+            procs.shutdown(wait=False, cancel_futures=True)
+
+    # ---- bookkeeping ----
+    def get(self, job_id: str) -> Job | None:
+        self._purge()
+        return self._jobs.get(job_id)
+
+    def _purge(self) -> None:
+        cutoff = time.time() - self._ttl
+        with self._lock:
+            for jid in [j.id for j in self._jobs.values() if j.finished_at and j.finished_at < cutoff]:
+                del self._jobs[jid]
+
+    def submit(self, kind: str, fn: Callable[..., dict], *args, **kwargs) -> Job:
+        """Run ``fn(job, *args, **kwargs)`` in the background; its dict is the result."""
+        if not self._slots.acquire(blocking=False):
+            raise JobQueueFull(f"Too many pending jobs (limit {JOB_QUEUE_LIMIT})")
+        job = Job(id=uuid.uuid4().hex, kind=kind)
+        job.update(stage="queued")
+        with self._lock:
+            self._jobs[job.id] = job
+        self.runner.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job: Job, fn, args, kwargs) -> None:
+        try:
+            job.status = RUNNING
+            job.update(stage="started")
+            job.result = fn(job, *args, **kwargs) or {}
+            job.status = DONE
+            job.update(stage="done", progress=1.0)
+        except HTTPException as e:
+            self._fail(job, str(e.detail), e.status_code)
+        except Exception as e:  # surfaced to the poller, not raised
+            self._fail(job, f"{type(e).__name__}: {e}", 500)
+        finally:
+            job.finished_at = time.time()
+            self._slots.release()
+
+    @staticmethod
+    def _fail(job: Job, msg: str, status: int) -> None:
+        job.status = FAILED
+        job.error, job.error_status = msg, status
+        job.update(error=msg)
+
+
+registry = JobRegistry()
+
+
+# ---------- report generation ----------
+
+def _compute_report(
+    request: ReportRequest, source_path: str, filename: str, now: datetime, picks: dict
+):
+    """Process-pool entry point: parse -> render without touching the DB.
+
+    Returns ("ok", ctx) or ("error", status_code, detail); HTTPException
+    itself doesn't survive pickling reliably.
+    """
+    with open(source_path, "rb") as fh:
+        ctx = PipelineContext(request=request, source=fh, now=now, recent_picks=picks)
+        try:
+            pipeline_for(filename).run(ctx, stop="render")
+        except HTTPException as e:
+            return ("error", e.status_code, e.detail)
+    ctx.source = None
+    ctx.frame = None  # raw sheet isn't needed to persist
+    return ("ok", ctx)
+
+
+def run_report_job(job: Job, request: ReportRequest, source_path: Path, filename: str) -> dict:
+    try:
+        db = SessionLocal()
+        try:
+            picks = {}
+            if (request.strategy or DEFAULT_STRATEGY).strip().lower() == "cooldown":
+                job.update(stage="history")
+                picks = recent_picks(db, request.station, request.department)
+
+            job.update(stage="rendering", progress=0.1)
+            out = registry.processes.submit(
+                _compute_report, request, str(source_path), filename, datetime.now(IST), picks
+            ).result()
+            if out[0] == "error":
+                raise HTTPException(status_code=out[1], detail=out[2])
+            ctx = out[1]
+
+            job.update(stage="persisting", progress=0.9)
+            ctx.db = db
+            try:
+                default_pipeline.run(ctx, start="persist")
+                # parse..render ran in the worker process; report them here
+                metrics.observe_stages("job", ctx.timings)
+                if "build" in ctx.pdf_timings:
+                    metrics.PDF_BUILD_SECONDS.observe(ctx.pdf_timings["build"])
+            except IntegrityError:
+                # An identical request was persisted while this one rendered
+                db.rollback()
+                prior = idempotency.find_report(db, request.idempotency_key or "", ctx.today)
+                if prior is None:
+                    raise
+                return {
+                    "report_id": prior.id,
+                    "file_name": prior.file_name,
+                    "total_count": prior.total_count,
+                    "selected_count": prior.selected_count,
+                    "replayed": True,
+                }
+        finally:
+            db.close()
+    finally:
+        source_path.unlink(missing_ok=True)
+
+    return {
+        "report_id": ctx.report.id if ctx.report else None,
+        "file_name": ctx.out_name,
+        "total_count": len(ctx.clean),
+        "selected_count": len(ctx.selected),
+        "timings": {k: round(v, 4) for k, v in ctx.timings.items()},
+        "pdf_build": round(ctx.pdf_timings["build"], 4) if "build" in ctx.pdf_timings else None,
+    }
+
+
+# ---------- user import ----------
+
+def run_user_import_job(job: Job, source_path: Path, default_role: str) -> dict:
+    from app.services import user_import
+
+    try:
+        job.update(stage="reading")
+        try:
+            df = user_import.read_sheet(str(source_path))
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Invalid Excel: {e}")
+        db = SessionLocal()
+        try:
+            try:
+                res = user_import.import_users(
+                    db,
+                    df,
+                    default_role=default_role,
+                    # hashing is the slow part: 5%..85%, writing 85%..100%
+                    progress=lambda stage, p: job.update(
+                        stage=stage, progress=(0.05 + 0.8 * p) if stage == "hashing" else (0.85 + 0.15 * p)
+                    ),
+                )
+            except ValueError as e:  # missing columns
+                raise HTTPException(status_code=400, detail=str(e))
+        finally:
+            db.close()
+    finally:
+        source_path.unlink(missing_ok=True)
+    return res.as_dict()
@@ -0,0 +1,270 @@
+# app/services/metrics.py
+"""Request and stage metrics in the Prometheus text format (``GET /metrics``).
+
+No client library: counters, gauges and histograms are a few dicts under a
+lock. Each uvicorn worker keeps its own numbers, so scrape every worker.
+Work done in pool processes (report jobs, PDF rendering) is observed in
+the parent when its result comes back.
+"""
+from contextlib import contextmanager
+from typing import Callable, Iterator
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+REGISTRY: list["_Metric"] = []
+
+
+def _esc(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_esc(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _num(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if v != int(v) else str(int(v))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, doc: str, labels: tuple[str, ...] = ()):
+        self.name, self.doc, self.labelnames = name, doc, tuple(labels)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def lines(self) -> Iterator[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, doc, labels=()):
+        super().__init__(name, doc, labels)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def lines(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, v in items:
+            yield f"{self.name}{_labels(self.labelnames, key)} {_num(v)}"
+
+
+class Gauge(_Metric):
+    """Set explicitly, or read from ``fn`` at scrape time (unlabelled only)."""
+    kind = "gauge"
+
+    def __init__(self, name, doc, labels=(), fn: Callable[[], float] | None = None):
+        super().__init__(name, doc, labels)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._fn = fn
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def lines(self):
+        if self._fn is not None:
+            try:
+                yield f"{self.name} {_num(self._fn())}"
+            except Exception:
+                pass  # source not ready (e.g. pool not created yet)
+            return
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, v in items:
+            yield f"{self.name}{_labels(self.labelnames, key)} {_num(v)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, doc, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, doc, labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # key -> [bucket counts..., sum, count]
+        self._values: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, le in enumerate(self.buckets):
+                if value <= le:
+                    row[i] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def lines(self):
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        for key, row in items:
+            for le, n in zip(self.buckets, row):
+                lbl = _labels(self.labelnames, key, f'le="{_num(le)}"')
+                yield f"{self.name}_bucket{lbl} {_num(n)}"
+            lbl = _labels(self.labelnames, key)
+            yield f"{self.name}_sum{lbl} {_num(row[-2])}"
+            yield f"{self.name}_count{lbl} {_num(row[-1])}"
+
+
+def render() -> str:
+    out: list[str] = []
+    for m in REGISTRY:
+        out.append(f"# HELP {m.name} {m.doc}")
+        out.append(f"# TYPE {m.name} {m.kind}")
+        out.extend(m.lines())
+    return "\n".join(out) + "\n"
+
+
+# ---------- HTTP ----------
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route template and status.",
+    ("method", "route", "status"),
+)
+HTTP_SECONDS = Histogram(
+    "http_request_duration_seconds", "Time until the response starts.",
+    ("method", "route"),
+)
+
+
+async def timing_middleware(request, call_next):
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Route template, not the raw path: /api/reports/{rid}/download
+        route = getattr(request.scope.get("route"), "path", None) or "unmatched"
+        HTTP_REQUESTS.inc(method=request.method, route=route, status=status)
+        HTTP_SECONDS.observe(time.perf_counter() - t0, method=request.method, route=route)
+
+
+# ---------- report generation ----------
+
+REPORT_STAGE_SECONDS = Histogram(
+    "report_stage_seconds",
+    "Report pipeline stage time (parse, validate, select, render, persist).",
+    ("pipeline", "stage"),
+)
+PDF_BUILD_SECONDS = Histogram(
+    "report_pdf_build_seconds", "ReportLab doc.build time per PDF.",
+)
+PDF_WRITE_SECONDS = Histogram(
+    "report_pdf_write_seconds", "Hashing a rendered PDF and moving it into the artifact store.",
+)
+DB_COMMIT_SECONDS = Histogram(
+    "db_commit_seconds", "Commit time of report transactions.", ("op",),
+)
+
+
+def observe_stages(pipeline: str, timings: dict[str, float]) -> None:
+    for stage, seconds in timings.items():
+        REPORT_STAGE_SECONDS.observe(seconds, pipeline=pipeline, stage=stage)
+
+
+# ---------- artifact store ----------
+
+ARTIFACTS_STORED = Counter(
+    "artifacts_stored_total", "PDFs handed to the store: new objects or dedup hits.",
+    ("result",),
+)
+ARTIFACTS_ARCHIVED = Counter(
+    "artifacts_archived_total", "Artifacts moved into monthly archive zips.",
+)
+DOWNLOAD_CACHE = Counter(
+    "report_download_cache_total", "Report download location lookups (hit = no DB query).",
+    ("result",),
+)
+
+
+# ---------- DB pool ----------
+
+POOL_WAIT_SECONDS = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time to get a connection from the pool, including opening a new one.",
+)
+POOL_HOLD_SECONDS = Histogram(
+    "db_pool_checkout_hold_seconds", "How long a connection stays checked out.",
+)
+POOL_CHECKOUTS = Counter("db_pool_checkouts_total", "Connections handed out by the pool.")
+POOL_CONNECTS = Counter("db_pool_connects_total", "New DBAPI connections opened.")
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited."""
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_WAIT_SECONDS.observe(time.perf_counter() - t0)
+
+
+def instrument_pool(engine: Engine) -> None:
+    """Checkout counts / hold times and live pool gauges for ``engine``."""
+
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_conn, record):
+        POOL_CONNECTS.inc()
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_conn, record, proxy):
+        POOL_CHECKOUTS.inc()
+        record.info["checkout_at"] = time.perf_counter()
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_conn, record):
+        t0 = record.info.pop("checkout_at", None)
+        if t0 is not None:
+            POOL_HOLD_SECONDS.observe(time.perf_counter() - t0)
+
+    # engine.pool is looked up per scrape: dispose() swaps in a new pool
+    Gauge("db_pool_size", "Configured pool size.", fn=lambda: engine.pool.size())
+    Gauge(
+        "db_pool_checked_out", "Connections currently checked out.",
+        fn=lambda: engine.pool.checkedout(),
+    )
+    Gauge(
+        "db_pool_overflow", "Connections open beyond pool_size.",
+        fn=lambda: engine.pool.overflow(),
+    )
@@ -0,0 +1,232 @@
+# app/services/people.py
+"""People directory: superadmins, admins and users behind one search.
+
+Search goes through ``people_tokens`` -- one row per lowercase word of a
+person's username, name and email (plus the whole username and email).
+Every search term must prefix-match one of the person's tokens, which is
+an index range scan instead of ``LIKE '%q%'`` over every row. Listing is
+one UNION ALL ordered and limited in SQL, so a page never loads the
+whole directory into Python.
+
+Routes that create, edit or delete people call ``reindex`` / ``forget``
+before committing, the same way reports call ``stats.bump``.
+"""
+from datetime import datetime
+import re
+
+from sqlalchemy import delete, func, insert, literal, null, select, true, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app import models
+
+# Same order login checks them in
+ROLES = ("superadmin", "admin", "user")
+MODELS = {
+    "superadmin": models.SuperAdmin,
+    "admin": models.Admin,
+    "user": models.User,
+}
+TOKEN_LEN = 64
+
+_split = re.compile(r"[^0-9a-z]+")
+
+
+def _tokens(*values: str | None) -> set[str]:
+    out: set[str] = set()
+    for v in values:
+        v = (v or "").strip().lower()
+        if not v:
+            continue
+        out.add(v[:TOKEN_LEN])  # "john.doe@x.com" still matches "john.d"
+        out.update(t[:TOKEN_LEN] for t in _split.split(v) if t)
+    return out
+
+
+def _person_tokens(role: str, obj) -> set[str]:
+    extra = (obj.role,) if role == "user" else ()
+    return _tokens(obj.username, obj.name, obj.email, *extra)
+
+
+def search_terms(q: str | None) -> list[str]:
+    return [t[:TOKEN_LEN] for t in (q or "").lower().split()]
+
+
+def _like_prefix(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def matching(role: str, terms: list[str]):
+    """WHERE clauses limiting ``MODELS[role]`` to people matching every term."""
+    T, M = models.PersonToken, MODELS[role]
+    return [
+        M.id.in_(
+            select(T.person_id).where(
+                T.role == role, T.token.like(_like_prefix(term), escape="\\")
+            )
+        )
+        for term in terms
+    ]
+
+
+# ---------- index maintenance ----------
+
+def forget(db: Session, role: str, person_id: int) -> None:
+    T = models.PersonToken
+    db.execute(delete(T).where(T.role == role, T.person_id == person_id))
+
+
+def reindex(db: Session, role: str, obj) -> None:
+    """Replace ``obj``'s tokens; caller owns the transaction."""
+    if obj.id is None:
+        db.flush()
+    forget(db, role, obj.id)
+    rows = [
+        {"role": role, "person_id": obj.id, "token": t}
+        for t in sorted(_person_tokens(role, obj))
+    ]
+    if rows:
+        db.execute(insert(models.PersonToken), rows)
+
+
+def reindex_users(db: Session, usernames: list[str]) -> None:
+    """Bulk variant for the Excel import, which writes users without the ORM."""
+    T, U = models.PersonToken, models.User
+    found = db.execute(
+        select(U.id, U.username, U.name, U.email, U.role).where(U.username.in_(usernames))
+    ).all()
+    if not found:
+        return
+    db.execute(delete(T).where(T.role == "user", T.person_id.in_([p.id for p in found])))
+    rows = [
+        {"role": "user", "person_id": p.id, "token": t}
+        for p in found
+        for t in sorted(_person_tokens("user", p))
+    ]
+    if rows:
+        db.execute(insert(T), rows)
+
+
+def rebuild(db: Session, chunk: int = 1000) -> int:
+    """Re-tokenise everyone; returns token rows written."""
+    T = models.PersonToken
+    db.execute(delete(T))
+    written = 0
+    for role, M in MODELS.items():
+        cols = [M.id, M.username, M.name, M.email]
+        if role == "user":
+            cols.append(M.role)
+        rows: list[dict] = []
+        for p in db.execute(select(*cols)).yield_per(chunk):
+            rows += [
+                {"role": role, "person_id": p.id, "token": t}
+                for t in sorted(_person_tokens(role, p))
+            ]
+            if len(rows) >= chunk:
+                db.execute(insert(T), rows)
+                written += len(rows)
+                rows = []
+        if rows:
+            db.execute(insert(T), rows)
+            written += len(rows)
+    db.commit()
+    return written
+
+
+# ---------- listing ----------
+
+def _select(role: str, terms: list[str]):
+    M = MODELS[role]
+    return select(
+        literal(role).label("role"),
+        M.id.label("id"),
+        M.username.label("username"),
+        M.name.label("name"),
+        M.email.label("email"),
+        M.phone.label("phone"),
+        getattr(M, "department", null()).label("department"),
+        getattr(M, "station", null()).label("station"),
+        (M.is_active if role == "user" else true()).label("is_active"),
+        M.created_at.label("created_at"),
+    ).where(*matching(role, terms))
+
+
+def _row(r) -> dict:
+    created = r.created_at
+    if isinstance(created, str):  # SQLite hands back text from a UNION
+        created = datetime.fromisoformat(created)
+    return {
+        "id": r.id,
+        "username": r.username,
+        "name": r.name,
+        "email": r.email,
+        "phone": r.phone,
+        "role": r.role,
+        "department": r.department,
+        "station": r.station,
+        "is_active": True if r.is_active is None else bool(r.is_active),
+        "created_at": created.isoformat() if created else None,
+    }
+
+
+def directory_queries(roles: set[str] | None, q: str | None, page: int, page_size: int):
+    """(count query, page query) over the merged account tables, or None."""
+    want = [r for r in ROLES if r in (roles or set(ROLES))]
+    if not want:
+        return None
+    terms = search_terms(q)
+    merged = union_all(*(_select(r, terms) for r in want)).subquery()
+    page_q = (
+        select(merged)
+        .order_by(merged.c.created_at.desc(), merged.c.role, merged.c.id.desc())
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+    )
+    return select(func.count()).select_from(merged), page_q
+
+
+def _page(rows, total: int, page: int, page_size: int) -> dict:
+    return {
+        "items": [_row(r) for r in rows],
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "pages": (total + page_size - 1) // page_size,
+    }
+
+
+def directory(
+    db: Session,
+    *,
+    roles: set[str] | None = None,
+    q: str | None = None,
+    page: int = 1,
+    page_size: int = 10,
+) -> dict:
+    """One page of people, newest first, merged across the account tables."""
+    queries = directory_queries(roles, q, page, page_size)
+    if queries is None:
+        return _page([], 0, page, page_size)
+    count_q, page_q = queries
+    total = db.execute(count_q).scalar() or 0
+    return _page(db.execute(page_q).all(), total, page, page_size)
+
+
+async def directory_async(
+    db: AsyncSession,
+    *,
+    roles: set[str] | None = None,
+    q: str | None = None,
+    page: int = 1,
+    page_size: int = 10,
+) -> dict:
+    queries = directory_queries(roles, q, page, page_size)
+    if queries is None:
+        return _page([], 0, page, page_size)
+    count_q, page_q = queries
+    total = (await db.execute(count_q)).scalar() or 0
+    return _page((await db.execute(page_q)).all(), total, page, page_size)
+
+
+def parse_roles(roles: str | None) -> set[str]:
+    return {r.strip().lower() for r in (roles or "").split(",") if r.strip()}
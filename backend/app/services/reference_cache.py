@@ -0,0 +1,114 @@
+# app/services/reference_cache.py
+"""Cached reference data: dropdown lists and user profiles.
+
+Routes that change departments, shifts, stations or users call the
+``invalidate_*`` hooks after committing; the TTL covers other workers.
+Payloads carry a content ETag so clients can revalidate with
+If-None-Match and get an empty 304 back.
+"""
+from dataclasses import dataclass
+import hashlib
+import json
+import os
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services.cache import TTLCache
+
+REFERENCE_CACHE_SECONDS = float(os.getenv("REFERENCE_CACHE_SECONDS", "300"))
+USER_CACHE_SECONDS = float(os.getenv("USER_CACHE_SECONDS", "60"))
+
+_refs = TTLCache(REFERENCE_CACHE_SECONDS, maxsize=8)
+_users = TTLCache(USER_CACHE_SECONDS, maxsize=1024)
+
+
+@dataclass(frozen=True)
+class UserProfile:
+    """Detached copy of the User fields the upload routes need."""
+    id: int
+    username: str
+    name: str | None
+    department: str | None
+    station: str | None
+    role: str | None
+    is_active: bool
+
+
+# ---------- dropdowns ----------
+
+def _load_dropdowns(db: Session) -> dict:
+    deps = db.scalars(select(models.Department)
+                      .where(models.Department.is_active.is_(True))
+                      .order_by(models.Department.name.asc())).all()
+    sh = db.scalars(select(models.Shift)
+                    .where(models.Shift.is_active.is_(True))
+                    .order_by(models.Shift.name.asc())).all()
+    st = db.scalars(select(models.Station)
+                    .where(models.Station.is_active.is_(True))
+                    .order_by(models.Station.code.asc())).all()
+    return {
+        "departments": [{"name": d.name, "percent": d.percent} for d in deps],
+        "shifts": [s.name for s in sh],
+        "stations": [s.code for s in st],   # station **codes only**
+    }
+
+
+def dropdowns(db: Session) -> tuple[dict, str]:
+    """(payload, etag) for /api/dropdowns."""
+    return _refs.get_or_set("dropdowns", lambda: _with_etag(_load_dropdowns(db)))
+
+
+def invalidate_reference() -> None:
+    _refs.clear()
+
+
+# ---------- users ----------
+
+def user_profile(db: Session, username: str) -> UserProfile | None:
+    prof = _users.get(username)
+    if prof is None:
+        u = (
+            db.execute(select(models.User).where(models.User.username == username))
+            .scalars()
+            .first()
+        )
+        if u is None:
+            return None  # not cached: a user created a moment later must be found
+        prof = UserProfile(
+            id=u.id,
+            username=u.username,
+            name=u.name,
+            department=u.department,
+            station=u.station,
+            role=u.role,
+            is_active=bool(u.is_active),
+        )
+        _users.set(username, prof)
+    return prof
+
+
+def invalidate_users() -> None:
+    # A rename changes the key, so drop everything rather than one entry
+    _users.clear()
+
+
+# ---------- ETag ----------
+
+def _with_etag(payload) -> tuple[object, str]:
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return payload, '"' + hashlib.sha1(body.encode()).hexdigest() + '"'
+
+
+def etag_json(request: Request, payload, etag: str | None = None) -> Response:
+    """JSON response with an ETag; 304 when the client already has it."""
+    if etag is None:
+        payload, etag = _with_etag(payload)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    inm = request.headers.get("if-none-match", "")
+    if etag in [t.strip().removeprefix("W/") for t in inm.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(payload, headers=headers)
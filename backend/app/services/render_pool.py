@@ -0,0 +1,106 @@
+# app/services/render_pool.py
+"""Process pool dedicated to ReportLab rendering.
+
+Each worker imports ReportLab, decodes the logo and touches the shared
+table styles once (``reports_pdf.warm``), then only receives plain row
+lists. ``RENDER_WORKERS=0`` renders inline in the calling thread.
+"""
+from concurrent.futures import Future, ProcessPoolExecutor
+import multiprocessing
+import os
+import threading
+
+from app.services import metrics, reports_pdf
+
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", str(min(2, os.cpu_count() or 1))))
+
+_pool: ProcessPoolExecutor | None = None
+_lock = threading.Lock()
+_in_worker = False
+
+
+def init_worker() -> None:
+    """Pool initializer; also used by the jobs pool, whose workers render inline."""
+    global _in_worker
+    _in_worker = True
+    reports_pdf.warm()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=RENDER_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker,
+            )
+        return _pool
+
+
+def enabled() -> bool:
+    # Never nest pools: a worker process renders in-process
+    return RENDER_WORKERS > 0 and not _in_worker
+
+
+def start() -> None:
+    """Spin up and warm every worker so the first report doesn't pay for it."""
+    if not enabled():
+        return
+    pool = _get_pool()
+    for f in [pool.submit(os.getpid) for _ in range(RENDER_WORKERS)]:
+        f.result()
+
+
+def _render_timed(kwargs: dict):
+    timings: dict[str, float] = {}
+    return reports_pdf.render_rows(timings=timings, **kwargs), timings
+
+
+def _unwrap(inner: Future, timings: dict[str, float] | None = None) -> Future:
+    """Future of the PDF alone; the build time goes to the parent's metrics.
+
+    Inside a jobs-pool worker the metrics registry isn't the server's, so
+    only ``timings`` gets the build time; the job hands it back to observe.
+    """
+    outer: Future = Future()
+
+    def done(f: Future) -> None:
+        try:
+            res, worker_timings = f.result()
+        except Exception as e:
+            outer.set_exception(e)
+            return
+        if timings is not None:
+            timings.update(worker_timings)
+        if "build" in worker_timings and not _in_worker:
+            metrics.PDF_BUILD_SECONDS.observe(worker_timings["build"])
+        outer.set_result(res)
+
+    inner.add_done_callback(done)
+    return outer
+
+
+def submit(*, timings: dict[str, float] | None = None, **kwargs) -> Future:
+    """Render in the pool. kwargs as ``render_rows``; pass ``out=<path>`` to
+    have the worker write the file and resolve to None instead of bytes."""
+    if not enabled():
+        f: Future = Future()
+        try:
+            f.set_result(_render_timed(kwargs))
+        except Exception as e:
+            f.set_exception(e)
+        return _unwrap(f, timings)
+    return _unwrap(_get_pool().submit(_render_timed, kwargs), timings)
+
+
+def render(*, timings: dict[str, float] | None = None, **kwargs) -> bytes | None:
+    return submit(timings=timings, **kwargs).result()
+
+
+def shutdown() -> None:
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,133 @@
+# app/services/report_export.py
+"""Bulk export: every report matching the admin filters as one streamed ZIP.
+
+The archive is produced while it is sent. zipfile writes into a sink that
+the response drains after every chunk, PDFs are copied from the artifact
+store ``CHUNK`` bytes at a time, and report rows are read with
+``yield_per``. Memory stays at about one chunk, one batch of rows and
+the manifest text, however many PDFs are sent. PDFs are stored, not
+deflated (they are already compressed).
+
+``manifest.csv`` goes last so it can say which files were actually found.
+"""
+from datetime import datetime
+from typing import Iterator
+import csv
+import io
+import os
+import zipfile
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from app import models
+from app.database import SessionLocal
+from app.services import artifacts, report_listing
+
+MAX_EXPORT_REPORTS = int(os.getenv("MAX_EXPORT_REPORTS", "5000"))
+ROW_BATCH = 200
+
+MANIFEST_COLUMNS = [
+    "id", "zip_path", "status", "file_name", "date", "shift", "department", "station",
+    "test_type", "percent", "total_count", "selected_count", "uploaded_by",
+    "selection_strategy", "selection_seed", "sha256", "created_at",
+]
+
+
+class _Sink:
+    """Write-only file for zipfile; the generator drains it as it goes."""
+
+    def __init__(self):
+        self._parts: list[bytes] = []
+
+    def write(self, b) -> int:
+        self._parts.append(bytes(b))
+        return len(b)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> Iterator[bytes]:
+        parts, self._parts = self._parts, []
+        if parts:
+            yield b"".join(parts)
+
+
+def check_size(db: Session, q: Select) -> int:
+    """Matching report count; 404 for none, 400 over ``MAX_EXPORT_REPORTS``."""
+    n = report_listing.count(db, q)
+    if n == 0:
+        raise HTTPException(status_code=404, detail="No reports match the filters")
+    if n > MAX_EXPORT_REPORTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{n} reports match; narrow the filters (limit {MAX_EXPORT_REPORTS})",
+        )
+    return n
+
+
+def zip_path(rep: models.Report) -> str:
+    # File names only carry the day, so several reports can share one
+    return f"{rep.date:%Y-%m-%d}/{rep.id}_{rep.file_name or 'report.pdf'}"
+
+
+def _zip_time(rep: models.Report) -> tuple:
+    ts = rep.created_at or datetime(rep.date.year, rep.date.month, rep.date.day)
+    return (max(ts.year, 1980), ts.month, ts.day, ts.hour, ts.minute, ts.second)
+
+
+def _open(rep: models.Report, art: models.Artifact | None):
+    if art is not None:
+        return artifacts.open_artifact(art)
+    p = artifacts.legacy_path(rep)
+    if p is None:
+        raise FileNotFoundError(rep.file_path)
+    return open(p, "rb")
+
+
+def _manifest_row(rep: models.Report, art: models.Artifact | None, path: str, status: str):
+    return [
+        rep.id, path, status, rep.file_name,
+        rep.date.isoformat() if rep.date else "", rep.shift, rep.department, rep.station,
+        rep.test_type, rep.percent, rep.total_count, rep.selected_count, rep.uploaded_by,
+        rep.selection_strategy, rep.selection_seed, art.sha256 if art else "",
+        rep.created_at.isoformat() if rep.created_at else "",
+    ]
+
+
+def stream_zip(q: Select) -> Iterator[bytes]:
+    """ZIP bytes for every report of ``q``, oldest first, then manifest.csv.
+
+    Opens its own session: the response body outlives the request's one.
+    """
+    R, A = models.Report, models.Artifact
+    rows = (
+        q.add_columns(A)
+        .outerjoin(A, A.id == R.artifact_id)
+        .order_by(None)
+        .order_by(R.date, R.id)
+    )
+    manifest = io.StringIO()
+    writer = csv.writer(manifest)
+    writer.writerow(MANIFEST_COLUMNS)
+    sink = _Sink()
+    with SessionLocal() as db, zipfile.ZipFile(sink, "w", zipfile.ZIP_STORED) as zf:
+        for rep, art in db.execute(rows.execution_options(yield_per=ROW_BATCH)):
+            path = zip_path(rep)
+            try:
+                src = _open(rep, art)
+            except FileNotFoundError:
+                writer.writerow(_manifest_row(rep, art, "", "missing"))
+                continue
+            info = zipfile.ZipInfo(path, date_time=_zip_time(rep))
+            if art is not None:
+                info.file_size = art.size  # lets zipfile skip zip64 for small files
+            with src, zf.open(info, "w") as dst:
+                for chunk in iter(lambda: src.read(artifacts.CHUNK), b""):
+                    dst.write(chunk)
+                    yield from sink.drain()
+            writer.writerow(_manifest_row(rep, art, path, "ok"))
+            yield from sink.drain()
+        zf.writestr("manifest.csv", manifest.getvalue())
+    yield from sink.drain()
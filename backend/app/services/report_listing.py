@@ -0,0 +1,118 @@
+# app/services/report_listing.py
+"""Report list queries: normalised filter keys and keyset (cursor) paging.
+
+Filters compare against the lowercase ``*_key`` columns so they are plain
+equality lookups on the composite indexes of ``reports``. Cursor pages are
+ordered by (created_at, id) descending and continue strictly after the last
+row seen, so page 500 costs the same as page 1.
+
+Query building is kept apart from execution so the ``async def`` routes
+(``*_async`` helpers, AsyncSession) and sync callers share it.
+"""
+from datetime import date, datetime
+import base64
+
+from fastapi import HTTPException
+from sqlalchemy import String, and_, desc, func, or_, select, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from app import models
+
+
+def norm_key(s: str | None) -> str:
+    return (s or "").strip().lower()
+
+
+def encode_cursor(rep: models.Report) -> str:
+    raw = f"{rep.created_at.isoformat()}|{rep.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ts, rid = raw.split("|")
+        return datetime.fromisoformat(ts), int(rid)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def admin_query(
+    date_from: date | None = None,
+    date_to: date | None = None,
+    shift: str | None = None,
+    department: str | None = None,
+    station: str | None = None,
+    test_type: str | None = None,
+) -> Select:
+    """Reports matching the admin list filters (also used by the export)."""
+    R = models.Report
+    q = select(R)
+    if date_from:
+        q = q.where(R.date >= date_from)
+    if date_to:
+        q = q.where(R.date <= date_to)
+    # Exact matches on the indexed lowercase keys
+    if shift:
+        q = q.where(R.shift_key == norm_key(shift))
+    if department:
+        q = q.where(R.department_key == norm_key(department))
+    if station:
+        q = q.where(R.station_key == norm_key(station))
+    if test_type:
+        q = q.where(R.test_type == test_type.strip().upper())
+    return q
+
+
+def count_query(q: Select) -> Select:
+    return select(func.count()).select_from(q.subquery())
+
+
+def count(db: Session, q: Select) -> int:
+    return db.execute(count_query(q)).scalar() or 0
+
+
+async def count_async(db: AsyncSession, q: Select) -> int:
+    return (await db.execute(count_query(q))).scalar() or 0
+
+
+def newest_first(q: Select) -> Select:
+    R = models.Report
+    return q.order_by(desc(R.created_at), desc(R.id))
+
+
+def page_query(q: Select, cursor: str | None, limit: int) -> Select:
+    """Rows after ``cursor``, plus one extra to tell whether a next page exists."""
+    R = models.Report
+    if cursor:
+        ts, rid = decode_cursor(cursor)
+        # Compare as ISO text, which MySQL converts once and still range-scans.
+        # SQLite keeps the text as written: "…SS" from the server default,
+        # "…SS.ffffff" from the ORM, so a whole-second cursor matches either.
+        created = type_coerce(R.created_at, String)
+        at = ts.isoformat(sep=" ")
+        same = created == at if ts.microsecond else created.in_([at, f"{at}.000000"])
+        q = q.where(or_(created < at, and_(same, R.id < rid)))
+    return newest_first(q).limit(limit + 1)
+
+
+def _split_page(rows, limit: int) -> tuple[list[models.Report], str | None]:
+    more = len(rows) > limit
+    rows = list(rows[:limit])
+    return rows, (encode_cursor(rows[-1]) if more and rows else None)
+
+
+def page_after(
+    db: Session, q: Select, cursor: str | None, limit: int
+) -> tuple[list[models.Report], str | None]:
+    """One page after ``cursor`` and the cursor of the page after that (or None)."""
+    return _split_page(db.execute(page_query(q, cursor, limit)).scalars().all(), limit)
+
+
+async def page_after_async(
+    db: AsyncSession, q: Select, cursor: str | None, limit: int
+) -> tuple[list[models.Report], str | None]:
+    rows = (await db.execute(page_query(q, cursor, limit))).scalars().all()
+    return _split_page(rows, limit)
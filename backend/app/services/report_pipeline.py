@@ -0,0 +1,365 @@
+# app/services/report_pipeline.py
+"""Staged report generation shared by /generate and /admin-generate.
+
+A run goes parse -> validate -> select -> render -> persist. Every stage is a
+plain ``fn(ctx) -> None`` that reads what earlier stages left on the
+``PipelineContext`` and adds its own output, so a stage can be swapped out
+(``pipeline.replace("render", my_render)``) or run on its own for benchmarks.
+Wall time per stage is recorded in ``ctx.timings`` (seconds).
+
+.xlsx uploads use ``streaming_pipeline`` by default: its parse stage reads
+and validates in one pass via ``roster_ingest`` and validate is a no-op.
+Set ``ROSTER_INGEST=pandas`` to force the DataFrame path.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Callable
+from zoneinfo import ZoneInfo
+import os
+import time
+
+import pandas as pd
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services import artifacts, metrics, render_pool, stats
+from app.services.artifacts import spool_path
+from app.services.report_listing import norm_key
+from app.services.reports_pdf import compute_filename
+from app.services.roster_ingest import stream_roster
+from app.services.roster_validation import check_roster
+from app.services.selection import (
+    DEFAULT_STRATEGY,
+    SelectionResult,
+    make_strategy,
+    select_per_department,
+)
+from app.services.selection_history import recent_picks, record_selections
+
+IST = ZoneInfo("Asia/Kolkata")
+INGEST_MODE = os.getenv("ROSTER_INGEST", "stream").strip().lower()  # "stream" | "pandas"
+
+REQUIRED_COLUMNS = ["date", "shift", "employee id", "name", "department", "station"]
+
+# Optional normalization so GSD vs long form is treated consistently
+DEPT_ALIASES = {
+    "ground service department (gsd)": "gsd",
+    "ground service department": "gsd",
+    "gsd": "gsd",
+    "flight dispatch": "flight dispatch",
+    "security": "security",
+    "engineering": "engineering",
+}
+
+
+def canon_dept(s: str) -> str:
+    s = (s or "").strip().lower()
+    return DEPT_ALIASES.get(s, s)
+
+
+@dataclass
+class ReportRequest:
+    shift: str
+    station: str
+    department: str
+    percent: int
+    test_type: str = "BA"
+    uploader_name: str = ""  # printed on the PDF
+    uploaded_by: str = ""  # stored on the Report row
+    dayfirst_dates: bool = False  # admin uploads often store Date as dd-mm-yyyy text
+    canonical_departments: bool = False  # treat "GSD" and its long form as equal
+    strategy: str | None = None  # selection strategy name; None = SELECTION_STRATEGY
+    seed: int | None = None  # replay a stored selection seed
+    upload_sha256: str | None = None
+    idempotency_key: str | None = None
+
+
+@dataclass
+class PipelineContext:
+    request: ReportRequest
+    source: BinaryIO
+    db: Session | None = None
+    now: datetime = field(default_factory=lambda: datetime.now(IST))
+
+    # parse
+    frame: pd.DataFrame | None = None
+    columns: dict[str, str] = field(default_factory=dict)
+    # validate
+    clean: pd.DataFrame | None = None  # ["Person Name","Employee ID","Department"]
+    # select
+    recent_picks: dict[str, int] = field(default_factory=dict)  # cooldown history
+    selection: SelectionResult | None = None
+    selected: pd.DataFrame | None = None  # ["Person Name","Employee ID"]
+    # render
+    tmp_path: Path | None = None  # rendered PDF, not yet renamed into place
+    out_name: str | None = None  # download name
+    # persist
+    artifact: models.Artifact | None = None  # stored PDF (shared by identical bytes)
+    out_path: Path | None = None  # its local file; None on remote backends
+    report: models.Report | None = None
+
+    timings: dict[str, float] = field(default_factory=dict)
+    pdf_timings: dict[str, float] = field(default_factory=dict)  # render_rows' own ("build")
+
+    @property
+    def today(self):
+        return self.now.date()
+
+
+Stage = Callable[[PipelineContext], None]
+
+
+# ---------- Stages ----------
+
+def parse_excel(ctx: PipelineContext) -> None:
+    try:
+        df = pd.read_excel(ctx.source)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid Excel: {e}")
+
+    # Normalize headers
+    cols = {c.strip().lower(): c for c in df.columns if isinstance(c, str)}
+    missing = [r for r in REQUIRED_COLUMNS if r not in cols]
+    if missing:
+        raise HTTPException(
+            status_code=400, detail=f"Missing columns in Excel: {', '.join(missing)}"
+        )
+    ctx.frame = df
+    ctx.columns = cols
+
+
+def _department_label(req: ReportRequest) -> str:
+    # Admins pick a department (and get canonical matching); users upload for their own
+    return "the selected department" if req.canonical_departments else "your department"
+
+
+def stream_excel(ctx: PipelineContext) -> None:
+    """Parse + validate in one pass; leaves ``ctx.clean`` ready for selection."""
+    req = ctx.request
+    ctx.clean = stream_roster(
+        ctx.source,
+        today=ctx.today,
+        shift=req.shift,
+        department=req.department,
+        station=req.station,
+        dayfirst=req.dayfirst_dates,
+        canon=canon_dept if req.canonical_departments else None,
+        department_label=_department_label(req),
+    )
+
+
+def skip_stage(ctx: PipelineContext) -> None:
+    pass
+
+
+def validate_roster(ctx: PipelineContext) -> None:
+    req, df, cols = ctx.request, ctx.frame, ctx.columns
+    c_eid, c_name, c_dept = cols["employee id"], cols["name"], cols["department"]
+
+    errors = check_roster(
+        df,
+        cols,
+        today=ctx.today,
+        shift=req.shift,
+        department=req.department,
+        station=req.station,
+        dayfirst=req.dayfirst_dates,
+        canon=canon_dept if req.canonical_departments else None,
+        department_label=_department_label(req),
+    )
+    if errors:
+        raise HTTPException(status_code=400, detail=errors.message())
+
+    # Clean dataframe for selection + rendering
+    ctx.clean = pd.DataFrame(
+        {
+            "Person Name": df[c_name].astype(str).str.strip(),
+            "Employee ID": df[c_eid].astype(str).str.strip(),
+            "Department": df[c_dept].astype(str).str.strip(),
+        }
+    )
+
+
+def select_staff(ctx: PipelineContext) -> None:
+    req, clean = ctx.request, ctx.clean
+    name = (req.strategy or DEFAULT_STRATEGY).strip().lower()
+    if name == "cooldown" and ctx.db is not None and not ctx.recent_picks:
+        ctx.recent_picks = recent_picks(ctx.db, req.station, req.department)
+    strategy = make_strategy(name, recent_picks=ctx.recent_picks)
+    ctx.selection = select_per_department(
+        clean["Department"].to_numpy(),
+        clean["Employee ID"].to_numpy(),
+        req.percent,
+        strategy,
+        seed=req.seed,
+    )
+    ctx.selected = clean.iloc[ctx.selection.positions][
+        ["Person Name", "Employee ID"]
+    ].reset_index(drop=True)
+
+
+def render_kwargs(ctx: PipelineContext) -> dict:
+    """Arguments for ``reports_pdf.render_rows``: plain values and (n, 2) row arrays."""
+    req, clean, selected = ctx.request, ctx.clean, ctx.selected
+    return dict(
+        station=req.station,
+        department=req.department,
+        shift=req.shift,
+        percent=req.percent,
+        uploader_name=req.uploader_name,
+        test_type=req.test_type,
+        full_rows=clean[["Person Name", "Employee ID"]].to_numpy(dtype=object),
+        selected_rows=selected[["Person Name", "Employee ID"]].to_numpy(dtype=object),
+        now=ctx.now,
+    )
+
+
+def output_name(ctx: PipelineContext) -> str:
+    req = ctx.request
+    return compute_filename(ctx.now, req.station, req.shift, req.department, req.test_type)
+
+
+def discard_spool(ctx: PipelineContext) -> None:
+    if ctx.tmp_path is not None:
+        ctx.tmp_path.unlink(missing_ok=True)
+        ctx.tmp_path = None
+
+
+def render_pdf(ctx: PipelineContext) -> None:
+    ctx.tmp_path = spool_path()
+    try:
+        render_pool.render(out=str(ctx.tmp_path), timings=ctx.pdf_timings, **render_kwargs(ctx))
+    except Exception:
+        discard_spool(ctx)
+        raise
+    ctx.out_name = output_name(ctx)
+
+
+def write_pdf(ctx: PipelineContext) -> None:
+    """Hand the spooled PDF to the artifact store (deduplicated by content)."""
+    with metrics.PDF_WRITE_SECONDS.time():
+        ctx.artifact = artifacts.store_file(ctx.db, ctx.tmp_path, ctx.today)
+        ctx.tmp_path = None
+    ctx.out_path = artifacts.store.local_path(ctx.artifact.storage_key)
+
+
+def new_report(ctx: PipelineContext) -> models.Report:
+    req = ctx.request
+    return models.Report(
+        file_name=ctx.out_name,
+        date=ctx.today,
+        shift=req.shift,
+        department=req.department,
+        station=(req.station or "").upper(),
+        shift_key=norm_key(req.shift),
+        department_key=norm_key(req.department),
+        station_key=norm_key(req.station),
+        test_type=(req.test_type or "BA").upper(),
+        percent=req.percent,
+        uploaded_by=req.uploaded_by,
+        total_count=len(ctx.clean),
+        selected_count=len(ctx.selected),
+        selection_strategy=ctx.selection.strategy,
+        selection_seed=ctx.selection.seed_hex,
+        upload_sha256=req.upload_sha256,
+        idempotency_key=req.idempotency_key,
+    )
+
+
+def persist_report(ctx: PipelineContext) -> None:
+    if ctx.db is None:
+        write_pdf(ctx)
+        return
+    rep = new_report(ctx)
+    ctx.db.add(rep)
+    try:
+        # Flush first: assigns rep.id for the selection rows, and a duplicate
+        # idempotency key fails here, before anything is moved into place.
+        ctx.db.flush()
+        write_pdf(ctx)
+        rep.artifact_id = ctx.artifact.id
+        record_selections(ctx.db, rep, ctx.clean.iloc[ctx.selection.positions], ctx.today)
+        stats.bump(ctx.db, rep)
+        with metrics.DB_COMMIT_SECONDS.time(op="report"):
+            ctx.db.commit()
+    except Exception:
+        discard_spool(ctx)
+        raise
+    stats.invalidate()
+    ctx.db.refresh(rep)
+    ctx.report = rep
+
+
+# ---------- Engine ----------
+
+class ReportPipeline:
+    STAGES = ("parse", "validate", "select", "render", "persist")
+
+    def __init__(self, stages: dict[str, Stage] | None = None):
+        self.stages: dict[str, Stage] = {
+            "parse": parse_excel,
+            "validate": validate_roster,
+            "select": select_staff,
+            "render": render_pdf,
+            "persist": persist_report,
+        }
+        for name, fn in (stages or {}).items():
+            self._check(name)
+            self.stages[name] = fn
+
+    def _check(self, name: str) -> None:
+        if name not in self.STAGES:
+            raise KeyError(f"Unknown pipeline stage: {name}")
+
+    def replace(self, name: str, fn: Stage) -> "ReportPipeline":
+        """Return a copy of this pipeline with one stage swapped out."""
+        self._check(name)
+        return ReportPipeline({**self.stages, name: fn})
+
+    def run(
+        self,
+        ctx: PipelineContext,
+        *,
+        start: str | None = None,
+        stop: str | None = None,
+    ) -> PipelineContext:
+        """Run stages in order; ``start``/``stop`` (inclusive) bound the range."""
+        names = list(self.STAGES)
+        lo = names.index(start) if start else 0
+        hi = names.index(stop) + 1 if stop else len(names)
+        for name in names[lo:hi]:
+            t0 = time.perf_counter()
+            try:
+                self.stages[name](ctx)
+            finally:
+                ctx.timings[name] = time.perf_counter() - t0
+        return ctx
+
+
+default_pipeline = ReportPipeline()
+streaming_pipeline = default_pipeline.replace("parse", stream_excel).replace(
+    "validate", skip_stage
+)
+
+
+def pipeline_for(filename: str | None) -> ReportPipeline:
+    # openpyxl can't read legacy .xls, so those always go through pandas
+    if INGEST_MODE == "stream" and (filename or "").lower().endswith(".xlsx"):
+        return streaming_pipeline
+    return default_pipeline
+
+
+def generate(
+    request: ReportRequest,
+    source: BinaryIO,
+    db: Session | None,
+    pipeline: ReportPipeline | None = None,
+    filename: str | None = None,
+) -> PipelineContext:
+    ctx = PipelineContext(request=request, source=source, db=db)
+    try:
+        return (pipeline or pipeline_for(filename)).run(ctx)
+    finally:
+        metrics.observe_stages("single", ctx.timings)
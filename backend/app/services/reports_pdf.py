@@ -1,156 +1,288 @@
-# app/services/reports_pdf.py                                   # NEW FILE
-from pathlib import Path  # NEW
-from datetime import datetime  # NEW
-from zoneinfo import ZoneInfo  # NEW
-import io, re  # NEW
-import pandas as pd  # NEW
-
-from reportlab.lib.pagesizes import A4  # NEW
-from reportlab.lib import colors  # NEW
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Spacer  # NEW
-from reportlab.lib.units import mm  # NEW
-
-IST = ZoneInfo("Asia/Kolkata")  # NEW
-LOGO_PATH = Path("assets/AlhindairLogo.png")  # NEW
-
-_SHIFT_CODE = {  # NEW
+# app/services/reports_pdf.py
+from functools import lru_cache
+from pathlib import Path
+from datetime import datetime, timedelta
+from typing import BinaryIO, Sequence
+from zoneinfo import ZoneInfo
+import io, math, re, time
+import numpy as np
+import pandas as pd
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib import colors
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Spacer
+from reportlab.lib.units import mm
+
+IST = ZoneInfo("Asia/Kolkata")
+# Relative to the package, not the cwd (the benchmark and CLIs chdir)
+LOGO_PATH = Path(__file__).resolve().parents[2] / "assets" / "AlhindairLogo.png"
+
+_SHIFT_CODE = {
     "DAY": "D",
-    "NIGHT": "N",  # NEW
+    "NIGHT": "N",
     "MORNING": "M",
     "EVENING": "E",
-    "AFTERNOON": "A",  # NEW
-}  # NEW
+    "AFTERNOON": "A",
+}
 
 
-def _shift_token(s: str) -> str:  # NEW
-    key = (s or "").strip().upper()  # NEW
-    return _SHIFT_CODE.get(key, key[:1] or "D")  # NEW
+def _shift_token(s: str) -> str:
+    key = (s or "").strip().upper()
+    return _SHIFT_CODE.get(key, key[:1] or "D")
 
 
-def _dept_token(s: str) -> str:  # NEW
-    return re.sub(r"[^A-Za-z0-9]", "", (s or "").upper()) or "DEPT"  # NEW
+def _dept_token(s: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]", "", (s or "").upper()) or "DEPT"
 
 
 def compute_filename(
     dt: datetime, station: str, shift: str, department: str, test_type: str
-) -> str:  # NEW
-    return f'{dt.strftime("%d%m%Y")}_{(station or "").upper()}_{_shift_token(shift)}_{_dept_token(department)}_{(test_type or "BA").upper()}.pdf'  # NEW
-
-
-def build_randomiser_pdf(  # NEW
-    *,  # NEW
-    station: str,  # NEW
-    department: str,  # NEW
-    shift: str,  # NEW
-    percent: int,  # NEW
-    uploader_name: str,  # NEW
-    test_type: str = "BA",  # NEW
-    full_df: pd.DataFrame,  # NEW  # ["Person Name","Employee ID"]
-    selected_df: pd.DataFrame,  # NEW  # ["Person Name","Employee ID"]
-):  # NEW
-    """Return (pdf_bytes, out_filename)."""  # NEW
-    now_ist = datetime.now(IST)  # NEW
-    out_name = compute_filename(now_ist, station, shift, department, test_type)  # NEW
-
-    buff = io.BytesIO()  # NEW
-
-    def _draw_header(canv, doc):  # NEW
-        W, H = A4  # NEW
-        if LOGO_PATH.exists():  # NEW
+) -> str:
+    return f'{dt.strftime("%d%m%Y")}_{(station or "").upper()}_{_shift_token(shift)}_{_dept_token(department)}_{(test_type or "BA").upper()}.pdf'
+
+
+# Styles are immutable once built, so every document shares these
+META_STYLE = TableStyle(
+    [
+        ("BOX", (0, 0), (-1, -1), 0.8, colors.black),
+        ("INNERGRID", (0, 0), (-1, -1), 0.5, colors.black),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ("ALIGN", (0, 0), (-1, 0), "CENTER"),
+        ("ALIGN", (0, 1), (-1, 1), "CENTER"),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("FONTNAME", (0, 1), (-1, 1), "Helvetica"),
+        ("FONTSIZE", (0, 0), (-1, -1), 9),
+        ("TOPPADDING", (0, 0), (-1, -1), 4),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
+    ]
+)
+
+STAFF_STYLE = TableStyle(
+    [
+        ("BOX", (0, 0), (-1, -1), 0.8, colors.black),
+        ("INNERGRID", (0, 1), (-1, -1), 0.4, colors.black),
+        # Titles
+        ("SPAN", (0, 0), (1, 0)),
+        ("SPAN", (2, 0), (3, 0)),
+        ("ALIGN", (0, 0), (3, 0), "CENTER"),
+        ("FONTNAME", (0, 0), (3, 0), "Helvetica-Bold"),
+        ("FONTSIZE", (0, 0), (3, 0), 10),
+        # Column headers
+        ("BACKGROUND", (0, 1), (3, 1), colors.whitesmoke),
+        ("FONTNAME", (0, 1), (3, 1), "Helvetica-Bold"),
+        ("ALIGN", (0, 1), (3, 1), "CENTER"),
+        # Body
+        ("FONTNAME", (0, 2), (3, -1), "Helvetica"),
+        ("VALIGN", (0, 0), (3, -1), "MIDDLE"),
+        ("TOPPADDING", (0, 0), (3, -1), 3),
+        ("BOTTOMPADDING", (0, 0), (3, -1), 3),
+    ]
+)
+
+
+STAFF_HEADER = [
+    ["Upload Staff Data", "", "Selected Staff Data", ""],
+    ["Person Name", "Employee ID", "Person Name", "Employee ID"],
+]
+# Helvetica 10 on 12pt leading + 3pt padding above and below; fixed so
+# ReportLab never measures body cells
+STAFF_ROW_HEIGHT = 18
+FRAME_PADDING = 6  # SimpleDocTemplate's frame insets every side by 6pt
+SPACER = 10
+
+
+@lru_cache(maxsize=1)
+def _logo() -> ImageReader | None:
+    # Decoded once per process; drawImage reuses the reader on every page
+    return ImageReader(str(LOGO_PATH)) if LOGO_PATH.exists() else None
+
+
+def warm() -> None:
+    """Pay one-off costs (logo decode, font metrics) before the first report."""
+    logo = _logo()
+    if logo is not None:
+        logo.getRGBData()
+    render_rows(
+        station="", department="", shift="", percent=0, uploader_name="",
+        full_rows=[("", "")], selected_rows=[],
+    )
+
+
+def build_randomiser_pdf(
+    *,
+    station: str,
+    department: str,
+    shift: str,
+    percent: int,
+    uploader_name: str,
+    test_type: str = "BA",
+    full_df: pd.DataFrame,  # ["Person Name","Employee ID"]
+    selected_df: pd.DataFrame,  # ["Person Name","Employee ID"]
+    now: datetime | None = None,
+):
+    """Return (pdf_bytes, out_filename)."""
+    now_ist = now or datetime.now(IST)
+    pdf = render_rows(
+        station=station,
+        department=department,
+        shift=shift,
+        percent=percent,
+        uploader_name=uploader_name,
+        test_type=test_type,
+        full_rows=full_df[["Person Name", "Employee ID"]].to_numpy(dtype=object),
+        selected_rows=selected_df[["Person Name", "Employee ID"]].to_numpy(dtype=object),
+        now=now_ist,
+    )
+    return pdf, compute_filename(now_ist, station, shift, department, test_type)
+
+
+def staff_body(
+    full_rows: Sequence[Sequence[str]] | np.ndarray,
+    selected_rows: Sequence[Sequence[str]] | np.ndarray,
+) -> list[list[str]]:
+    """Upload and selected rows side by side; the shorter side padded with ""."""
+    full = np.asarray(full_rows, dtype=object).reshape(-1, 2)
+    sel = np.asarray(selected_rows, dtype=object).reshape(-1, 2)
+    cells = np.full((max(len(full), len(sel)), 4), "", dtype=object)
+    cells[: len(full), :2] = full
+    cells[: len(sel), 2:] = sel
+    return cells.tolist()
+
+
+def _staff_tables(body: list[list[str]], first: int, per_page: int, col_widths) -> list[Table]:
+    """The staff table as one Table per page: ``first`` rows, then ``per_page``.
+
+    Each chunk is small and already sized (colWidths/rowHeights), so
+    layout cost per page is constant instead of ReportLab re-splitting one
+    huge Table. repeatRows keeps the headers if a chunk still has to split.
+    """
+    chunks = [body[:first]] + [
+        body[i : i + per_page] for i in range(first, len(body), per_page)
+    ]
+    tables = []
+    for rows in chunks:
+        t = Table(
+            STAFF_HEADER + rows,
+            colWidths=col_widths,
+            rowHeights=STAFF_ROW_HEIGHT,
+            hAlign="LEFT",
+            repeatRows=2,
+        )
+        t.setStyle(STAFF_STYLE)
+        tables.append(t)
+    return tables
+
+
+def _pin_dates(canv, now: datetime) -> None:
+    """Stamp CreationDate/ModDate with the report time instead of 2000-01-01.
+
+    Invariant mode fixes the document timestamp; overwriting it with ``now``
+    keeps the metadata truthful and the output still depends only on inputs.
+    """
+    ts = canv._doc._timeStamp
+    offset = int((now.utcoffset() or timedelta(0)).total_seconds()) // 60
+    ts.YMDhms = now.timetuple()[:6]
+    ts.dhh, ts.dmm = divmod(offset, 60)
+
+
+def render_rows(
+    *,
+    station: str,
+    department: str,
+    shift: str,
+    percent: int,
+    uploader_name: str,
+    test_type: str = "BA",
+    full_rows: Sequence[Sequence[str]] | np.ndarray,  # (name, employee id) rows
+    selected_rows: Sequence[Sequence[str]] | np.ndarray,  # (name, employee id) rows
+    now: datetime | None = None,
+    out: str | Path | BinaryIO | None = None,
+    timings: dict[str, float] | None = None,
+) -> bytes | None:
+    """Render the report from plain row lists; cheap to ship to a worker.
+
+    With ``out`` (a path or file) the PDF is written there and nothing is
+    returned, so large reports never exist as one bytes object. A
+    ``timings`` dict gets the ``doc.build`` time under ``"build"``.
+    """
+    now_ist = now or datetime.now(IST)
+    test_tok = (test_type or "BA").upper()
+    station_tok = (station or "").upper()
+    logo = _logo()
+
+    buff = io.BytesIO() if out is None else out
+
+    def _draw_header(canv, doc):
+        W, H = A4
+        if logo is not None:
             canv.drawImage(
-                str(LOGO_PATH),
+                logo,
                 20 * mm,
-                H - 35 * mm,
-                width=45 * mm,
-                height=18 * mm,  # NEW
+                H - 30 * mm,
+                width=42 * mm,
+                height=17 * mm,
                 preserveAspectRatio=True,
                 mask="auto",
-            )  # NEW
-        canv.setFont("Helvetica-Bold", 30)  # NEW
-        canv.drawString(
-            75 * mm, H - 28 * mm, f"Randomiser for {(test_type or 'BA').upper()}"
-        )  # NEW
-
-    doc = SimpleDocTemplate(  # NEW
-        buff,
-        pagesize=A4,  # NEW
+            )
+        canv.setFont("Helvetica-Bold", 26)
+        canv.drawString(78 * mm, H - 22 * mm, f"Randomiser for {test_tok}")
+
+    def _first_page(canv, doc):
+        _pin_dates(canv, now_ist)
+        _draw_header(canv, doc)
+
+    # Extra top margin so meta table doesn't collide with header.
+    # Invariant mode drops the wall-clock dates and the random /ID, so the
+    # same inputs give the same bytes and the artifact store can dedup them.
+    doc = SimpleDocTemplate(
+        str(buff) if isinstance(buff, Path) else buff,
+        pagesize=A4,
         leftMargin=20 * mm,
         rightMargin=20 * mm,
-        topMargin=35 * mm,
-        bottomMargin=18 * mm,  # NEW
-    )  # NEW
+        topMargin=38 * mm,
+        bottomMargin=18 * mm,
+        invariant=1,
+        title=f"Randomiser for {test_tok}",
+        creator="Randomiser",
+    )
 
-    meta_table = Table(
+    W = doc.width
+
+    # 1) META TABLE (two rows, 6 equal columns)
+    meta_data = [
+        ["Date & Time", "Station", "Department", "Shift", "Percentage", "User name"],
         [
-            [  # NEW
-                "Date & time",
-                now_ist.strftime("%d.%m.%Y %H:%M:%S"),  # NEW
-                "Station",
-                (station or "").upper(),  # NEW
-                "Department",
-                department,  # NEW
-                "Shift",
-                shift,  # NEW
-                "Percentage",
-                f"{percent}%",  # NEW
-                "User name",
-                uploader_name,  # NEW
-            ]
+            now_ist.strftime("%d-%m-%Y  %H:%M"),
+            station_tok,
+            department,
+            shift,
+            f"{percent}%",
+            uploader_name,
         ],
-        colWidths=[70, 90, 55, 60, 65, 90, 35, 50, 70, 90],
-    )  # NEW
-    meta_table.setStyle(
-        TableStyle(
-            [  # NEW
-                ("BOX", (0, 0), (-1, -1), 0.8, colors.black),  # NEW
-                ("INNERGRID", (0, 0), (-1, -1), 0.5, colors.black),  # NEW
-                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),  # NEW
-                ("FONTNAME", (0, 0), (-1, -1), "Helvetica"),  # NEW
-                ("FONTSIZE", (0, 0), (-1, -1), 8),  # NEW
-            ]
-        )
-    )  # NEW
-
-    def _mk_tbl(data):  # NEW
-        t = Table(data, colWidths=[170, 90])  # NEW
-        t.setStyle(
-            TableStyle(
-                [  # NEW
-                    ("BOX", (0, 0), (-1, -1), 0.8, colors.black),  # NEW
-                    ("INNERGRID", (0, 0), (-1, -1), 0.4, colors.black),  # NEW
-                    ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),  # NEW
-                    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),  # NEW
-                    ("FONTSIZE", (0, 0), (-1, -1), 9),  # NEW
-                ]
-            )
-        )  # NEW
-        return t  # NEW
-
-    left_data = [["Person Name", "Employee ID"]] + full_df[
-        ["Person Name", "Employee ID"]
-    ].values.tolist()  # NEW
-    right_data = [["Person Name", "Employee ID"]] + selected_df[
-        ["Person Name", "Employee ID"]
-    ].values.tolist()  # NEW
-
-    title_row = Table(
-        [["Upload Staff Data", "", "Selected Staff Data"]], colWidths=[260, 20, 260]
-    )  # NEW
-    title_row.setStyle(
-        TableStyle(
-            [  # NEW
-                ("FONTNAME", (0, 0), (-1, -1), "Helvetica-Bold"),  # NEW
-                ("FONTSIZE", (0, 0), (-1, -1), 10),  # NEW
-                ("ALIGN", (0, 0), (-1, -1), "CENTER"),  # NEW
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 6),  # NEW
-            ]
-        )
-    )  # NEW
+    ]
+    meta_table = Table(meta_data, colWidths=[W / 6.0] * 6, hAlign="LEFT")
+    meta_table.setStyle(META_STYLE)
+
+    # 2) STAFF TABLE: upload and selected side by side, headers on every page
+    body = staff_body(full_rows, selected_rows)
+
+    # Column widths: split width in half; inside each half 62% / 38%
+    half = W / 2.0
+    col_widths = [0.62 * half, 0.38 * half, 0.62 * half, 0.38 * half]
 
-    left_tbl, right_tbl = _mk_tbl(left_data), _mk_tbl(right_data)  # NEW
-    two_col = Table([[left_tbl, right_tbl]], colWidths=[260, 260])  # NEW
+    # Rows per page from the frame height, so every chunk fills one page
+    frame_h = doc.height - 2 * FRAME_PADDING
+    _, meta_h = meta_table.wrap(W, frame_h)
+    header_h = len(STAFF_HEADER) * STAFF_ROW_HEIGHT
+    per_page = max(1, math.floor((frame_h - header_h) / STAFF_ROW_HEIGHT))
+    first = max(1, math.floor((frame_h - meta_h - SPACER - header_h) / STAFF_ROW_HEIGHT))
 
-    story = [meta_table, Spacer(1, 10), title_row, two_col]  # NEW
-    doc.build(story, onFirstPage=_draw_header, onLaterPages=_draw_header)  # NEW
+    story = [meta_table, Spacer(1, SPACER)]
+    story += _staff_tables(body, first, per_page, col_widths)
+    t0 = time.perf_counter()
+    doc.build(story, onFirstPage=_first_page, onLaterPages=_draw_header)
+    if timings is not None:
+        timings["build"] = time.perf_counter() - t0
 
-    return buff.getvalue(), out_name  # NEW
+    return buff.getvalue() if out is None else None
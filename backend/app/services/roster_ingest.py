@@ -0,0 +1,172 @@
+# app/services/roster_ingest.py
+"""Constant-memory roster ingestion for .xlsx uploads.
+
+Rows are pulled one at a time from openpyxl's read-only reader, checked
+against the selected Date/Shift/Department/Station as they arrive (first
+mismatch aborts the upload), and only Name/Employee ID/Department are kept.
+"""
+from datetime import date, datetime
+from typing import BinaryIO, Callable
+
+import pandas as pd
+from fastapi import HTTPException
+from openpyxl import load_workbook
+
+REQUIRED_COLUMNS = ["date", "shift", "employee id", "name", "department", "station"]
+
+
+def _text(v) -> str:
+    return "" if v is None else str(v).strip()
+
+
+def parse_date(v, dayfirst: bool) -> date | None:
+    if isinstance(v, datetime):
+        return v.date()
+    if isinstance(v, date):
+        return v
+    try:
+        ts = pd.to_datetime(_text(v), dayfirst=dayfirst)
+    except (ValueError, TypeError, OverflowError):
+        return None
+    return None if pd.isna(ts) else ts.date()
+
+
+class _Check:
+    """Per-column matcher memoised on the raw cell value.
+
+    Rosters repeat the same handful of values in every row, so each distinct
+    value is normalised once and later rows are a dict lookup.
+    """
+
+    def __init__(self, ok: Callable[[object], bool]):
+        self._ok = ok
+        self._seen: dict[object, bool] = {}
+
+    def __call__(self, v) -> bool:
+        try:
+            return self._seen[v]
+        except KeyError:
+            res = self._seen[v] = self._ok(v)
+            return res
+        except TypeError:  # unhashable cell value
+            return self._ok(v)
+
+
+def stream_roster(
+    source: BinaryIO,
+    *,
+    today: date,
+    shift: str,
+    department: str,
+    station: str,
+    dayfirst: bool = False,
+    canon: Callable[[str], str] | None = None,
+    department_label: str = "the selected department",
+) -> pd.DataFrame:
+    """Validate an .xlsx roster row by row and return the clean frame.
+
+    Columns of the result: "Person Name", "Employee ID", "Department".
+    """
+    try:
+        wb = load_workbook(source, read_only=True, data_only=True)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid Excel: {e}")
+
+    try:
+        # First sheet, like pd.read_excel -- not whichever tab was left active
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None) or ()
+        cols = {
+            c.strip().lower(): i for i, c in enumerate(header) if isinstance(c, str)
+        }
+        missing = [r for r in REQUIRED_COLUMNS if r not in cols]
+        if missing:
+            raise HTTPException(
+                status_code=400, detail=f"Missing columns in Excel: {', '.join(missing)}"
+            )
+        i_date, i_shift = cols["date"], cols["shift"]
+        i_eid, i_name = cols["employee id"], cols["name"]
+        i_dept, i_stat = cols["department"], cols["station"]
+        width = max(cols.values()) + 1
+
+        want_dept = canon(department) if canon else (department or "").strip().lower()
+        checks = [
+            (i_date, _Check(lambda v: parse_date(v, dayfirst) == today),
+             f"Excel Date must be {today.isoformat()} (IST)"),
+            (i_shift, _Check(lambda v: _text(v).lower() == (shift or "").lower()),
+             "Excel 'Shift' does not match the selected shift"),
+            (i_dept, _Check(
+                (lambda v: canon(_text(v)) == want_dept) if canon
+                else (lambda v: _text(v).lower() == want_dept)),
+             f"Excel 'Department' does not match {department_label}"),
+            (i_stat, _Check(lambda v: _text(v).lower() == (station or "").lower()),
+             "Excel 'Station' does not match the selected station"),
+        ]
+
+        names: list[str] = []
+        eids: list[str] = []
+        depts: list[str] = []
+        for row_no, row in enumerate(rows, start=2):
+            if len(row) < width:
+                row = tuple(row) + (None,) * (width - len(row))
+            if all(v is None for v in row):
+                continue
+            for idx, check, msg in checks:
+                if not check(row[idx]):
+                    raise HTTPException(status_code=400, detail=f"{msg} (row {row_no})")
+            names.append(_text(row[i_name]))
+            eids.append(_text(row[i_eid]))
+            depts.append(_text(row[i_dept]))
+    finally:
+        wb.close()
+
+    return pd.DataFrame(
+        {"Person Name": names, "Employee ID": eids, "Department": depts}
+    )
+
+
+def read_workbook(source: BinaryIO) -> pd.DataFrame:
+    """Stream every sheet of a multi-department workbook into one frame.
+
+    Sheets without the required headers are skipped; the result has one
+    column per ``REQUIRED_COLUMNS`` entry (Date kept as the raw cell value)
+    plus "sheet" and "row" for error reporting.
+    """
+    try:
+        wb = load_workbook(source, read_only=True, data_only=True)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid Excel: {e}")
+
+    out: dict[str, list] = {c: [] for c in REQUIRED_COLUMNS + ["sheet", "row"]}
+    used = 0
+    try:
+        for ws in wb.worksheets:
+            rows = ws.iter_rows(values_only=True)
+            header = next(rows, None) or ()
+            cols = {
+                c.strip().lower(): i for i, c in enumerate(header) if isinstance(c, str)
+            }
+            if any(r not in cols for r in REQUIRED_COLUMNS):
+                continue
+            used += 1
+            idx = [cols[r] for r in REQUIRED_COLUMNS]
+            width = max(idx) + 1
+            for row_no, row in enumerate(rows, start=2):
+                if len(row) < width:
+                    row = tuple(row) + (None,) * (width - len(row))
+                if all(v is None for v in row):
+                    continue
+                out["date"].append(row[idx[0]])
+                for name, i in zip(REQUIRED_COLUMNS[1:], idx[1:]):
+                    out[name].append(_text(row[i]))
+                out["sheet"].append(ws.title)
+                out["row"].append(row_no)
+    finally:
+        wb.close()
+
+    if not used:
+        raise HTTPException(
+            status_code=400,
+            detail=f"No sheet has all required columns: {', '.join(REQUIRED_COLUMNS)}",
+        )
+    return pd.DataFrame(out)
@@ -0,0 +1,156 @@
+# app/services/roster_validation.py
+"""Single-pass validation of an uploaded roster DataFrame.
+
+Each key column is factorised once into integer codes; normalisation and
+comparison run over the (few) distinct values only and are broadcast back
+to rows through the codes. All constraints are evaluated together, so the
+uploader gets every offending row, not just the first failing check.
+"""
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Callable, Sequence
+
+import numpy as np
+import pandas as pd
+
+from app.services.roster_ingest import parse_date
+
+MAX_ROWS_IN_MESSAGE = 10
+
+
+@dataclass
+class RosterErrors:
+    # constraint message -> 0-based row positions in the DataFrame
+    rows: dict[str, np.ndarray] = field(default_factory=dict)
+    # optional display label per position (e.g. "Sheet2!14" for workbooks)
+    labels: Sequence[str] | None = None
+
+    def __bool__(self) -> bool:
+        return any(len(v) for v in self.rows.values())
+
+    def excel_rows(self, msg: str) -> list[int]:
+        # +2: one for the header row, one for 1-based numbering
+        return (self.rows[msg] + 2).tolist()
+
+    def message(self) -> str:
+        parts = []
+        for msg, pos in self.rows.items():
+            if not len(pos):
+                continue
+            if self.labels is not None:
+                shown = ", ".join(self.labels[p] for p in pos[:MAX_ROWS_IN_MESSAGE])
+            else:
+                shown = ", ".join(str(r) for r in self.excel_rows(msg)[:MAX_ROWS_IN_MESSAGE])
+            more = len(pos) - MAX_ROWS_IN_MESSAGE
+            label = "row" if len(pos) == 1 else "rows"
+            parts.append(f"{msg} ({label} {shown}{f' +{more} more' if more > 0 else ''})")
+        return "; ".join(parts)
+
+
+def _broadcast(series: pd.Series, *checks: Callable[[object], bool]) -> list[np.ndarray]:
+    """Row masks of each ``check(value)``, evaluated once per distinct value.
+
+    Missing cells (code -1) fail every check.
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    masks = []
+    for ok in checks:
+        ok_u = np.fromiter((ok(u) for u in uniques), dtype=bool, count=len(uniques))
+        masks.append(np.append(ok_u, False)[codes])
+    return masks
+
+
+def _norm(v) -> str:
+    return str(v).strip().lower()
+
+
+def check_roster(
+    df: pd.DataFrame,
+    cols: dict[str, str],
+    *,
+    today: date,
+    shift: str,
+    department: str,
+    station: str,
+    dayfirst: bool = False,
+    canon: Callable[[str], str] | None = None,
+    department_label: str = "the selected department",
+) -> RosterErrors:
+    want_shift = (shift or "").lower()
+    want_station = (station or "").lower()
+    want_dept = canon(department) if canon else (department or "").lower()
+
+    parsed: dict[object, date | None] = {}
+
+    def _date_ok(v) -> bool:
+        parsed[v] = parse_date(v, dayfirst)
+        return parsed[v] is not None
+
+    date_parsed, date_today = _broadcast(
+        df[cols["date"]], _date_ok, lambda v: parsed[v] == today
+    )
+    (shift_ok,) = _broadcast(df[cols["shift"]], lambda v: _norm(v) == want_shift)
+    (dept_ok,) = _broadcast(
+        df[cols["department"]],
+        (lambda v: canon(str(v)) == want_dept) if canon
+        else (lambda v: _norm(v) == want_dept),
+    )
+    (station_ok,) = _broadcast(df[cols["station"]], lambda v: _norm(v) == want_station)
+
+    bad = np.column_stack(
+        [
+            ~date_parsed,
+            date_parsed & ~date_today,
+            ~shift_ok,
+            ~dept_ok,
+            ~station_ok,
+        ]
+    )
+    messages = [
+        "Excel 'Date' has invalid rows" if dayfirst else "Excel 'Date' column cannot be parsed",
+        f"Excel Date must be {today.isoformat()} (IST)",
+        "Excel 'Shift' does not match the selected shift",
+        f"Excel 'Department' does not match {department_label}",
+        "Excel 'Station' does not match the selected station",
+    ]
+    errors = RosterErrors()
+    if bad.any():
+        for j, msg in enumerate(messages):
+            errors.rows[msg] = np.flatnonzero(bad[:, j])
+    return errors
+
+
+def check_workbook(frame: pd.DataFrame, *, today: date, dayfirst: bool = True) -> RosterErrors:
+    """Checks for a multi-department workbook from ``roster_ingest.read_workbook``.
+
+    Every row must carry today's date and a non-blank shift, department,
+    station and employee id; grouping decides which report a row lands in.
+    """
+    parsed: dict[object, date | None] = {}
+
+    def _date_ok(v) -> bool:
+        parsed[v] = parse_date(v, dayfirst)
+        return parsed[v] is not None
+
+    date_parsed, date_today = _broadcast(
+        frame["date"], _date_ok, lambda v: parsed[v] == today
+    )
+    checks = [
+        ("Excel 'Date' has invalid rows", ~date_parsed),
+        (f"Excel Date must be {today.isoformat()} (IST)", date_parsed & ~date_today),
+    ]
+    for col, label in (
+        ("shift", "Shift"),
+        ("department", "Department"),
+        ("station", "Station"),
+        ("employee id", "Employee ID"),
+    ):
+        checks.append((f"Excel '{label}' is blank", (frame[col] == "").to_numpy()))
+
+    errors = RosterErrors()
+    for msg, mask in checks:
+        if mask.any():
+            errors.rows[msg] = np.flatnonzero(mask)
+    if errors:
+        errors.labels = [f"{s}!{r}" for s, r in zip(frame["sheet"], frame["row"])]
+    return errors
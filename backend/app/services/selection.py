@@ -0,0 +1,135 @@
+# app/services/selection.py
+"""Per-department random selection.
+
+Strategies only decide *weights*; the engine does the sampling with NumPy's
+``Generator.choice`` over row-index arrays, one call per department. Every
+run draws a fresh 128-bit seed (or takes one for replay) and reports it.
+
+A uniform selection is reproduced exactly from the stored seed and roster.
+A cooldown selection also depends on the pick history at the time it ran,
+which later reports change, so its seed alone doesn't replay it.
+"""
+from dataclasses import dataclass
+from typing import Callable, Mapping, Protocol
+import math
+import os
+import secrets
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_STRATEGY = os.getenv("SELECTION_STRATEGY", "uniform").strip().lower()
+COOLDOWN_REPORTS = int(os.getenv("SELECTION_COOLDOWN_REPORTS", "5"))
+COOLDOWN_FACTOR = float(os.getenv("SELECTION_COOLDOWN_FACTOR", "0.25"))
+
+
+class SelectionStrategy(Protocol):
+    name: str
+
+    def weights(self, employee_ids: np.ndarray) -> np.ndarray | None:
+        """Relative pick weight per row, or None for uniform."""
+        ...
+
+
+class UniformStrategy:
+    name = "uniform"
+
+    def weights(self, employee_ids: np.ndarray) -> np.ndarray | None:
+        return None
+
+
+class CooldownStrategy:
+    """Down-weight staff picked recently: weight = factor ** times_picked.
+
+    ``recent_picks`` maps employee id -> number of times picked in the last
+    ``COOLDOWN_REPORTS`` reports for the same station/department.
+    """
+
+    name = "cooldown"
+
+    def __init__(self, recent_picks: Mapping[str, int] | None = None, factor: float = COOLDOWN_FACTOR):
+        if not 0 < factor <= 1:
+            raise ValueError("cooldown factor must be in (0, 1]")
+        self.recent_picks = dict(recent_picks or {})
+        self.factor = factor
+
+    def weights(self, employee_ids: np.ndarray) -> np.ndarray | None:
+        if not self.recent_picks:
+            return None
+        picks = pd.Series(employee_ids).map(self.recent_picks).fillna(0).to_numpy()
+        return np.power(self.factor, picks)
+
+
+STRATEGIES: dict[str, Callable[..., SelectionStrategy]] = {}
+
+
+def register_strategy(name: str, factory: Callable[..., SelectionStrategy]) -> None:
+    STRATEGIES[name] = factory
+
+
+register_strategy("uniform", lambda **_: UniformStrategy())
+register_strategy("cooldown", lambda recent_picks=None, **_: CooldownStrategy(recent_picks))
+
+# Fail at startup rather than with a 500 on every upload
+if DEFAULT_STRATEGY not in STRATEGIES:
+    raise RuntimeError(
+        f"Unknown SELECTION_STRATEGY {DEFAULT_STRATEGY!r}; expected one of {', '.join(STRATEGIES)}"
+    )
+
+
+def make_strategy(name: str | None = None, **kwargs) -> SelectionStrategy:
+    key = (name or DEFAULT_STRATEGY).strip().lower()
+    try:
+        factory = STRATEGIES[key]
+    except KeyError:
+        raise ValueError(f"Unknown selection strategy: {key}")
+    return factory(**kwargs)
+
+
+@dataclass
+class SelectionResult:
+    positions: np.ndarray  # row positions into the roster, grouped by department
+    seed: int
+    strategy: str
+
+    @property
+    def seed_hex(self) -> str:
+        return f"{self.seed:032x}"
+
+
+def sample_size(n: int, percent: int) -> int:
+    # at least 1 if the department has rows
+    return max(1, math.ceil(n * (percent / 100))) if n > 0 else 0
+
+
+def select_per_department(
+    departments: np.ndarray,
+    employee_ids: np.ndarray,
+    percent: int,
+    strategy: SelectionStrategy | None = None,
+    seed: int | None = None,
+) -> SelectionResult:
+    strategy = strategy or UniformStrategy()
+    seed = secrets.randbits(128) if seed is None else seed
+    rng = np.random.default_rng(seed)
+
+    # sort=True keeps departments in name order, same as groupby
+    codes, _ = pd.factorize(departments, sort=True)
+    order = np.argsort(codes, kind="stable")
+    bounds = np.cumsum(np.bincount(codes[codes >= 0]))[:-1]
+    groups = np.split(order[codes[order] >= 0], bounds)
+    weights = strategy.weights(np.asarray(employee_ids))
+
+    picks = []
+    for idx in groups:
+        k = sample_size(len(idx), percent)
+        if k == 0:
+            continue
+        p = None
+        if weights is not None:
+            w = weights[idx]
+            p = w / w.sum()
+        picks.append(rng.choice(idx, size=k, replace=False, p=p, shuffle=True))
+
+    positions = np.concatenate(picks) if picks else np.empty(0, dtype=np.intp)
+    return SelectionResult(positions=positions, seed=seed, strategy=strategy.name)
@@ -0,0 +1,108 @@
+# app/services/selection_history.py
+"""Reads and writes of the ``selections`` table.
+
+Queries here are shaped to hit the composite indexes on Selection:
+(employee_id, date) for per-person lookups and (station_key,
+department_key, date) for fairness windows. Windows end on today's IST
+date, the day reports are filed under.
+"""
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+from sqlalchemy import desc, func, insert, select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services.report_listing import norm_key
+from app.services.selection import COOLDOWN_REPORTS
+
+IST = ZoneInfo("Asia/Kolkata")
+
+
+def record_selections(
+    db: Session,
+    report: models.Report,
+    picked: pd.DataFrame,  # ["Person Name","Employee ID","Department"]
+    on: date,
+) -> None:
+    """Bulk-insert the picked rows; caller owns the transaction."""
+    if picked.empty:
+        return
+    rows = [
+        {
+            "report_id": report.id,
+            "employee_id": eid,
+            "employee_name": name,
+            "date": on,
+            "station": report.station,
+            "department": report.department,
+            "shift": report.shift,
+            "station_key": report.station_key,
+            "department_key": report.department_key,
+        }
+        for name, eid in zip(picked["Person Name"], picked["Employee ID"])
+    ]
+    db.execute(insert(models.Selection), rows)
+
+
+def recent_picks(
+    db: Session, station: str, department: str, reports: int = COOLDOWN_REPORTS
+) -> dict[str, int]:
+    """employee_id -> times picked in the last ``reports`` reports here."""
+    R = models.Report
+    last_ids = (
+        select(R.id)
+        .where(R.station_key == norm_key(station), R.department_key == norm_key(department))
+        .order_by(desc(R.created_at), desc(R.id))
+        .limit(reports)
+    )
+    ids = db.execute(last_ids).scalars().all()
+    if not ids:
+        return {}
+    S = models.Selection
+    rows = db.execute(
+        select(S.employee_id, func.count())
+        .where(S.report_id.in_(ids))
+        .group_by(S.employee_id)
+    ).all()
+    return {eid: n for eid, n in rows}
+
+
+def employee_history(db: Session, employee_id: str, days: int = 30) -> list[models.Selection]:
+    S = models.Selection
+    since = datetime.now(IST).date() - timedelta(days=days)
+    return (
+        db.execute(
+            select(S)
+            .where(S.employee_id == employee_id, S.date >= since)
+            .order_by(desc(S.date), desc(S.id))
+        )
+        .scalars()
+        .all()
+    )
+
+
+def pick_counts(
+    db: Session, station: str, department: str | None = None, days: int = 30
+) -> list[dict]:
+    """Per-employee pick counts in a station (and department) window."""
+    S = models.Selection
+    since = datetime.now(IST).date() - timedelta(days=days)
+    q = (
+        select(
+            S.employee_id,
+            func.max(S.employee_name),
+            func.count(),
+            func.max(S.date),
+        )
+        .where(S.station_key == norm_key(station), S.date >= since)
+        .group_by(S.employee_id)
+        .order_by(desc(func.count()), S.employee_id)
+    )
+    if department:
+        q = q.where(S.department_key == norm_key(department))
+    return [
+        {"employee_id": eid, "name": name, "picks": n, "last_date": last.isoformat()}
+        for eid, name, n, last in db.execute(q).all()
+    ]
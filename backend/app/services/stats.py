@@ -0,0 +1,197 @@
+# app/services/stats.py
+"""Dashboard statistics from the ``report_stats`` daily rollup.
+
+``bump`` adds one Report to its (date, station, department, shift, test
+type) row inside the caller's transaction, so the rollup never drifts from
+``reports``; the caller calls ``invalidate`` once that has committed.
+Reads group that small table instead of paging reports.
+"""
+from datetime import date
+import os
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services.cache import TTLCache
+from app.services.report_listing import norm_key
+
+STATS_CACHE_SECONDS = float(os.getenv("STATS_CACHE_SECONDS", "30"))
+GROUPS = ("date", "station", "department", "shift", "test_type")
+COUNTERS = ("reports", "total_count", "selected_count")
+
+_cache = TTLCache(STATS_CACHE_SECONDS)
+
+
+def _upsert(db: Session, values: dict):
+    """Native insert-or-add statement, or None where the dialect has none."""
+    S = models.ReportStat
+    adds = {k: values[k] for k in COUNTERS}
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+        stmt = mysql_insert(S).values(**values)
+        return stmt.on_duplicate_key_update(
+            **{k: getattr(S, k) + stmt.inserted[k] for k in adds}
+        )
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+        stmt = sqlite_insert(S).values(**values)
+        return stmt.on_conflict_do_update(
+            index_elements=list(GROUPS),
+            set_={k: getattr(S, k) + stmt.excluded[k] for k in adds},
+        )
+    return None
+
+
+def _update_or_insert(db: Session, values: dict) -> None:
+    """Portable upsert: add to the row, or insert it if there is none yet."""
+    S = models.ReportStat
+    add = (
+        update(S)
+        .where(*(getattr(S, k) == values[k] for k in GROUPS))
+        .values({k: getattr(S, k) + values[k] for k in COUNTERS})
+        .execution_options(synchronize_session=False)
+    )
+    if db.execute(add).rowcount:
+        return
+    try:
+        with db.begin_nested():
+            db.execute(insert(S).values(**values))
+    except IntegrityError:
+        db.execute(add)  # inserted concurrently; the row exists now
+
+
+def bump(db: Session, rep: models.Report) -> None:
+    """Count ``rep`` in its rollup row; caller owns the transaction.
+
+    Call ``invalidate`` after the commit: clearing the cache here would let
+    a concurrent read cache the totals without this report.
+    """
+    values = {
+        "date": rep.date,
+        "station": (rep.station or "").upper(),
+        "department": rep.department_key or norm_key(rep.department),
+        "shift": rep.shift_key or norm_key(rep.shift),
+        "test_type": rep.test_type or "BA",
+        "reports": 1,
+        "total_count": rep.total_count or 0,
+        "selected_count": rep.selected_count or 0,
+    }
+    stmt = _upsert(db, values)
+    if stmt is not None:
+        db.execute(stmt)
+    else:
+        _update_or_insert(db, values)
+
+
+def invalidate() -> None:
+    _cache.clear()
+
+
+def rebuild(db: Session) -> int:
+    """Recompute every rollup row from ``reports``; returns rows written."""
+    R, S = models.Report, models.ReportStat
+    keys = (
+        R.date,
+        func.upper(func.coalesce(R.station, "")),
+        func.coalesce(R.department_key, ""),
+        func.coalesce(R.shift_key, ""),
+        func.coalesce(R.test_type, "BA"),
+    )
+    src = select(
+        *keys,
+        func.count(),
+        func.coalesce(func.sum(R.total_count), 0),
+        func.coalesce(func.sum(R.selected_count), 0),
+    ).group_by(*keys)
+    db.query(S).delete()
+    res = db.execute(
+        insert(S).from_select(
+            [
+                "date", "station", "department", "shift", "test_type",
+                "reports", "total_count", "selected_count",
+            ],
+            src,
+        )
+    )
+    db.commit()
+    _cache.clear()
+    return res.rowcount
+
+
+def summary(
+    db: Session,
+    *,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    station: str | None = None,
+    department: str | None = None,
+    shift: str | None = None,
+    test_type: str | None = None,
+    group_by: tuple[str, ...] = ("date",),
+) -> dict:
+    key = (date_from, date_to, station, department, shift, test_type, group_by)
+    return _cache.get_or_set(
+        key,
+        lambda: _summary(
+            db, date_from, date_to, station, department, shift, test_type, group_by
+        ),
+    )
+
+
+def _ratio(selected: int, total: int) -> float | None:
+    return round(selected / total, 4) if total else None
+
+
+def _summary(db, date_from, date_to, station, department, shift, test_type, group_by):
+    S = models.ReportStat
+    where = []
+    if date_from:
+        where.append(S.date >= date_from)
+    if date_to:
+        where.append(S.date <= date_to)
+    if station:
+        where.append(S.station == station.strip().upper())
+    if department:
+        where.append(S.department == norm_key(department))
+    if shift:
+        where.append(S.shift == norm_key(shift))
+    if test_type:
+        where.append(S.test_type == test_type.strip().upper())
+
+    sums = (
+        func.coalesce(func.sum(S.reports), 0),
+        func.coalesce(func.sum(S.total_count), 0),
+        func.coalesce(func.sum(S.selected_count), 0),
+    )
+    n_reports, total, selected = db.execute(select(*sums).where(*where)).one()
+
+    cols = [getattr(S, g) for g in group_by]
+    rows = []
+    if cols:
+        q = select(*cols, *sums).where(*where).group_by(*cols).order_by(*cols)
+        for r in db.execute(q).all():
+            item = {
+                g: (v.isoformat() if isinstance(v, date) else v)
+                for g, v in zip(group_by, r[: len(cols)])
+            }
+            rep, tot, sel = r[len(cols):]
+            item.update(
+                reports=rep, total_count=tot, selected_count=sel, ratio=_ratio(sel, tot)
+            )
+            rows.append(item)
+
+    return {
+        "totals": {
+            "reports": n_reports,
+            "total_count": total,
+            "selected_count": selected,
+            "ratio": _ratio(selected, total),
+        },
+        "group_by": list(group_by),
+        "rows": rows,
+    }
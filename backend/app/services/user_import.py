@@ -0,0 +1,225 @@
+# app/services/user_import.py
+"""Bulk user import from an HR Excel sheet.
+
+Validation runs column-wise over the whole sheet, existing usernames are
+fetched with chunked IN queries, passwords are bcrypt-hashed in parallel
+on a process pool, and rows are written as chunked upserts (one statement
+and one commit per ``IMPORT_CHUNK`` users).
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import BinaryIO, Callable
+import multiprocessing
+import os
+
+import pandas as pd
+from sqlalchemy import bindparam, insert, select, update
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services import people, reference_cache
+from app.services.auth import pwd_ctx
+
+REQUIRED_COLS = ["Name", "Designation", "Username", "Password", "Emailid", "Phone No", "Station"]
+OPTIONAL_COLS = ["Department"]
+# Sheet column -> users column
+FIELDS = {
+    "Name": "name",
+    "Designation": "designation",
+    "Emailid": "email",
+    "Phone No": "phone",
+    "Station": "station",
+    "Department": "department",
+}
+
+IMPORT_CHUNK = int(os.getenv("IMPORT_CHUNK", "500"))
+IMPORT_HASH_WORKERS = int(os.getenv("IMPORT_HASH_WORKERS", str(os.cpu_count() or 1)))
+
+Progress = Callable[[str, float], None]
+
+
+@dataclass
+class ImportResult:
+    inserted: int = 0
+    updated: int = 0
+    skipped: list[str] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        return {
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "skipped_count": len(self.skipped),
+            "skipped": self.skipped[:100],
+        }
+
+
+def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    # Trim spaces and unify column names just in case
+    df = df.rename(columns={c: str(c).strip() for c in df.columns})
+    missing = [c for c in REQUIRED_COLS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {missing}")
+    return df
+
+
+def _text(s: pd.Series) -> pd.Series:
+    """Stripped strings, None for blanks/NaN (same rules as the old row loop)."""
+    out = s.astype("string").str.strip()
+    keep = (out.notna() & (out != "")).to_numpy(dtype=bool)
+    return pd.Series(out.astype(object).where(keep, None), index=s.index, dtype=object)
+
+
+def validate(df: pd.DataFrame) -> tuple[pd.DataFrame, list[str]]:
+    """Clean rows ready to upsert, plus one message per skipped row."""
+    df = normalize_columns(df)
+    rows = pd.DataFrame(
+        {
+            "row": df.index.to_numpy() + 2,  # Excel row (header is row 1)
+            "username": _text(df["Username"]),
+            "password": _text(df["Password"]),
+        }
+    )
+    for col, attr in FIELDS.items():
+        rows[attr] = _text(df[col]) if col in df.columns else None
+
+    skipped: list[str] = []
+    no_user = rows["username"].isna()
+    skipped += [f"SKIP: row {r} has empty username" for r in rows.loc[no_user, "row"]]
+    no_pwd = ~no_user & rows["password"].isna()
+    skipped += [
+        f"SKIP: {u} has empty password" for u in rows.loc[no_pwd, "username"]
+    ]
+    rows = rows[~(no_user | no_pwd)]
+
+    # Later rows win, as they did when each row was committed in turn
+    dup = rows["username"].duplicated(keep="last")
+    skipped += [
+        f"SKIP: row {r} repeats username {u}"
+        for r, u in zip(rows.loc[dup, "row"], rows.loc[dup, "username"])
+    ]
+    return rows[~dup].reset_index(drop=True), skipped
+
+
+def existing_usernames(db: Session, usernames: list[str], chunk: int = 1000) -> set[str]:
+    found: set[str] = set()
+    for i in range(0, len(usernames), chunk):
+        part = usernames[i : i + chunk]
+        found.update(
+            db.execute(select(models.User.username).where(models.User.username.in_(part)))
+            .scalars()
+            .all()
+        )
+    return found
+
+
+def _hash_chunk(passwords: list[str]) -> list[str]:
+    # Process-pool entry point: one task per chunk keeps pickling cheap
+    return [pwd_ctx.hash(p) for p in passwords]
+
+
+def hash_passwords(passwords: list[str], progress: Progress | None = None) -> list[str]:
+    if not passwords:
+        return []
+    size = max(1, min(64, len(passwords) // (IMPORT_HASH_WORKERS * 4) or 1))
+    chunks = [passwords[i : i + size] for i in range(0, len(passwords), size)]
+    out: list[str] = []
+    with ProcessPoolExecutor(
+        max_workers=IMPORT_HASH_WORKERS, mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        for hashed in pool.map(_hash_chunk, chunks):
+            out.extend(hashed)
+            if progress:
+                progress("hashing", len(out) / len(passwords))
+    return out
+
+
+def _upsert_stmt(db: Session, values: list[dict], update_cols: list[str]):
+    """Native bulk upsert statement, or None where the dialect has none."""
+    U = models.User
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+        stmt = mysql_insert(U).values(values)
+        return stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in update_cols})
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+        stmt = sqlite_insert(U).values(values)
+        return stmt.on_conflict_do_update(
+            index_elements=["username"], set_={c: stmt.excluded[c] for c in update_cols}
+        )
+    return None
+
+
+def _upsert_chunk(db: Session, values: list[dict], update_cols: list[str]) -> None:
+    stmt = _upsert_stmt(db, values, update_cols)
+    if stmt is not None:
+        db.execute(stmt)
+        return
+    # Portable path: one executemany INSERT for new usernames, one UPDATE for the rest
+    users = models.User.__table__
+    have = existing_usernames(db, [v["username"] for v in values])
+    new = [v for v in values if v["username"] not in have]
+    old = [
+        {"match_username": v["username"], **{f"new_{c}": v[c] for c in update_cols}}
+        for v in values
+        if v["username"] in have
+    ]
+    if new:
+        db.execute(insert(users), new)
+    if old:
+        db.execute(
+            update(users)
+            .where(users.c.username == bindparam("match_username"))
+            .values({c: bindparam(f"new_{c}") for c in update_cols}),
+            old,
+        )
+
+
+def import_users(
+    db: Session,
+    df: pd.DataFrame,
+    *,
+    default_role: str = "user",
+    progress: Progress | None = None,
+) -> ImportResult:
+    rows, skipped = validate(df)
+    result = ImportResult(skipped=skipped)
+    if rows.empty:
+        return result
+
+    usernames = rows["username"].tolist()
+    have = existing_usernames(db, usernames)
+    result.updated = sum(u in have for u in usernames)
+    result.inserted = len(usernames) - result.updated
+
+    hashes = hash_passwords(rows["password"].tolist(), progress)
+
+    # Role is only set on insert; updates keep whatever role the user has
+    attrs = [a for c, a in FIELDS.items() if c in REQUIRED_COLS or c in df.columns]
+    update_cols = ["hashed_password", *attrs]
+    for start in range(0, len(rows), IMPORT_CHUNK):
+        part = rows.iloc[start : start + IMPORT_CHUNK]
+        values = [
+            {
+                "username": r.username,
+                "hashed_password": h,
+                "role": default_role,
+                "is_active": True,
+                **{a: getattr(r, a) for a in attrs},
+            }
+            for r, h in zip(part.itertuples(index=False), hashes[start : start + IMPORT_CHUNK])
+        ]
+        _upsert_chunk(db, values, update_cols)
+        people.reindex_users(db, part["username"].tolist())
+        db.commit()
+        if progress:
+            progress("writing", min(1.0, (start + len(part)) / len(rows)))
+
+    reference_cache.invalidate_users()
+    return result
+
+
+def read_sheet(source: str | BinaryIO, sheet: str | int | None = 0) -> pd.DataFrame:
+    return pd.read_excel(source, sheet_name=sheet, engine="openpyxl", dtype=object)
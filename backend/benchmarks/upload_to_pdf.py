@@ -0,0 +1,321 @@
+# benchmarks/upload_to_pdf.py
+"""Benchmark the upload -> PDF hot path through the real HTTP routes.
+
+Synthetic rosters are posted to /api/uploads/generate, /admin-generate and
+/admin-generate-batch with FastAPI's TestClient against a throwaway SQLite
+database. Each case records median wall time, the per-stage timings the
+routes report in ``Server-Timing`` (parse, validate, select, render,
+persist) and the response size. Peak Python heap comes from one extra run
+under tracemalloc, which is far too slow to time with.
+
+Run from ``backend/``:
+
+    python -m benchmarks.upload_to_pdf
+    python -m benchmarks.upload_to_pdf --rows 1000,10000 --departments 1,10
+    python -m benchmarks.upload_to_pdf --save main        # store a baseline
+    python -m benchmarks.upload_to_pdf --compare main     # exit 1 on regression
+
+Single-report routes only accept rows of the requested department, so the
+``--departments`` axis applies to the batch route. Rendering runs inline
+(``RENDER_WORKERS=0``) by default so its memory shows up in the peak;
+pass ``--render-workers N`` to measure the process pool instead.
+"""
+from datetime import date, datetime
+from pathlib import Path
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from zoneinfo import ZoneInfo
+
+from openpyxl import Workbook
+
+BENCH_DIR = Path(__file__).resolve().parent
+BASELINE_DIR = BENCH_DIR / "baselines"
+ROSTER_CACHE = Path(tempfile.gettempdir()) / "randomiser-bench-rosters"
+IST = ZoneInfo("Asia/Kolkata")
+
+ENDPOINTS = ("generate", "admin-generate", "batch")
+STAGES = ("parse", "validate", "select", "render", "persist")
+STATION, SHIFT, DEPARTMENT = "COK", "Day", "Security"
+BENCH_USER = "bench"
+
+
+# ---------- rosters ----------
+
+def roster(rows: int, departments: int, on: date) -> bytes:
+    """Roster workbook for ``on`` (validation rejects other dates), cached on disk."""
+    ROSTER_CACHE.mkdir(parents=True, exist_ok=True)
+    path = ROSTER_CACHE / f"roster_{on:%Y%m%d}_{rows}x{departments}.xlsx"
+    if not path.exists():
+        depts = [DEPARTMENT] if departments == 1 else [
+            f"Dept {i:02d}" for i in range(1, departments + 1)
+        ]
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Roster")
+        ws.append(["Date", "Shift", "Employee ID", "Name", "Department", "Station"])
+        stamp = datetime(on.year, on.month, on.day)
+        for i in range(rows):
+            ws.append([stamp, SHIFT, f"E{i:06d}", f"Person {i}", depts[i % len(depts)], STATION])
+        tmp = path.with_suffix(".part")
+        wb.save(tmp)
+        os.replace(tmp, path)
+    return path.read_bytes()
+
+
+# ---------- app under test ----------
+
+def boot(workdir: Path, render_workers: int):
+    """Import the app against a fresh SQLite file; storage lands in ``workdir``."""
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir / 'bench.db'}"
+    os.environ.setdefault("RENDER_WORKERS", str(render_workers))
+    os.chdir(workdir)  # the artifact store (storage/reports) is relative to cwd
+    sys.path.insert(0, str(BENCH_DIR.parent))
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    client = TestClient(app)
+    client.__enter__()  # run startup (migrations, render pool)
+    return client
+
+
+def seed(client) -> None:
+    from app import models
+    from app.database import SessionLocal
+    from app.services import people
+
+    with SessionLocal() as db:
+        user = models.User(
+            username=BENCH_USER,
+            hashed_password="plain:bench",
+            name="Bench User",
+            department=DEPARTMENT,
+            station=STATION,
+            role="user",
+        )
+        db.add(user)
+        people.reindex(db, "user", user)
+        db.commit()
+
+
+def reset_reports() -> None:
+    """Forget earlier runs so identical uploads aren't served as replays."""
+    from app import models
+    from app.database import SessionLocal
+
+    with SessionLocal() as db:
+        for m in (models.Selection, models.ReportStat, models.Report):
+            db.query(m).delete()
+        db.commit()
+
+
+def server_timing(header: str) -> dict[str, float]:
+    out = {}
+    for part in filter(None, (p.strip() for p in header.split(","))):
+        name, _, dur = part.partition(";dur=")
+        if dur:
+            out[name.strip()] = float(dur)
+    return out
+
+
+def post(client, endpoint: str, body: bytes):
+    files = {"file": ("roster.xlsx", body, "application/octet-stream")}
+    form = {"shift": SHIFT, "station": STATION, "department": DEPARTMENT, "percent": "25"}
+    if endpoint == "generate":
+        return client.post(
+            "/api/uploads/generate", data={**form, "username": BENCH_USER}, files=files
+        )
+    if endpoint == "admin-generate":
+        return client.post("/api/uploads/admin-generate", data=form, files=files)
+    return client.post(
+        "/api/uploads/admin-generate-batch",
+        data={"percent": "25", "output": "manifest"},
+        files=files,
+    )
+
+
+def _checked(endpoint: str, res):
+    if res.status_code != 200:
+        raise SystemExit(f"{endpoint}: HTTP {res.status_code} {res.text[:300]}")
+    return res
+
+
+def measure(client, endpoint: str, body: bytes) -> dict:
+    reset_reports()
+    t0 = time.perf_counter()
+    res = _checked(endpoint, post(client, endpoint, body))
+    wall = time.perf_counter() - t0
+    return {
+        "wall_ms": wall * 1000,
+        "stages_ms": server_timing(res.headers.get("server-timing", "")),
+        "bytes": len(res.content),
+    }
+
+
+def peak_memory(client, endpoint: str, body: bytes) -> float:
+    """Peak traced Python heap for one request, in MiB."""
+    reset_reports()
+    tracemalloc.start()
+    try:
+        _checked(endpoint, post(client, endpoint, body))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 2**20
+
+
+def run_case(
+    client, endpoint: str, rows: int, departments: int, repeat: int, memory: bool
+) -> dict:
+    body = roster(rows, departments, datetime.now(IST).date())
+    runs = [measure(client, endpoint, body) for _ in range(repeat)]
+    stages = sorted({s for r in runs for s in r["stages_ms"]}, key=_stage_order)
+    return {
+        "endpoint": endpoint,
+        "rows": rows,
+        "departments": departments,
+        "repeat": repeat,
+        "wall_ms": statistics.median(r["wall_ms"] for r in runs),
+        "stages_ms": {
+            s: statistics.median(r["stages_ms"].get(s, 0.0) for r in runs) for s in stages
+        },
+        "peak_mb": peak_memory(client, endpoint, body) if memory else None,
+        "bytes": runs[-1]["bytes"],
+    }
+
+
+def _stage_order(name: str) -> int:
+    return STAGES.index(name) if name in STAGES else len(STAGES)
+
+
+# ---------- baselines ----------
+
+def case_key(c: dict) -> str:
+    return f"{c['endpoint']}/{c['rows']}x{c['departments']}"
+
+
+def save(name: str, results: dict) -> Path:
+    BASELINE_DIR.mkdir(parents=True, exist_ok=True)
+    path = BASELINE_DIR / f"{name}.json"
+    path.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+    return path
+
+
+def compare(name: str, results: dict, tolerance: float) -> bool:
+    """Print deltas against a stored baseline; True if nothing regressed."""
+    path = BASELINE_DIR / f"{name}.json"
+    if not path.exists():
+        raise SystemExit(f"No baseline at {path}")
+    base = json.loads(path.read_text())["cases"]
+    ok = True
+    print(f"\nvs {name} ({path.name}), tolerance {tolerance:.0%}")
+    for key, cur in results["cases"].items():
+        old = base.get(key)
+        if old is None:
+            print(f"  {key:32} (not in baseline)")
+            continue
+        metrics = {"wall": (old["wall_ms"], cur["wall_ms"])}
+        metrics.update(
+            (s, (old["stages_ms"].get(s, 0.0), v)) for s, v in cur["stages_ms"].items()
+        )
+        if old.get("peak_mb") and cur.get("peak_mb"):
+            metrics["peak_mb"] = (old["peak_mb"], cur["peak_mb"])
+        parts = []
+        for m, (a, b) in metrics.items():
+            delta = (b - a) / a if a else 0.0
+            # Sub-millisecond stages are noise, not regressions
+            bad = delta > tolerance and (m == "peak_mb" or b - a > 1.0)
+            ok &= not bad
+            parts.append(f"{m} {delta:+.0%}{' !' if bad else ''}")
+        print(f"  {key:32} " + ", ".join(parts))
+    return ok
+
+
+# ---------- report ----------
+
+def print_table(results: dict) -> None:
+    head = f"{'case':32} {'wall ms':>9} " + " ".join(f"{s:>9}" for s in STAGES)
+    print(head + f" {'peak MB':>8} {'PDF KB':>8}")
+    for key, c in results["cases"].items():
+        stages = " ".join(f"{c['stages_ms'].get(s, 0.0):9.1f}" for s in STAGES)
+        peak = f"{c['peak_mb']:8.1f}" if c["peak_mb"] is not None else f"{'-':>8}"
+        print(f"{key:32} {c['wall_ms']:9.1f} {stages} {peak} {c['bytes'] / 1024:8.1f}")
+
+
+def _ints(s: str) -> list[int]:
+    return [int(x) for x in s.split(",") if x.strip()]
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Upload -> PDF benchmark")
+    ap.add_argument("--rows", default="1000,10000,100000", help="Roster sizes (comma list)")
+    ap.add_argument("--departments", default="1,10,50", help="Departments per batch roster")
+    ap.add_argument("--endpoints", default=",".join(ENDPOINTS), help="Routes to drive")
+    ap.add_argument("--repeat", type=int, default=3, help="Runs per case (median reported)")
+    ap.add_argument("--render-workers", type=int, default=0)
+    ap.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc run")
+    ap.add_argument("--save", metavar="NAME", help="Store results as baselines/NAME.json")
+    ap.add_argument("--compare", metavar="NAME", help="Compare against baselines/NAME.json")
+    ap.add_argument("--tolerance", type=float, default=0.10, help="Allowed slowdown (0.10 = 10%%)")
+    ap.add_argument("--keep", action="store_true", help="Keep the work dir (DB, PDFs)")
+    args = ap.parse_args(argv)
+
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    unknown = [e for e in endpoints if e not in ENDPOINTS]
+    if unknown:
+        ap.error(f"unknown endpoints {unknown}; choose from {', '.join(ENDPOINTS)}")
+
+    cwd = Path.cwd()
+    workdir = Path(tempfile.mkdtemp(prefix="randomiser-bench-"))
+    client = boot(workdir, args.render_workers)
+    try:
+        seed(client)
+        # Warm-up: imports, render pool start-up, first-query costs
+        measure(client, "admin-generate", roster(100, 1, datetime.now(IST).date()))
+
+        cases = {}
+        for endpoint in endpoints:
+            for rows in _ints(args.rows):
+                for depts in _ints(args.departments) if endpoint == "batch" else [1]:
+                    c = run_case(
+                        client, endpoint, rows, depts, args.repeat, not args.no_memory
+                    )
+                    cases[case_key(c)] = c
+                    print(f"  {case_key(c):32} {c['wall_ms']:9.1f} ms", file=sys.stderr)
+    finally:
+        client.__exit__(None, None, None)
+        os.chdir(cwd)
+        if args.keep:
+            print(f"work dir: {workdir}", file=sys.stderr)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {
+        "meta": {
+            "created": datetime.now(IST).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "render_workers": os.environ.get("RENDER_WORKERS"),
+            "ingest": os.environ.get("ROSTER_INGEST", "stream"),
+            "repeat": args.repeat,
+        },
+        "cases": cases,
+    }
+    print_table(results)
+    if args.save:
+        print(f"\nsaved {save(args.save, results)}")
+    if args.compare:
+        return 0 if compare(args.compare, results, args.tolerance) else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
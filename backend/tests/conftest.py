@@ -0,0 +1,110 @@
+# tests/conftest.py
+"""Shared fixtures: the app against a throwaway SQLite database.
+
+Settings are read when ``app`` modules are imported, so the environment
+and the working directory (the artifact store is relative to it) are set
+up here, before the first import. Run from ``backend/``::
+
+    python -m pytest -q
+"""
+from datetime import datetime
+from pathlib import Path
+from zoneinfo import ZoneInfo
+import atexit
+import io
+import os
+import shutil
+import sys
+import tempfile
+import uuid
+
+WORKDIR = Path(tempfile.mkdtemp(prefix="randomiser-tests-"))
+atexit.register(shutil.rmtree, WORKDIR, ignore_errors=True)
+os.environ["DATABASE_URL"] = f"sqlite:///{WORKDIR / 'test.db'}"
+os.environ["REPORT_DIR"] = str(WORKDIR / "storage" / "reports")
+os.environ["RENDER_WORKERS"] = "0"  # render inline; job tests still use the jobs pool
+os.environ["REPORT_WORKERS"] = "1"
+os.environ["ARTIFACT_SWEEP_SECONDS"] = "0"
+os.chdir(WORKDIR)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from app import models
+from app.database import SessionLocal
+from app.main import app
+from app.services import people
+
+IST = ZoneInfo("Asia/Kolkata")
+USERNAME = "tester"
+ADMIN_FORM = {"shift": "Day", "station": "COK", "department": "Security", "percent": "25"}
+
+
+def today():
+    return datetime.now(IST).date()
+
+
+def roster_xlsx(
+    n: int = 40,
+    *,
+    department: str = "Security",
+    departments: list[str] | None = None,
+    station: str = "COK",
+    shift: str = "Day",
+    on=None,
+    prefix: str | None = None,
+    overrides: dict[int, dict] | None = None,
+) -> bytes:
+    """Roster workbook; ``overrides`` maps 0-based data rows to changed cells.
+
+    Employee ids get a random ``prefix`` by default, so two rosters never
+    hash the same and one test's upload isn't replayed as another's.
+    """
+    prefix = prefix or uuid.uuid4().hex[:6]
+    stamp = datetime.combine(on or today(), datetime.min.time())
+    rows = [
+        {
+            "Date": stamp,
+            "Shift": shift,
+            "Employee ID": f"{prefix}-{i:05d}",
+            "Name": f"Person {i}",
+            "Department": departments[i % len(departments)] if departments else department,
+            "Station": station,
+        }
+        for i in range(n)
+    ]
+    for i, cells in (overrides or {}).items():
+        rows[i].update(cells)
+    buf = io.BytesIO()
+    pd.DataFrame(rows).to_excel(buf, index=False)
+    return buf.getvalue()
+
+
+def upload(content: bytes, name: str = "roster.xlsx") -> dict:
+    return {"file": (name, content, "application/vnd.ms-excel")}
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as c:
+        with SessionLocal() as db:
+            user = models.User(
+                username=USERNAME,
+                hashed_password="plain:pw",
+                name="Test User",
+                department="Security",
+                station="COK",
+                role="user",
+            )
+            db.add(user)
+            people.reindex(db, "user", user)
+            db.commit()
+        yield c
+
+
+@pytest.fixture
+def db():
+    with SessionLocal() as s:
+        yield s
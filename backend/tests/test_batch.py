@@ -0,0 +1,71 @@
+# tests/test_batch.py
+import io
+import json
+import zipfile
+
+from app import models
+from conftest import roster_xlsx, today, upload
+
+URL = "/api/uploads/admin-generate-batch"
+
+
+def _post(client, content: bytes, **form):
+    return client.post(URL, data={"percent": "20", **form}, files=upload(content))
+
+
+def test_zip_has_one_pdf_per_group_and_a_manifest(client, db):
+    content = roster_xlsx(60, departments=["Security", "GSD", "Engineering"])
+    r = _post(client, content)
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/zip"
+    assert r.headers["content-disposition"] == (
+        f'attachment; filename="{today():%d%m%Y}_BATCH_BA.zip"'
+    )
+
+    zf = zipfile.ZipFile(io.BytesIO(r.content))
+    manifest = json.loads(zf.read("manifest.json"))
+    assert [m["department"] for m in manifest] == ["Engineering", "GSD", "Security"]
+    assert sorted(zf.namelist()) == sorted([m["zip_path"] for m in manifest] + ["manifest.json"])
+    for m in manifest:
+        rep = db.get(models.Report, m["report_id"])
+        assert m["zip_path"] == f"{rep.id}_{rep.file_name}"
+        assert m["total_count"] == rep.total_count == 20
+        assert m["selected_count"] == rep.selected_count == 4
+        assert m["download"] == f"/api/reports/{rep.id}/download"
+        assert zf.read(m["zip_path"]) == client.get(m["download"]).content
+
+
+def test_colliding_file_names_get_separate_entries(client):
+    # Different groups, same department token in the generated file name
+    content = roster_xlsx(20, departments=["Flight Dispatch", "Flight-Dispatch"])
+    zf = zipfile.ZipFile(io.BytesIO(_post(client, content).content))
+    manifest = json.loads(zf.read("manifest.json"))
+    assert len({m["file_name"] for m in manifest}) == 1
+    assert len({m["zip_path"] for m in manifest}) == 2
+    assert len(zf.namelist()) == 3
+
+
+def test_manifest_output_and_replay(client, db):
+    content = roster_xlsx(30, departments=["Security", "GSD"])
+    first = _post(client, content, output="manifest").json()
+    assert first["count"] == 2
+    again = _post(client, content, output="manifest").json()
+    assert [m["report_id"] for m in again["reports"]] == [m["report_id"] for m in first["reports"]]
+    ids = [m["report_id"] for m in first["reports"]]
+    assert db.query(models.Report).filter(models.Report.id.in_(ids)).count() == 2
+
+
+def test_batch_validation_names_sheet_and_row(client):
+    content = roster_xlsx(5, overrides={2: {"Employee ID": None}})
+    r = _post(client, content)
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Excel 'Employee ID' is blank (row Sheet1!4)"
+
+
+def test_batch_rejects_bad_input(client):
+    content = roster_xlsx(5)
+    assert _post(client, content, output="pdf").status_code == 400
+    assert _post(client, content, percent="150").status_code == 400
+    assert _post(client, content, test_type="XX").status_code == 400
+    r = client.post(URL, files=upload(content, name="roster.xls"))
+    assert r.status_code == 400
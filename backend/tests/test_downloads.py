@@ -0,0 +1,131 @@
+# tests/test_downloads.py
+import pytest
+from fastapi import HTTPException
+
+from app import models
+from app.services import artifacts, downloads
+from conftest import ADMIN_FORM, roster_xlsx, today, upload
+
+
+@pytest.fixture
+def report(client, db):
+    """(Report, PDF bytes) for a freshly generated report."""
+    r = client.post("/api/uploads/admin-generate", data=ADMIN_FORM, files=upload(roster_xlsx(40)))
+    assert r.status_code == 200
+    rep = db.query(models.Report).order_by(models.Report.id.desc()).first()
+    return rep, r.content
+
+
+def _url(rep) -> str:
+    return f"/api/reports/{rep.id}/download"
+
+
+def _archive(db, rep) -> None:
+    art = db.get(models.Artifact, rep.artifact_id)
+    artifacts.archive_month(db, art.date.replace(day=1), [art])
+
+
+def test_download_has_strong_etag(client, db, report):
+    rep, pdf = report
+    art = db.get(models.Artifact, rep.artifact_id)
+    r = client.get(_url(rep))
+    assert r.status_code == 200
+    assert r.content == pdf
+    assert r.headers["etag"] == f'"{art.sha256}"'
+    assert "immutable" in r.headers["cache-control"]
+    assert rep.file_name in r.headers["content-disposition"]
+
+
+def test_if_none_match_gives_304(client, report):
+    rep, _ = report
+    etag = client.get(_url(rep)).headers["etag"]
+    for header in (etag, f'"other", W/{etag}', "*"):
+        r = client.get(_url(rep), headers={"If-None-Match": header})
+        assert r.status_code == 304, header
+        assert r.content == b""
+        assert r.headers["etag"] == etag
+    assert client.get(_url(rep), headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+@pytest.mark.parametrize("archived", [False, True], ids=["file", "streamed"])
+def test_ranges(client, db, report, archived):
+    rep, pdf = report
+    if archived:
+        _archive(db, rep)
+    size = len(pdf)
+
+    r = client.get(_url(rep), headers={"Range": "bytes=100-199"})
+    assert r.status_code == 206
+    assert r.content == pdf[100:200]
+    assert r.headers["content-range"] == f"bytes 100-199/{size}"
+
+    r = client.get(_url(rep), headers={"Range": "bytes=-50"})
+    assert r.status_code == 206
+    assert r.content == pdf[-50:]
+
+    r = client.get(_url(rep), headers={"Range": f"bytes={size - 10}-"})
+    assert r.content == pdf[-10:]
+
+    r = client.get(_url(rep), headers={"Range": f"bytes={size}-"})
+    assert r.status_code == 416
+    # Starlette's FileResponse leaves out the "bytes " unit
+    assert r.headers["content-range"].endswith(f"*/{size}")
+
+
+def test_if_range_with_old_etag_sends_everything(client, report):
+    rep, pdf = report
+    r = client.get(_url(rep), headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert r.status_code == 200
+    assert r.content == pdf
+
+
+def test_cached_location_survives_archiving(client, db, report):
+    rep, pdf = report
+    assert client.get(_url(rep)).status_code == 200  # now in the LRU with a file path
+    assert downloads._located.get(rep.id).path is not None
+    _archive(db, rep)
+    r = client.get(_url(rep))
+    assert r.status_code == 200
+    assert r.content == pdf
+    assert downloads._located.get(rep.id).path is None
+
+
+def test_unknown_report(client):
+    assert client.get("/api/reports/987654/download").status_code == 404
+
+
+def test_byte_range_parsing():
+    assert downloads.byte_range("bytes=0-0", 10) == (0, 1)
+    assert downloads.byte_range("bytes=5-", 10) == (5, 10)
+    assert downloads.byte_range("bytes=-3", 10) == (7, 10)
+    assert downloads.byte_range("bytes=2-100", 10) == (2, 10)
+    assert downloads.byte_range("bytes=0-1,4-5", 10) is None  # multi-range: send all
+    assert downloads.byte_range("items=0-1", 10) is None
+    assert downloads.byte_range("bytes=x-y", 10) is None
+    with pytest.raises(HTTPException) as e:
+        downloads.byte_range("bytes=10-", 10)
+    assert e.value.status_code == 416
+
+
+def test_adopt_legacy_only_takes_files_inside_report_dir(client, db, tmp_path):
+    inside = artifacts.REPORT_DIR / "legacy-inside.pdf"
+    outside = tmp_path / "outside.pdf"
+    inside.write_bytes(b"%PDF-inside")
+    outside.write_bytes(b"%PDF-outside")
+    reps = [
+        models.Report(file_name=p.name, file_path=str(p), date=today(), station="LEG")
+        for p in (inside, outside)
+    ]
+    db.add_all(reps)
+    db.commit()
+
+    artifacts.adopt_legacy(db)
+    for rep in reps:
+        db.refresh(rep)
+    assert reps[0].artifact_id is not None
+    assert not inside.exists()
+    assert client.get(_url(reps[0])).content == b"%PDF-inside"
+    assert reps[1].artifact_id is None
+    assert reps[1].file_path is None
+    assert outside.read_bytes() == b"%PDF-outside"
+    assert client.get(_url(reps[1])).status_code == 404
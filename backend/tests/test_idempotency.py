@@ -0,0 +1,109 @@
+# tests/test_idempotency.py
+import io
+
+from app import models
+from app.services import idempotency
+from conftest import ADMIN_FORM, USERNAME, roster_xlsx, today, upload
+
+
+def _reports(db, key: str) -> list[models.Report]:
+    db.expire_all()
+    return db.query(models.Report).filter_by(idempotency_key=key).all()
+
+
+def _key(content: bytes, user: str = "admin", **form) -> str:
+    f = {**ADMIN_FORM, "test_type": "BA", **form}
+    return idempotency.request_key(
+        user=user,
+        on=today(),
+        shift=f["shift"],
+        department=f["department"],
+        station=f["station"],
+        test_type=f["test_type"],
+        percent=int(f["percent"]),
+        upload_sha256=idempotency.hash_upload(io.BytesIO(content)),
+    )
+
+
+def test_request_key_covers_every_input():
+    base = dict(
+        user="a", on=today(), shift="Day", department="Security", station="COK",
+        test_type="BA", percent=25, upload_sha256="0" * 64,
+    )
+    key = idempotency.request_key(**base)
+    # Case and padding don't make a new request
+    assert idempotency.request_key(**{**base, "shift": " day ", "station": "cok"}) == key
+    for field, value in [
+        ("user", "b"), ("shift", "Night"), ("department", "GSD"), ("station", "TRV"),
+        ("test_type", "PA"), ("percent", 50), ("upload_sha256", "1" * 64),
+    ]:
+        assert idempotency.request_key(**{**base, field: value}) != key
+
+
+def test_hash_upload_rewinds():
+    fh = io.BytesIO(b"abc")
+    fh.read(1)
+    assert idempotency.hash_upload(fh) == idempotency.hash_upload(io.BytesIO(b"abc"))
+    assert fh.tell() == 0
+
+
+def test_repeat_upload_is_replayed(client, db):
+    content = roster_xlsx(30)
+    first = client.post("/api/uploads/admin-generate", data=ADMIN_FORM, files=upload(content))
+    again = client.post("/api/uploads/admin-generate", data=ADMIN_FORM, files=upload(content))
+    assert first.status_code == again.status_code == 200
+    assert "idempotent-replayed" not in first.headers
+    assert again.headers["idempotent-replayed"] == "true"
+    assert again.content == first.content
+    assert "server-timing" in first.headers
+    assert "server-timing" not in again.headers
+    assert len(_reports(db, _key(content))) == 1
+
+
+def test_other_inputs_generate_again(client, db):
+    content = roster_xlsx(30)
+    client.post("/api/uploads/admin-generate", data=ADMIN_FORM, files=upload(content))
+    pa = client.post(
+        "/api/uploads/admin-generate", data={**ADMIN_FORM, "test_type": "PA"}, files=upload(content)
+    )
+    assert "idempotent-replayed" not in pa.headers
+    half = client.post(
+        "/api/uploads/admin-generate", data={**ADMIN_FORM, "percent": "50"}, files=upload(content)
+    )
+    assert "idempotent-replayed" not in half.headers
+    user = client.post(
+        "/api/uploads/generate",
+        data={"username": USERNAME, "shift": "Day", "station": "COK", "department": "Security"},
+        files=upload(content),
+    )
+    assert user.status_code == 200
+    assert "idempotent-replayed" not in user.headers
+    assert len(_reports(db, _key(content))) == 1
+    assert len(_reports(db, _key(content, test_type="PA"))) == 1
+    (rep,) = _reports(db, _key(content, percent="50"))
+    assert rep.percent == 50
+    assert len(_reports(db, _key(content, user=USERNAME))) == 1
+
+
+def test_double_submit_serves_the_winner(client, db, monkeypatch):
+    """Both requests miss the lookup; the loser hits the unique index."""
+    content = roster_xlsx(30)
+    first = client.post("/api/uploads/admin-generate", data=ADMIN_FORM, files=upload(content))
+
+    real = idempotency.find_report
+    calls = []
+
+    def racing(db, key, on):
+        calls.append(key)
+        return None if len(calls) == 1 else real(db, key, on)
+
+    monkeypatch.setattr(idempotency, "find_report", racing)
+    second = client.post("/api/uploads/admin-generate", data=ADMIN_FORM, files=upload(content))
+
+    assert len(calls) == 2  # the miss, then the lookup after IntegrityError
+    assert second.status_code == 200
+    assert second.headers["idempotent-replayed"] == "true"
+    assert second.content == first.content
+    reps = _reports(db, _key(content))
+    assert len(reps) == 1
+    assert db.query(models.Selection).filter_by(report_id=reps[0].id).count() == reps[0].selected_count
@@ -0,0 +1,138 @@
+# tests/test_jobs.py
+import io
+import time
+import uuid
+
+import pandas as pd
+
+from app import models
+from conftest import ADMIN_FORM, roster_xlsx, upload
+
+
+def _wait(client, job_id: str, timeout: float = 120) -> dict:
+    deadline = time.monotonic() + timeout
+    while True:
+        body = client.get(f"/api/uploads/jobs/{job_id}").json()
+        if body["status"] in ("done", "failed"):
+            return body
+        assert time.monotonic() < deadline, body
+        time.sleep(0.1)
+
+
+def _hr_sheet(rows: list[dict]) -> bytes:
+    buf = io.BytesIO()
+    pd.DataFrame(rows).to_excel(buf, index=False)
+    return buf.getvalue()
+
+
+def _hr_row(username, password="pw", **cells) -> dict:
+    return {
+        "Name": f"Name {username}",
+        "Designation": "Officer",
+        "Username": username,
+        "Password": password,
+        "Emailid": f"{username}@example.com" if username else None,
+        "Phone No": "12345",
+        "Station": "COK",
+        **cells,
+    }
+
+
+def test_report_job_result_is_the_pdf(client, db):
+    r = client.post(
+        "/api/uploads/jobs/admin-generate", data=ADMIN_FORM, files=upload(roster_xlsx(40))
+    )
+    assert r.status_code == 202
+    job_id = r.json()["job_id"]
+    assert r.json()["poll"] == f"/api/uploads/jobs/{job_id}"
+
+    job = _wait(client, job_id)
+    assert job["status"] == "done", job
+    assert job["kind"] == "report"
+    assert job["progress"] == 1.0
+    res = job["result"]
+    assert res["total_count"] == 40
+    assert res["selected_count"] == 10
+    assert {"parse", "validate", "select", "render", "persist"} <= set(res["timings"])
+    assert res["pdf_build"] > 0
+
+    pdf = client.get(f"/api/uploads/jobs/{job_id}/result")
+    assert pdf.status_code == 200
+    assert pdf.content.startswith(b"%PDF")
+    assert pdf.content == client.get(f"/api/reports/{res['report_id']}/download").content
+    rep = db.get(models.Report, res["report_id"])
+    assert rep.file_name == res["file_name"]
+
+
+def test_repeat_job_is_replayed_without_queueing(client):
+    content = roster_xlsx(20)
+    first = client.post("/api/uploads/jobs/admin-generate", data=ADMIN_FORM, files=upload(content))
+    done = _wait(client, first.json()["job_id"])
+    again = client.post("/api/uploads/jobs/admin-generate", data=ADMIN_FORM, files=upload(content))
+    assert again.status_code == 200
+    assert again.json()["job_id"] is None
+    assert again.json()["replayed"] is True
+    assert again.json()["report_id"] == done["result"]["report_id"]
+
+
+def test_failed_report_job_surfaces_the_error(client):
+    content = roster_xlsx(10, overrides={3: {"Department": "GSD"}})
+    r = client.post("/api/uploads/jobs/admin-generate", data=ADMIN_FORM, files=upload(content))
+    job_id = r.json()["job_id"]
+    job = _wait(client, job_id)
+    assert job["status"] == "failed"
+    assert job["error"].endswith("(row 5)")
+    res = client.get(f"/api/uploads/jobs/{job_id}/result")
+    assert res.status_code == 400
+    assert res.json()["detail"] == job["error"]
+
+
+def test_unknown_job(client):
+    assert client.get("/api/uploads/jobs/nope").status_code == 404
+    assert client.get("/api/uploads/jobs/nope/result").status_code == 404
+    assert client.get("/api/admin/users/import/nope").status_code == 404
+
+
+def test_user_import_job(client, db):
+    tag = uuid.uuid4().hex[:6]
+    a, b = f"{tag}-a", f"{tag}-b"
+    r = client.post(
+        "/api/admin/users/import",
+        files=upload(_hr_sheet([_hr_row(a), _hr_row(b), _hr_row(None), _hr_row(f"{tag}-c", None)])),
+    )
+    assert r.status_code == 202
+    body = r.json()
+    assert body["result"] == f"/api/admin/users/import/{body['job_id']}"
+    assert _wait(client, body["job_id"])["status"] == "done"
+
+    summary = client.get(body["result"])
+    assert summary.status_code == 200
+    assert summary.json() == {
+        "inserted": 2,
+        "updated": 0,
+        "skipped_count": 2,
+        "skipped": ["SKIP: row 4 has empty username", f"SKIP: {tag}-c has empty password"],
+    }
+    # A user import has no PDF to hand out
+    assert client.get(f"/api/uploads/jobs/{body['job_id']}/result").status_code == 404
+
+    # Second run updates in place
+    r = client.post(
+        "/api/admin/users/import", files=upload(_hr_sheet([_hr_row(a, Designation="Supervisor")]))
+    )
+    assert _wait(client, r.json()["job_id"])["status"] == "done"
+    assert client.get(r.json()["result"]).json()["updated"] == 1
+    db.expire_all()
+    user = db.query(models.User).filter_by(username=a).one()
+    assert user.designation == "Supervisor"
+    assert user.hashed_password.startswith("$2")
+
+
+def test_user_import_rejects_bad_sheets(client):
+    assert client.post("/api/admin/users/import", files=upload(b"x", name="users.csv")).status_code == 400
+    r = client.post("/api/admin/users/import", files=upload(_hr_sheet([{"Name": "x"}])))
+    job_id = r.json()["job_id"]
+    assert _wait(client, job_id)["status"] == "failed"
+    res = client.get(f"/api/admin/users/import/{job_id}")
+    assert res.status_code == 400
+    assert res.json()["detail"].startswith("Missing required columns")
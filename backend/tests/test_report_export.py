@@ -0,0 +1,102 @@
+# tests/test_report_export.py
+import csv
+import io
+import zipfile
+from datetime import date
+
+import pytest
+
+from app import models
+from app.services import report_export
+from conftest import ADMIN_FORM, roster_xlsx, today, upload
+
+STATION = "EXP"
+URL = "/api/reports/admin/export"
+
+
+@pytest.fixture(scope="module")
+def exported(client):
+    """Two generated reports at STATION plus one whose PDF is gone."""
+    from app.database import SessionLocal
+
+    form = {**ADMIN_FORM, "station": STATION}
+    for dept in ("Security", "GSD"):
+        r = client.post(
+            "/api/uploads/admin-generate",
+            data={**form, "department": dept},
+            files=upload(roster_xlsx(20, department=dept, station=STATION)),
+        )
+        assert r.status_code == 200
+    with SessionLocal() as db:
+        lost = models.Report(
+            file_name="lost.pdf",
+            date=date(2025, 1, 2),
+            shift="Day",
+            department="Security",
+            station=STATION,
+            station_key=STATION.lower(),
+            department_key="security",
+            shift_key="day",
+            test_type="BA",
+        )
+        db.add(lost)
+        db.commit()
+        reps = db.query(models.Report).filter_by(station_key=STATION.lower()).all()
+        return {r.id: (r.file_name, r.date) for r in reps}, lost.id
+
+
+def _manifest(zf: zipfile.ZipFile) -> list[dict]:
+    return list(csv.DictReader(io.StringIO(zf.read("manifest.csv").decode())))
+
+
+def test_export_zip_and_manifest(client, exported):
+    reports, lost_id = exported
+    r = client.get(URL, params={"station": STATION.lower()})
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/zip"
+    assert r.headers["content-disposition"] == f'attachment; filename="REPORTS_{STATION}.zip"'
+
+    zf = zipfile.ZipFile(io.BytesIO(r.content))
+    rows = _manifest(zf)
+    assert list(rows[0]) == report_export.MANIFEST_COLUMNS
+    # Oldest first, the missing PDF listed but not zipped
+    assert [int(m["id"]) for m in rows] == sorted(reports, key=lambda i: (reports[i][1], i))
+    by_id = {int(m["id"]): m for m in rows}
+    assert by_id[lost_id]["status"] == "missing"
+    assert by_id[lost_id]["zip_path"] == ""
+
+    ok = [m for m in rows if m["status"] == "ok"]
+    assert len(ok) == 2
+    assert zf.namelist() == [m["zip_path"] for m in ok] + ["manifest.csv"]
+    for m in ok:
+        rid = int(m["id"])
+        file_name, day = reports[rid]
+        assert m["zip_path"] == f"{day:%Y-%m-%d}/{rid}_{file_name}"
+        assert len(m["sha256"]) == 64
+        assert zf.read(m["zip_path"]) == client.get(f"/api/reports/{rid}/download").content
+
+
+def test_export_filters_and_name(client, exported):
+    r = client.get(
+        URL,
+        params={"station": STATION, "department": "gsd", "test_type": "ba", "date_from": today()},
+    )
+    assert r.status_code == 200
+    assert r.headers["content-disposition"] == (
+        f'attachment; filename="REPORTS_{STATION}_BA_{today():%d%m%Y}.zip"'
+    )
+    rows = _manifest(zipfile.ZipFile(io.BytesIO(r.content)))
+    assert [m["department"] for m in rows] == ["GSD"]
+
+
+def test_export_nothing_matches(client, exported):
+    r = client.get(URL, params={"station": "NOWHERE"})
+    assert r.status_code == 404
+    assert r.json()["detail"] == "No reports match the filters"
+
+
+def test_export_over_the_limit(client, exported, monkeypatch):
+    monkeypatch.setattr(report_export, "MAX_EXPORT_REPORTS", 2)
+    r = client.get(URL, params={"station": STATION})
+    assert r.status_code == 400
+    assert r.json()["detail"] == "3 reports match; narrow the filters (limit 2)"
@@ -0,0 +1,95 @@
+# tests/test_report_listing.py
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app import models
+from app.services import report_listing
+
+STATION = "PAG"
+
+
+@pytest.fixture(scope="module")
+def paged_reports(client):
+    """25 reports at one station; created_at ties every third row."""
+    from app.database import SessionLocal
+
+    base = datetime(2025, 1, 1, 8, 0, 0)
+    with SessionLocal() as db:
+        reps = [
+            models.Report(
+                file_name=f"r{i}.pdf",
+                date=date(2025, 1, 1) + timedelta(days=i % 3),
+                shift="Day" if i % 2 else "Night",
+                department="Security",
+                station=STATION,
+                station_key=STATION.lower(),
+                department_key="security",
+                shift_key="day" if i % 2 else "night",
+                test_type="BA",
+                created_at=base + timedelta(minutes=i // 3),
+            )
+            for i in range(25)
+        ]
+        db.add_all(reps)
+        db.commit()
+        # Newest first, ties broken by the higher id
+        return [r.id for r in sorted(reps, key=lambda r: (r.created_at, r.id), reverse=True)]
+
+
+def _walk(client, page_size: int, **params) -> tuple[list[int], list[dict]]:
+    ids, pages, cursor = [], [], None
+    while True:
+        q = {"station": STATION, "page_size": page_size, **params}
+        if cursor:
+            q["cursor"] = cursor
+        body = client.get("/api/reports/admin", params=q).json()
+        pages.append(body)
+        ids += [it["id"] for it in body["items"]]
+        cursor = body["next_cursor"]
+        if not cursor:
+            return ids, pages
+
+
+def test_cursor_pages_cover_everything_once(client, paged_reports):
+    ids, pages = _walk(client, 10)
+    assert ids == paged_reports
+    assert [len(p["items"]) for p in pages] == [10, 10, 5]
+    # Total only on the first (cursorless) request
+    assert pages[0]["total"] == 25
+    assert [p["total"] for p in pages[1:]] == [None, None]
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 25, 100])
+def test_page_sizes_across_created_at_ties(client, paged_reports, size):
+    ids, _ = _walk(client, size)
+    assert ids == paged_reports
+
+
+def test_cursor_respects_filters(client, paged_reports):
+    ids, _ = _walk(client, 4, shift="DAY")
+    one_page = client.get(
+        "/api/reports/admin", params={"station": STATION, "shift": "day", "page_size": 100}
+    ).json()
+    assert ids == [it["id"] for it in one_page["items"]]
+    assert len(ids) == one_page["total"] == 12
+    assert set(ids) < set(paged_reports)
+
+
+def test_offset_pages_match_keyset(client, paged_reports):
+    page2 = client.get(
+        "/api/reports/admin", params={"station": STATION, "page": 2, "page_size": 10}
+    ).json()
+    assert [it["id"] for it in page2["items"]] == paged_reports[10:20]
+    after = client.get(
+        "/api/reports/admin", params={"station": STATION, "page_size": 10, "cursor": page2["next_cursor"]}
+    ).json()
+    assert [it["id"] for it in after["items"]] == paged_reports[20:]
+
+
+def test_cursor_round_trip_and_bad_cursor(client):
+    rep = models.Report(id=42, created_at=datetime(2025, 3, 4, 5, 6, 7))
+    assert report_listing.decode_cursor(report_listing.encode_cursor(rep)) == (rep.created_at, 42)
+    r = client.get("/api/reports/admin", params={"cursor": "not-a-cursor"})
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Invalid cursor"
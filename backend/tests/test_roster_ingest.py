@@ -0,0 +1,87 @@
+# tests/test_roster_ingest.py
+from datetime import timedelta
+import io
+
+import pandas as pd
+import pytest
+from fastapi import HTTPException
+
+from app.services.roster_ingest import stream_roster
+from conftest import ADMIN_FORM, USERNAME, roster_xlsx, today, upload
+
+
+def _stream(content: bytes, **kw):
+    args = dict(today=today(), shift="Day", department="Security", station="COK")
+    return stream_roster(io.BytesIO(content), **{**args, **kw})
+
+
+def test_stream_keeps_name_id_and_department():
+    df = _stream(roster_xlsx(5, prefix="ING"))
+    assert list(df.columns) == ["Person Name", "Employee ID", "Department"]
+    assert df["Employee ID"].tolist() == [f"ING-{i:05d}" for i in range(5)]
+    assert set(df["Department"]) == {"Security"}
+
+
+def test_stream_matches_case_insensitively():
+    df = _stream(roster_xlsx(3), shift="DAY", station="cok", department="SECURITY")
+    assert len(df) == 3
+
+
+def test_stream_reports_first_bad_row_number():
+    # Data row 3 is Excel row 5 (header is row 1)
+    content = roster_xlsx(6, overrides={3: {"Station": "TRV"}, 5: {"Shift": "Night"}})
+    with pytest.raises(HTTPException) as e:
+        _stream(content)
+    assert e.value.status_code == 400
+    assert e.value.detail == "Excel 'Station' does not match the selected station (row 5)"
+
+
+def test_stream_rejects_other_days():
+    content = roster_xlsx(2, on=today() - timedelta(days=1))
+    with pytest.raises(HTTPException) as e:
+        _stream(content)
+    assert "(row 2)" in e.value.detail
+    assert today().isoformat() in e.value.detail
+
+
+def test_stream_missing_columns():
+    buf = io.BytesIO()
+    pd.DataFrame({"Name": ["a"], "Date": [today()]}).to_excel(buf, index=False)
+    with pytest.raises(HTTPException) as e:
+        _stream(buf.getvalue())
+    assert e.value.status_code == 400
+    assert e.value.detail.startswith("Missing columns in Excel:")
+    assert "employee id" in e.value.detail
+
+
+def test_stream_reads_first_sheet_not_active_one():
+    buf = io.BytesIO()
+    with pd.ExcelWriter(buf) as xw:
+        pd.read_excel(io.BytesIO(roster_xlsx(5))).to_excel(xw, sheet_name="Roster", index=False)
+        pd.DataFrame({"Note": ["see roster"]}).to_excel(xw, sheet_name="Notes", index=False)
+        xw.book.active = 1
+    assert len(_stream(buf.getvalue())) == 5
+
+
+def test_stream_invalid_workbook():
+    with pytest.raises(HTTPException) as e:
+        _stream(b"not a workbook")
+    assert e.value.detail.startswith("Invalid Excel:")
+
+
+def test_generate_route_returns_row_number(client):
+    content = roster_xlsx(10, overrides={7: {"Department": "GSD"}})
+    r = client.post(
+        "/api/uploads/generate",
+        data={"username": USERNAME, "shift": "Day", "station": "COK", "department": "Security"},
+        files=upload(content),
+    )
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Excel 'Department' does not match your department (row 9)"
+
+
+def test_admin_generate_streams_xlsx(client):
+    r = client.post("/api/uploads/admin-generate", data=ADMIN_FORM, files=upload(roster_xlsx(20)))
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/pdf"
+    assert r.content.startswith(b"%PDF-")
@@ -0,0 +1,94 @@
+# tests/test_roster_validation.py
+from datetime import timedelta
+import io
+
+import pandas as pd
+
+from app.services import report_pipeline
+from app.services.roster_ingest import read_workbook
+from app.services.roster_validation import check_roster, check_workbook
+from conftest import ADMIN_FORM, USERNAME, roster_xlsx, today, upload
+
+COLS = {c.lower(): c for c in ["Date", "Shift", "Employee ID", "Name", "Department", "Station"]}
+
+
+def _frame(content: bytes) -> pd.DataFrame:
+    return pd.read_excel(io.BytesIO(content))
+
+
+def _check(df: pd.DataFrame, **kw):
+    args = dict(today=today(), shift="Day", department="Security", station="COK")
+    return check_roster(df, COLS, **{**args, **kw})
+
+
+def test_clean_roster_has_no_errors():
+    errors = _check(_frame(roster_xlsx(30)))
+    assert not errors
+    assert errors.message() == ""
+
+
+def test_every_failing_row_is_reported():
+    df = _frame(
+        roster_xlsx(
+            8,
+            overrides={
+                1: {"Shift": "Night"},
+                2: {"Station": "TRV"},
+                4: {"Station": "TRV"},
+                6: {"Department": "GSD"},
+            },
+        )
+    )
+    errors = _check(df)
+    assert errors.excel_rows("Excel 'Station' does not match the selected station") == [4, 6]
+    assert errors.message() == (
+        "Excel 'Shift' does not match the selected shift (row 3); "
+        "Excel 'Department' does not match the selected department (row 8); "
+        "Excel 'Station' does not match the selected station (rows 4, 6)"
+    )
+
+
+def test_dates_unparsable_and_other_day_are_separate():
+    df = _frame(roster_xlsx(4, overrides={0: {"Date": "not a date"}}))
+    df.loc[2, "Date"] = pd.Timestamp(today() - timedelta(days=1))
+    errors = _check(df)
+    assert errors.excel_rows("Excel 'Date' column cannot be parsed") == [2]
+    assert errors.excel_rows(f"Excel Date must be {today().isoformat()} (IST)") == [4]
+
+
+def test_long_lists_are_truncated():
+    df = _frame(roster_xlsx(15, station="TRV"))
+    msg = _check(df).message()
+    assert msg.endswith("(rows 2, 3, 4, 5, 6, 7, 8, 9, 10, 11 +5 more)")
+
+
+def test_canonical_departments():
+    df = _frame(roster_xlsx(3, department="Ground Service Department (GSD)"))
+    assert not _check(df, department="GSD", canon=report_pipeline.canon_dept)
+    assert _check(df, department="GSD")
+
+
+def test_workbook_errors_name_sheet_and_row():
+    frame = read_workbook(io.BytesIO(roster_xlsx(5, overrides={3: {"Station": None}})))
+    errors = check_workbook(frame, today=today())
+    assert errors.message() == "Excel 'Station' is blank (row Sheet1!5)"
+
+
+def test_pandas_route_returns_all_rows(client, monkeypatch):
+    monkeypatch.setattr(report_pipeline, "INGEST_MODE", "pandas")
+    content = roster_xlsx(10, overrides={2: {"Shift": "Night"}, 7: {"Shift": "Night"}})
+    r = client.post("/api/uploads/admin-generate", data=ADMIN_FORM, files=upload(content))
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Excel 'Shift' does not match the selected shift (rows 4, 9)"
+
+
+def test_user_route_keeps_your_department_wording(client, monkeypatch):
+    monkeypatch.setattr(report_pipeline, "INGEST_MODE", "pandas")
+    content = roster_xlsx(5, overrides={1: {"Department": "GSD"}})
+    r = client.post(
+        "/api/uploads/generate",
+        data={"username": USERNAME, "shift": "Day", "station": "COK", "department": "Security"},
+        files=upload(content),
+    )
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Excel 'Department' does not match your department (row 3)"
@@ -0,0 +1,112 @@
+# tests/test_selection.py
+import io
+
+import numpy as np
+import pytest
+
+from app import models
+from app.services.roster_ingest import stream_roster
+from app.services.selection import (
+    CooldownStrategy,
+    make_strategy,
+    sample_size,
+    select_per_department,
+)
+from app.services.selection_history import recent_picks
+from conftest import ADMIN_FORM, roster_xlsx, today, upload
+
+DEPTS = np.array(["B", "A", "B", "A", "C", "B", "A", "B", "B", "A"] * 10, dtype=object)
+IDS = np.array([f"E{i:03d}" for i in range(len(DEPTS))], dtype=object)
+
+
+def test_same_seed_same_selection():
+    a = select_per_department(DEPTS, IDS, 30, seed=1234)
+    b = select_per_department(DEPTS, IDS, 30, seed=1234)
+    assert a.positions.tolist() == b.positions.tolist()
+    assert a.seed_hex == f"{1234:032x}"
+    assert select_per_department(DEPTS, IDS, 30, seed=99).positions.tolist() != a.positions.tolist()
+
+
+def test_sample_per_department():
+    res = select_per_department(DEPTS, IDS, 25, seed=7)
+    picked = DEPTS[res.positions]
+    for dept in ("A", "B", "C"):
+        n = int((DEPTS == dept).sum())
+        assert int((picked == dept).sum()) == sample_size(n, 25)
+    assert len(set(res.positions.tolist())) == len(res.positions)  # no repeats
+    assert sample_size(0, 50) == 0
+    assert sample_size(3, 1) == 1  # at least one per non-empty department
+
+
+def test_cooldown_weights():
+    s = CooldownStrategy({"E001": 2, "E002": 1}, factor=0.5)
+    w = s.weights(np.array(["E000", "E001", "E002"], dtype=object))
+    assert w.tolist() == [1.0, 0.25, 0.5]
+    assert CooldownStrategy({}).weights(IDS) is None
+    with pytest.raises(ValueError):
+        CooldownStrategy(factor=0)
+
+
+def test_cooldown_avoids_recent_picks():
+    depts = np.array(["A"] * 10, dtype=object)
+    ids = np.array([f"E{i}" for i in range(10)], dtype=object)
+    recent = {f"E{i}": 30 for i in range(9)}  # weight ~0 for all but E9
+    res = select_per_department(depts, ids, 10, make_strategy("cooldown", recent_picks=recent), seed=5)
+    assert ids[res.positions].tolist() == ["E9"]
+    assert res.strategy == "cooldown"
+
+
+def test_unknown_strategy():
+    with pytest.raises(ValueError):
+        make_strategy("round-robin")
+
+
+def test_stored_seed_replays_selection(client, db):
+    content = roster_xlsx(60)
+    r = client.post("/api/uploads/admin-generate", data=ADMIN_FORM, files=upload(content))
+    assert r.status_code == 200
+    rep = db.query(models.Report).order_by(models.Report.id.desc()).first()
+    assert rep.selection_strategy == "uniform"
+    stored = [
+        s.employee_id
+        for s in db.query(models.Selection).filter_by(report_id=rep.id).order_by(models.Selection.id)
+    ]
+    assert len(stored) == rep.selected_count == sample_size(60, 25)
+
+    clean = stream_roster(
+        io.BytesIO(content), today=today(), shift="Day", department="Security", station="COK"
+    )
+    replay = select_per_department(
+        clean["Department"].to_numpy(),
+        clean["Employee ID"].to_numpy(),
+        25,
+        seed=int(rep.selection_seed, 16),
+    )
+    assert clean["Employee ID"].to_numpy()[replay.positions].tolist() == stored
+
+
+def test_recent_picks_ignore_case_and_spacing(client, db):
+    form = {**ADMIN_FORM, "station": "HIS", "department": "GSD"}
+    content = roster_xlsx(20, station="HIS", department="GSD")
+    assert client.post("/api/uploads/admin-generate", data=form, files=upload(content)).status_code == 200
+    rep = db.query(models.Report).order_by(models.Report.id.desc()).first()
+    picked = {s.employee_id for s in db.query(models.Selection).filter_by(report_id=rep.id)}
+    assert recent_picks(db, "his", " gsd ") == {eid: 1 for eid in picked}
+    assert recent_picks(db, "HIS", "Security") == {}
+
+
+def test_fairness_counts_merge_spelling_variants(client, db):
+    for dept in ("Flight Ops", " flight ops"):
+        form = {**ADMIN_FORM, "station": "FAI", "department": dept}
+        content = roster_xlsx(4, station="FAI", department="Flight Ops", prefix=f"FAI{len(dept)}")
+        assert client.post("/api/uploads/admin-generate", data=form, files=upload(content)).status_code == 200
+    r = client.get(
+        "/api/reports/selections/fairness", params={"station": "fai", "department": "FLIGHT OPS "}
+    ).json()
+    assert r["picks"] == 2
+    assert r["items"][0]["last_date"] == today().isoformat()
+
+    eid = r["items"][0]["employee_id"]
+    hist = client.get(f"/api/reports/selections/employee/{eid}", params={"days": 1}).json()
+    assert hist["tested"] is True
+    assert hist["last_date"] == today().isoformat()
@@ -0,0 +1,37 @@
+# tests/test_stats.py
+from app import models
+from app.services import stats
+from conftest import ADMIN_FORM, roster_xlsx, today, upload
+
+STATION = "STA"
+
+
+def _totals(client) -> dict:
+    r = client.get("/api/stats", params={"station": STATION, "date_from": today()})
+    assert r.status_code == 200
+    return r.json()["totals"]
+
+
+def test_new_reports_show_up_in_cached_stats(client):
+    assert _totals(client)["reports"] == 0  # now cached
+    form = {**ADMIN_FORM, "station": STATION}
+    content = roster_xlsx(20, station=STATION)
+    assert client.post("/api/uploads/admin-generate", data=form, files=upload(content)).status_code == 200
+    assert _totals(client) == {"reports": 1, "total_count": 20, "selected_count": 5, "ratio": 0.25}
+
+    batch = roster_xlsx(20, station=STATION, departments=["Security", "GSD"])
+    r = client.post("/api/uploads/admin-generate-batch", data={"percent": "50"}, files=upload(batch))
+    assert r.status_code == 200
+    assert _totals(client)["reports"] == 3
+
+
+def test_bump_leaves_the_cache_until_commit(client, db):
+    rep = models.Report(date=today(), station="STB", department="Security", total_count=4)
+    db.add(rep)
+    db.flush()
+    cached = stats.summary(db, station="STB")
+    stats.bump(db, rep)
+    assert stats.summary(db, station="STB") is cached
+    db.commit()
+    stats.invalidate()
+    assert stats.summary(db, station="STB")["totals"]["total_count"] == 4
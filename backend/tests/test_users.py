@@ -0,0 +1,82 @@
+# tests/test_users.py
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from passlib.context import CryptContext
+
+from app import models
+from app.routes import users
+from app.services import auth
+from conftest import USERNAME
+
+OLD_COST = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=4)
+
+
+@pytest.fixture
+def api(client):
+    app = FastAPI()
+    app.include_router(users.router, prefix="/users")
+    return TestClient(app)
+
+
+@pytest.fixture
+def old_user(db):
+    """A users row with role admin whose hash predates BCRYPT_ROUNDS."""
+    u = models.User(
+        username=f"old-{uuid.uuid4().hex[:6]}",
+        hashed_password=OLD_COST.hash("pw"),
+        role="admin",
+    )
+    db.add(u)
+    db.commit()
+    return u
+
+
+def _stored(db, u) -> str:
+    db.expire_all()
+    return db.get(models.User, u.id).hashed_password
+
+
+def test_login_saves_rehashed_password(api, db, old_user):
+    r = api.post("/users/login", json={"username": old_user.username, "password": "pw"})
+    assert r.status_code == 200
+    assert r.json()["role"] == "admin"
+    stored = _stored(db, old_user)
+    assert stored.startswith(f"$2b${auth.BCRYPT_ROUNDS:02d}$")
+    assert auth.pwd_ctx.verify("pw", stored)
+
+
+def test_login_rejects_wrong_password(api, db, old_user):
+    before = _stored(db, old_user)
+    r = api.post("/users/login", json={"username": old_user.username, "password": "nope"})
+    assert r.status_code == 401
+    assert api.post("/users/login", json={"username": "ghost", "password": "pw"}).status_code == 401
+    assert _stored(db, old_user) == before
+
+
+def test_change_password(api, db, old_user):
+    body = {"username": old_user.username, "current": "wrong", "new": "pw2"}
+    assert api.post("/users/change-password", json=body).status_code == 400
+    r = api.post("/users/change-password", json={**body, "current": "pw"})
+    assert r.status_code == 200
+    stored = _stored(db, old_user)
+    assert stored.startswith(f"$2b${auth.BCRYPT_ROUNDS:02d}$")
+    assert auth.pwd_ctx.verify("pw2", stored)
+
+
+def test_seeded_users_are_searchable(db):
+    from app.create_test_users import ensure_user
+    from app.services import people
+
+    def found(term):
+        q = db.query(models.User).where(*people.matching("user", people.search_terms(term)))
+        return [u.username for u in q]
+
+    ensure_user(db, username="SEED01", plain_password="x", role="admin", name="Zebedee", designation="IT")
+    assert found("zebe") == ["SEED01"]
+    ensure_user(db, username="SEED01", plain_password="x", role="admin", name="Quentin", designation="IT")
+    assert found("zebe") == []
+    assert found("quen") == ["SEED01"]
+    assert found(USERNAME) == [USERNAME]
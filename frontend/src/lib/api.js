@@ -382,6 +382,27 @@ export function listAdminReports({
   return request("GET", `/api/reports/admin?${qs.toString()}`);
 }
 
+// Admin: every report matching the filters as one ZIP (+ manifest.csv).
+// The server streams it, so hand this URL to a link and let the browser
+// write it to disk instead of buffering a blob.
+export function adminReportsExportUrl({
+  date_from,
+  date_to,
+  shift = "",
+  department = "",
+  station = "",
+  test_type = "",
+}) {
+  const qs = new URLSearchParams();
+  if (date_from) qs.set("date_from", date_from);
+  if (date_to) qs.set("date_to", date_to);
+  if (shift) qs.set("shift", shift);
+  if (department) qs.set("department", department);
+  if (station) qs.set("station", station);
+  if (test_type) qs.set("test_type", test_type);
+  return `${BASE}/api/reports/admin/export?${qs.toString()}`;
+}
+
 // Download a report by id
 export async function downloadReport(reportId) {
   const res = await request(
@@ -3,7 +3,7 @@ import AdminSidebar from "../components/Layout/AdminSidebar";
 import AdminTopBar from "../components/Layout/AdminTopBar";
 import downloadIcon from "../assets/icons/download_arrow.png";
 import "./AdminReports.css";
-import { listAdminReports, downloadReport, getDropdowns } from "../lib/api";
+import { listAdminReports, adminReportsExportUrl, downloadReport, getDropdowns } from "../lib/api";
 
 const AdminReports = () => {
   const [filters, setFilters] = useState({
@@ -22,6 +22,7 @@ const AdminReports = () => {
 
   const [searched, setSearched] = useState(false);
   const [serverRows, setServerRows] = useState([]);
+  const [exportUrl, setExportUrl] = useState(""); // filters of the last search
   const [tableSearch, setTableSearch] = useState("");
   const [page, setPage] = useState(1);
   const [showWarning, setShowWarning] = useState(false);
@@ -72,18 +73,18 @@ const AdminReports = () => {
 
     setLoading(true);
     setErr("");
+    const query = {
+      date_from: filters.from,
+      date_to: filters.to,
+      shift: filters.shift || "",
+      department: filters.department || "",
+      station: filters.station || "",   // code
+      test_type: filters.testType || "",
+    };
     try {
-      const res = await listAdminReports({
-        date_from: filters.from,
-        date_to: filters.to,
-        shift: filters.shift || "",
-        department: filters.department || "",
-        station: filters.station || "",   // code
-        test_type: filters.testType || "",
-        page: 1,
-        page_size: 200,
-      });
+      const res = await listAdminReports({ ...query, page: 1, page_size: 200 });
       setServerRows(res?.items ?? []);
+      setExportUrl(adminReportsExportUrl(query));
       setSearched(true);
       setTableSearch("");
       setPage(1);
@@ -263,6 +264,11 @@ const AdminReports = () => {
                   value={tableSearch}
                   onChange={handleTableSearch}
                 />
+                {serverRows.length > 0 && (
+                  <a className="ar-export-btn" href={exportUrl} download>
+                    Export all (ZIP)
+                  </a>
+                )}
               </div>
               <table className="ar-table">
                 <thead>